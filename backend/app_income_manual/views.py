@@ -1,15 +1,26 @@
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from .models import IncomeManual
 from .serializers import IncomeManualSerializers
+from dashboard_backend.export import ExportMixin
+from dashboard_backend.filters import IncomeFilterBackend
+from dashboard_backend.pagination import IncomeCursorPagination
 
-class IncomeManualListView(ListAPIView):
+class IncomeManualListView(ExportMixin, ListAPIView):
     queryset = IncomeManual.objects.all()
     serializer_class = IncomeManualSerializers
+    # Keyset pagination + filter tanggal/shift/kendaraan/kategori di database,
+    # ?export=ndjson|csv untuk mengalirkan seluruh hasil filter
+    pagination_class = IncomeCursorPagination
+    export_filename = 'income_manual'
+    filter_backends = [IncomeFilterBackend]
 
 
 # View baru untuk filter berdasarkan id_lokasi
-class IncomeManualByLokasiView(ListAPIView):
+class IncomeManualByLokasiView(ExportMixin, ListAPIView):
     serializer_class = IncomeManualSerializers
+    pagination_class = IncomeCursorPagination
+    export_filename = 'income_manual'
+    filter_backends = [IncomeFilterBackend]
 
     def get_queryset(self):
         id_lokasi = self.kwargs['id_lokasi']
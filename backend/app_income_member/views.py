@@ -1,15 +1,26 @@
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from .models import IncomeMember
 from .serializers import IncomeMemberSerializers
+from dashboard_backend.export import ExportMixin
+from dashboard_backend.filters import IncomeFilterBackend
+from dashboard_backend.pagination import IncomeCursorPagination
 
-class IncomeMemberListView(ListAPIView):
+class IncomeMemberListView(ExportMixin, ListAPIView):
     queryset = IncomeMember.objects.all()
     serializer_class = IncomeMemberSerializers
+    # Keyset pagination + filter tanggal/shift/kendaraan/kategori di database,
+    # ?export=ndjson|csv untuk mengalirkan seluruh hasil filter
+    pagination_class = IncomeCursorPagination
+    export_filename = 'income_member'
+    filter_backends = [IncomeFilterBackend]
 
 
 # View baru untuk filter berdasarkan id_lokasi
-class IncomeMemberByLokasiView(ListAPIView):
+class IncomeMemberByLokasiView(ExportMixin, ListAPIView):
     serializer_class = IncomeMemberSerializers
+    pagination_class = IncomeCursorPagination
+    export_filename = 'income_member'
+    filter_backends = [IncomeFilterBackend]
 
     def get_queryset(self):
         id_lokasi = self.kwargs['id_lokasi']
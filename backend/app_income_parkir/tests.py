@@ -1,3 +1,95 @@
+# app_income_parkir/tests.py
+
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+from app_locations.models import Locations
+from dashboard_backend import export
+from .models import IncomeParkir
+
+UNMANAGED_MODELS = (Locations, IncomeParkir)
+
+class IncomeParkirListTests(TestCase):
+    """Keyset pagination dan filter server-side untuk endpoint list income parkir."""
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            for model in UNMANAGED_MODELS:
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for model in reversed(UNMANAGED_MODELS):
+                editor.delete_model(model)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='-')
+        self.other = Locations.objects.create(pengelola='p', site='Site B', alamat='-')
+        for i in range(10):
+            tanggal = date(2024, 1, 1) + timedelta(days=i)
+            IncomeParkir.objects.create(
+                id_lokasi=self.lokasi if i % 2 == 0 else self.other, tanggal=tanggal, shift=str(i % 3 + 1),
+                kendaraan='MOBIL' if i < 5 else 'MOTOR', kategori='C', tgl=tanggal.day, bln=tanggal.month,
+                thn=tanggal.year, tarif=Decimal('5000'), cash=Decimal(i), prepaid=Decimal(0), casual=1, pass_field=0,
+            )
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_cursor_walks_every_row_once(self):
+        ids = self.collect('/api/incomeparkir/?page_size=3')
+        self.assertEqual(ids, sorted(IncomeParkir.objects.values_list('id', flat=True)))
+
+    def test_filters_are_pushed_down(self):
+        ids = self.collect('/api/incomeparkir/?start_date=2024-01-03&end_date=2024-01-08&kendaraan=MOTOR&page_size=2')
+        expected = IncomeParkir.objects.filter(
+            tanggal__range=[date(2024, 1, 3), date(2024, 1, 8)], kendaraan='MOTOR'
+        ).order_by('id').values_list('id', flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_by_lokasi_with_shift_filter(self):
+        ids = self.collect(f'/api/incomeparkir/lokasi/{self.lokasi.id}/?shift=1&shift=2')
+        expected = IncomeParkir.objects.filter(id_lokasi=self.lokasi, shift__in=['1', '2']).order_by('id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_invalid_date(self):
+        response = self.client.get('/api/incomeparkir/?start_date=01-01-2024')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+    def test_export_ndjson_streams_every_filtered_row(self):
+        # Chunk kecil supaya export melewati beberapa query keyset
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 3):
+            response = self.client.get('/api/incomeparkir/?export=ndjson&kendaraan=MOBIL')
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        expected = IncomeParkir.objects.filter(kendaraan='MOBIL').order_by('id')
+        self.assertEqual([row['id'] for row in rows], list(expected.values_list('id', flat=True)))
+        self.assertEqual(rows[1]['cash'], 1.0)
+        self.assertEqual(rows[1]['tanggal'], '2024-01-02')
+
+    def test_export_csv_by_lokasi(self):
+        response = self.client.get(f'/api/incomeparkir/lokasi/{self.lokasi.id}/?export=csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(lines[0].startswith('id,'))
+        self.assertEqual(len(lines) - 1, IncomeParkir.objects.filter(id_lokasi=self.lokasi).count())
 
-# Create your tests here.
+    def test_export_unknown_format(self):
+        response = self.client.get('/api/incomeparkir/?export=xml')
+        self.assertEqual(response.status_code, 400)
@@ -1,15 +1,26 @@
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from .models import IncomeParkir
 from .serializers import IncomeParkirSerializers
+from dashboard_backend.export import ExportMixin
+from dashboard_backend.filters import IncomeFilterBackend
+from dashboard_backend.pagination import IncomeCursorPagination
 
-class IncomeParkirListView(ListAPIView):
+class IncomeParkirListView(ExportMixin, ListAPIView):
     queryset = IncomeParkir.objects.all()
     serializer_class = IncomeParkirSerializers
+    # Keyset pagination + filter tanggal/shift/kendaraan/kategori di database,
+    # ?export=ndjson|csv untuk mengalirkan seluruh hasil filter
+    pagination_class = IncomeCursorPagination
+    export_filename = 'income_parkir'
+    filter_backends = [IncomeFilterBackend]
 
 
 # View baru untuk filter berdasarkan id_lokasi
-class IncomeParkirByLokasiView(ListAPIView):
+class IncomeParkirByLokasiView(ExportMixin, ListAPIView):
     serializer_class = IncomeParkirSerializers
+    pagination_class = IncomeCursorPagination
+    export_filename = 'income_parkir'
+    filter_backends = [IncomeFilterBackend]
 
     def get_queryset(self):
         id_lokasi = self.kwargs['id_lokasi']
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Locations',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('pengelola', models.CharField(max_length=255)),
+                ('site', models.CharField(max_length=255)),
+                ('alamat', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'tm_lokasi',
+                'managed': False,
+            },
+        ),
+    ]
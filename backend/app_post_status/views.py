@@ -1,39 +1,20 @@
 # app_post_status/views.py
 
-import json
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Sum, Count
-from .models import PostStatus
-from app_users.utils import get_session_data_from_body, fetch_user_locations, is_admin_user
+from app_revenue_rollup.partials import post_status_partials, sum_vectors
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
 
 @method_decorator(csrf_exempt, name='dispatch')
 class PostStatusSummaryView(APIView):
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
     def get(self, request, *args, **kwargs):
         try:
-            # Langkah 1: Mendapatkan session data
-            session_data_result = get_session_data_from_body(request)
-            if isinstance(session_data_result, dict) and 'error' in session_data_result:
-                session_data_str = request.GET.get('session_data') or request.headers.get('X-Session-Data')
-                if session_data_str:
-                    try:
-                        session_data = json.loads(session_data_str)
-                    except json.JSONDecodeError:
-                        return Response({"status": "error", "message": "Invalid session data format"}, status=400)
-                else:
-                    return Response({"status": "error", "message": session_data_result['error']}, status=400)
-            else:
-                session_data = session_data_result
-
-            is_admin = is_admin_user(session_data)
-            if isinstance(is_admin, dict) and 'error' in is_admin:
-                return Response({"status": "error", "message": is_admin['error']}, status=400)
-
-            locations = fetch_user_locations(session_data)
-            if isinstance(locations, dict) and 'error' in locations:
-                return Response({"status": "error", "message": locations['error']}, status=400)
+            # Session data & lokasi user sudah divalidasi oleh SessionDataAuthentication
+            locations = request.user.locations
 
             if request.path.endswith('bylocations'):
                 return self.view_by_locations(locations)
@@ -45,12 +26,14 @@ class PostStatusSummaryView(APIView):
 
     def view_all(self, locations):
         try:
-            # Hitung total trafic dan jumlah pos untuk online & offline
-            total_transaksi_pos_online = PostStatus.objects.filter(aktif=1, id_lokasi__in=locations).aggregate(total_trafic=Sum('trafic'))['total_trafic'] or 0
-            total_transaksi_pos_offline = PostStatus.objects.filter(aktif=0, id_lokasi__in=locations).aggregate(total_trafic=Sum('trafic'))['total_trafic'] or 0
-
-            jumlah_pos_online = PostStatus.objects.filter(aktif=1, id_lokasi__in=locations).count()
-            jumlah_pos_offline = PostStatus.objects.filter(aktif=0, id_lokasi__in=locations).count()
+            # Total trafic dan jumlah pos online & offline dari partial per lokasi user
+            partials = post_status_partials(locations.ids)
+            (
+                total_transaksi_pos_online,
+                total_transaksi_pos_offline,
+                jumlah_pos_online,
+                jumlah_pos_offline,
+            ) = sum_vectors(partials['totals'], locations.ids, 4)
 
             return Response({
                 'total_transaksi_pos_online': total_transaksi_pos_online,
@@ -66,30 +49,25 @@ class PostStatusSummaryView(APIView):
         try:
             location_data = {}
 
-            # Query untuk mendapatkan semua data yang diperlukan dalam satu kali query
-            pos_data = PostStatus.objects.filter(
-                id_lokasi__in=locations
-            ).values(
-                'id_lokasi__site',  # Nama lokasi
-                'pos',              # Nama pos
-                'aktif',            # Status aktif
-                'trafic'           # Total transaksi
-            )
+            # Daftar pos per lokasi dari partial per lokasi user
+            partials = post_status_partials(locations.ids)
 
             # Memproses dan mengelompokkan data per lokasi
-            for pos in pos_data:
-                site_name = pos['id_lokasi__site']
-                
+            for location in locations:
+                pos_rows = partials['pos'].get(location.id)
+                if pos_rows is None:
+                    continue
+
                 # Inisialisasi list untuk lokasi jika belum ada
-                if site_name not in location_data:
-                    location_data[site_name] = []
+                pos_list = location_data.setdefault(location.site, [])
 
                 # Menambahkan data pos ke dalam list lokasi
-                location_data[site_name].append({
-                    "nama_pos": pos['pos'],
-                    "status_pos": "Online" if pos['aktif'] == 1 else "Offline",
-                    "total_transaksi": pos['trafic']
-                })
+                for pos, aktif, trafic in pos_rows:
+                    pos_list.append({
+                        "nama_pos": pos,
+                        "status_pos": "Online" if aktif == 1 else "Offline",
+                        "total_transaksi": trafic
+                    })
 
             return Response(location_data)
 
@@ -0,0 +1,65 @@
+# app_revenue_details/stats.py
+
+"""
+Ringkasan statistik per lokasi untuk tabel detail pendapatan (harian/bulanan/tahunan).
+
+Baris detail dibentuk view dalam int (uang dalam sen, lihat app_revenue_rollup.money),
+ditranspose sekali menjadi kolom, lalu tiap kolom cukup satu sum() dan satu sort untuk
+total, minimal, maksimal, median, p90 dan standar deviasi. Nilai baru dikembalikan ke
+Decimal saat membentuk response, dengan bentuk yang sama seperti penjumlahan Decimal
+sebelumnya (mis. '90.00', rata-rata hasil pembagian Decimal).
+"""
+
+import math
+from decimal import Decimal
+from app_revenue_rollup.money import from_cents
+
+MONEY_FIELDS = ('tarif_tunai', 'tarif_non_tunai', 'member', 'manual', 'tiket_masalah', 'total_pendapatan')
+QTY_FIELDS = ('qty_casual', 'qty_pass', 'total_qty')
+FIELDS = MONEY_FIELDS + QTY_FIELDS
+
+CENT = Decimal('0.01')
+
+def columns(data_list):
+    """Transpose list of dict (nilai int) menjadi {field: [int, ...]} dalam satu lintasan."""
+    rows = [[d[field] for field in FIELDS] for d in data_list]
+    return dict(zip(FIELDS, (list(column) for column in zip(*rows))))
+
+def present(d):
+    """Baris detail int -> bentuk response (uang Decimal 2 digit, qty Decimal)."""
+    row = dict(d)
+    for field in MONEY_FIELDS:
+        row[field] = from_cents(d[field])
+    for field in QTY_FIELDS:
+        row[field] = Decimal(d[field])
+    return row
+
+def summarize(data_list):
+    """
+    Blok ringkasan yang ditambahkan di akhir list tiap lokasi, dari baris detail int:
+    total, minimal, maksimal, rata-rata (sama dengan perhitungan Decimal lama),
+    median, p90 (nearest-rank) dan stddev (populasi, 2 desimal).
+    """
+    count = len(data_list)
+    summary = {key: {} for key in ('total', 'minimal', 'maksimal', 'rata-rata', 'median', 'p90', 'stddev')}
+
+    for field, values in columns(data_list).items():
+        as_decimal = from_cents if field in MONEY_FIELDS else Decimal
+        scale = 100 if field in MONEY_FIELDS else 1
+
+        total = sum(values)
+        ordered = sorted(values)
+        middle = count // 2
+        variance = count * sum(value * value for value in values) - total * total  # dikali count^2
+
+        summary['total'][field] = as_decimal(total)
+        summary['minimal'][field] = as_decimal(ordered[0])
+        summary['maksimal'][field] = as_decimal(ordered[-1])
+        summary['rata-rata'][field] = as_decimal(total) / count
+        summary['median'][field] = (
+            as_decimal(ordered[middle]) if count % 2 else as_decimal(ordered[middle - 1] + ordered[middle]) / 2
+        )
+        summary['p90'][field] = as_decimal(ordered[math.ceil(count * 0.9) - 1])
+        summary['stddev'][field] = (Decimal(variance).sqrt() / (count * scale)).quantize(CENT)
+
+    return summary
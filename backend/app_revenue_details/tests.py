@@ -1,3 +1,58 @@
-from django.test import TestCase
+# app_revenue_details/tests.py
 
-# Create your tests here.
+import random
+from decimal import Decimal
+from django.test import SimpleTestCase
+from .stats import FIELDS, present, summarize
+
+def legacy_summary(data_list):
+    """Perhitungan lama di view detail: generator Decimal terpisah per field."""
+    totals = {key: sum(d[key] for d in data_list) for key in FIELDS}
+    return {
+        'total': totals,
+        'minimal': {key: min(d[key] for d in data_list) for key in FIELDS},
+        'maksimal': {key: max(d[key] for d in data_list) for key in FIELDS},
+        'rata-rata': {key: value / len(data_list) for key, value in totals.items()},
+    }
+
+def detail_row(rng):
+    """Baris detail seperti yang dibentuk view: uang dalam int sen, qty int."""
+    cash, prepaid, member, manual, masalah = (rng.randint(0, 5_000_000) for _ in range(5))
+    casual, pass_field = rng.randint(0, 300), rng.randint(0, 40)
+    return {
+        'tarif_tunai': cash,
+        'tarif_non_tunai': prepaid,
+        'member': member,
+        'manual': manual,
+        'tiket_masalah': masalah,
+        'total_pendapatan': cash + prepaid + member + manual - masalah,
+        'qty_casual': casual,
+        'qty_pass': pass_field,
+        'total_qty': casual + pass_field,
+    }
+
+class SummarizeTests(SimpleTestCase):
+
+    def test_matches_legacy_decimal_output(self):
+        rng = random.Random(7)
+        for size in (1, 2, 3, 4, 7, 31, 365):
+            data_list = [detail_row(rng) for _ in range(size)]
+            expected = legacy_summary([present(d) for d in data_list])
+            summary = summarize(data_list)
+            for block, values in expected.items():
+                # Bandingkan repr supaya eksponen Decimal (mis. '25.00' vs '25') ikut diperiksa
+                self.assertEqual({k: repr(v) for k, v in summary[block].items()},
+                                 {k: repr(v) for k, v in values.items()}, (size, block))
+
+    def test_median_p90_stddev(self):
+        rows = [dict(detail_row(random.Random(i)), tarif_tunai=value) for i, value in
+                enumerate([1000, 2000, 3000, 4000])]
+        summary = summarize(rows)
+        self.assertEqual(summary['median']['tarif_tunai'], Decimal('25.00'))
+        self.assertEqual(summary['p90']['tarif_tunai'], Decimal('40.00'))
+        self.assertEqual(summary['stddev']['tarif_tunai'], Decimal('11.18'))
+
+    def test_present_converts_at_boundary(self):
+        row = present(dict(detail_row(random.Random(1)), tarif_tunai=9050, qty_casual=3))
+        self.assertEqual(repr(row['tarif_tunai']), "Decimal('90.50')")
+        self.assertEqual(repr(row['qty_casual']), "Decimal('3')")
@@ -0,0 +1,76 @@
+# app_revenue_realtime/query.py
+
+"""
+Snapshot realtime terakhir per lokasi dalam satu statement.
+
+Pengganti get_location_data yang dipanggil sekali per lokasi (ORDER BY ... first()
+lalu aggregate, difilter lewat nama site). Aturannya tetap sama:
+- tanggal terakhir lokasi = MAX(tanggal), waktu terakhir = MAX(waktu) di tanggal itu,
+- jika tanggal terakhir adalah hari ini, hanya baris pada waktu terakhir yang dijumlah,
+- selain itu seluruh baris di tanggal terakhir dijumlah.
+"""
+
+from datetime import date, datetime
+from django.db import connections, router
+from .models import RevenueRealtime
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def latest_snapshots(location_ids, today=None):
+    """
+    Kembalikan {id_lokasi: {'tanggal', 'waktu', 'total_transaksi', 'total_pendapatan'}}
+    untuk lokasi yang punya data di tt_sync_realtime. Satu round-trip berapapun jumlah lokasinya.
+    """
+    location_ids = [int(location_id) for location_id in location_ids]
+    if not location_ids:
+        return {}
+    today = today or date.today()
+
+    # Raw SQL tidak melewati router database: pilih alias baca (replica) secara eksplisit
+    connection = connections[router.db_for_read(RevenueRealtime)]
+    quote = connection.ops.quote_name
+    field = lambda name: quote(RevenueRealtime._meta.get_field(name).column)
+    table = quote(RevenueRealtime._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(location_ids))
+
+    sql = f"""
+        SELECT r.{field('id_lokasi')}, l.tanggal, l.waktu, SUM(r.{field('qty')}), SUM(r.{field('jumlah')})
+        FROM {table} r
+        INNER JOIN (
+            SELECT x.{field('id_lokasi')} AS id_lokasi, x.{field('tanggal')} AS tanggal, MAX(x.{field('waktu')}) AS waktu
+            FROM {table} x
+            INNER JOIN (
+                SELECT {field('id_lokasi')} AS id_lokasi, MAX({field('tanggal')}) AS tanggal
+                FROM {table}
+                WHERE {field('id_lokasi')} IN ({placeholders})
+                GROUP BY {field('id_lokasi')}
+            ) d ON d.id_lokasi = x.{field('id_lokasi')} AND d.tanggal = x.{field('tanggal')}
+            GROUP BY x.{field('id_lokasi')}, x.{field('tanggal')}
+        ) l ON l.id_lokasi = r.{field('id_lokasi')} AND l.tanggal = r.{field('tanggal')}
+        WHERE (l.tanggal <> %s OR r.{field('waktu')} = l.waktu)
+        GROUP BY r.{field('id_lokasi')}, l.tanggal, l.waktu
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, location_ids + [today])
+        rows = cursor.fetchall()
+
+    # Raw SQL tidak melewati converter Django (mis. string SQLite, timezone USE_TZ),
+    # jadi terapkan converter kolom waktu secara manual
+    waktu_col = RevenueRealtime._meta.get_field('waktu').get_col(RevenueRealtime._meta.db_table)
+    converters = connection.ops.get_db_converters(waktu_col) + waktu_col.get_db_converters(connection)
+    snapshots = {}
+    for id_lokasi, tanggal, waktu, total_transaksi, total_pendapatan in rows:
+        for converter in converters:
+            waktu = converter(waktu, waktu_col, connection)
+        snapshots[id_lokasi] = {
+            'tanggal': as_date(tanggal),
+            'waktu': waktu,
+            'total_transaksi': total_transaksi or 0,
+            'total_pendapatan': total_pendapatan or 0,
+        }
+    return snapshots
@@ -0,0 +1,190 @@
+# app_revenue_realtime/stream.py
+
+"""
+Poller bersama untuk stream Server-Sent Events realtime.
+
+Satu RealtimePoller per proses membaca tt_sync_realtime tiap REALTIME_STREAM_POLL_SECONDS:
+- satu query GROUP BY id_lokasi untuk waktu terakhir tiap lokasi,
+- satu query agregasi per kendaraan hanya jika ada lokasi yang berubah.
+Hasilnya disimpan sebagai snapshot per lokasi, lalu setiap subscriber (satu koneksi SSE)
+hanya ditandai lokasi mana yang berubah. Payload tiap client dibentuk dari snapshot di
+memori, jadi beban database tidak bertambah dengan jumlah dashboard yang terbuka.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Sum
+from .models import RevenueRealtime
+
+logger = logging.getLogger(__name__)
+
+# Interval polling tt_sync_realtime dan interval komentar keep-alive SSE (detik)
+POLL_SECONDS = getattr(settings, 'REALTIME_STREAM_POLL_SECONDS', 5)
+HEARTBEAT_SECONDS = getattr(settings, 'REALTIME_STREAM_HEARTBEAT_SECONDS', 15)
+
+class Subscriber:
+    """Satu koneksi SSE: set lokasi yang boleh dibaca + lokasi yang berubah sejak kirim terakhir."""
+
+    def __init__(self, location_ids, loop=None):
+        self.location_ids = frozenset(location_ids)
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else None
+
+    def notify(self, changed):
+        """Dipanggil dari thread poller; perubahan beruntun digabung sampai client membaca."""
+        hits = self.location_ids & changed
+        if not hits:
+            return
+        with self.lock:
+            self.pending |= hits
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, set()
+        return pending
+
+class RealtimePoller:
+
+    def __init__(self):
+        self.snapshot = {}
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.ready = False
+        self.task = None
+
+    def refresh(self):
+        """
+        Baca perubahan dari tt_sync_realtime (sync, dijalankan di thread Django).
+        Mengembalikan set id_lokasi yang berubah dan memberi tahu subscriber terkait.
+        """
+        latest = dict(RevenueRealtime.objects.order_by().values_list('id_lokasi').annotate(latest=Max('waktu')))
+        with self.lock:
+            changed = {id_lokasi for id_lokasi, waktu in latest.items()
+                       if id_lokasi not in self.snapshot or self.snapshot[id_lokasi]['waktu'] != waktu}
+
+        entries = {}
+        if changed:
+            # Sama dengan RevenueRealtimeView: data di tanggal waktu terakhir, sampai waktu terakhir
+            entries = {id_lokasi: {'waktu': latest[id_lokasi], 'kendaraan': {}} for id_lokasi in changed}
+            rows = RevenueRealtime.objects.filter(
+                id_lokasi__in=changed,
+                tanggal__gte=min(latest[id_lokasi].date() for id_lokasi in changed),
+            ).values('id_lokasi', 'tanggal', 'kendaraan').annotate(
+                jumlah_transaksi=Sum('qty'),
+                jumlah_pendapatan=Sum('jumlah')
+            ).order_by('id_lokasi', 'kendaraan')
+            for row in rows:
+                entry = entries[row['id_lokasi']]
+                if row['tanggal'] == entry['waktu'].date():
+                    entry['kendaraan'][row['kendaraan']] = {
+                        'jumlah_transaksi': row['jumlah_transaksi'] or 0,
+                        'jumlah_pendapatan': int(row['jumlah_pendapatan'] or 0),
+                    }
+
+        with self.lock:
+            self.snapshot.update(entries)
+            self.ready = True
+            subscribers = list(self.subscribers)
+        if changed:
+            for subscriber in subscribers:
+                subscriber.notify(changed)
+        return changed
+
+    def payload(self, location_ids, changed, sites):
+        """
+        Data event untuk satu client:
+        - lokasi : entri per lokasi yang berubah (atau semua lokasi untuk event pertama)
+        - summary : total hari ini untuk semua lokasi client, seperti summary cards
+        """
+        with self.lock:
+            entries = {id_lokasi: self.snapshot[id_lokasi] for id_lokasi in location_ids if id_lokasi in self.snapshot}
+
+        lokasi = []
+        for id_lokasi in sorted(changed):
+            entry = entries.get(id_lokasi)
+            if entry is None:
+                continue
+            lokasi.append({
+                'id_lokasi': id_lokasi,
+                'site': sites.get(id_lokasi),
+                'waktu': entry['waktu'],
+                'kendaraan': [
+                    {'jenis_kendaraan': kendaraan, **totals} for kendaraan, totals in entry['kendaraan'].items()
+                ],
+            })
+
+        summary = None
+        if entries:
+            latest_waktu = max(entry['waktu'] for entry in entries.values())
+            today = [entry for entry in entries.values() if entry['waktu'].date() == latest_waktu.date()]
+            summary = {
+                'waktu': latest_waktu,
+                'pendapatan_hari_ini': sum(t['jumlah_pendapatan'] for entry in today for t in entry['kendaraan'].values()),
+                'transaksi_hari_ini': sum(t['jumlah_transaksi'] for entry in today for t in entry['kendaraan'].values()),
+            }
+        return {'lokasi': lokasi, 'summary': summary}
+
+    async def subscribe(self, location_ids):
+        subscriber = Subscriber(location_ids, asyncio.get_running_loop())
+        with self.lock:
+            self.subscribers.add(subscriber)
+        if self.task is None or self.task.done():
+            # Poller belum/tidak lagi berjalan: snapshot bisa basi, baca ulang dulu
+            await sync_to_async(self.refresh)()
+            self.task = asyncio.create_task(self.run())
+        elif not self.ready:
+            await sync_to_async(self.refresh)()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    async def run(self):
+        """Loop polling; berhenti sendiri saat tidak ada subscriber."""
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            with self.lock:
+                if not self.subscribers:
+                    self.ready = False
+                    return
+            try:
+                await sync_to_async(self.refresh)()
+            except Exception:
+                logger.exception("Gagal membaca tt_sync_realtime untuk stream realtime")
+
+poller = RealtimePoller()
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+async def event_stream(location_ids, sites):
+    """Generator SSE untuk satu client: snapshot penuh dulu, lalu delta per lokasi."""
+    subscriber = await poller.subscribe(location_ids)
+    try:
+        # Event pertama sudah memuat semua lokasi, perubahan yang tercatat sebelumnya tidak perlu dikirim ulang
+        subscriber.event.clear()
+        subscriber.take()
+        yield format_event('realtime', poller.payload(subscriber.location_ids, subscriber.location_ids, sites))
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.event.wait(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            # clear sebelum take supaya notify yang masuk di antaranya tidak hilang
+            subscriber.event.clear()
+            changed = subscriber.take()
+            if changed:
+                yield format_event('realtime', poller.payload(subscriber.location_ids, changed, sites))
+    finally:
+        poller.unsubscribe(subscriber)
@@ -1,3 +1,223 @@
+# app_revenue_realtime/tests.py
+
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from app_locations.models import Locations
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from app_revenue_rollup.cache import RESPONSE_CACHE_ALIAS
+from app_revenue_rollup.watermarks import invalidate_watermarks
+from app_users.utils import LocationRef, UserLocations, invalidate_user_locations
+from .models import RevenueRealtime
+from .query import latest_snapshots
+from .stream import RealtimePoller, Subscriber
+
+UNMANAGED_MODELS = (Locations, IncomeParkir, IncomeMember, IncomeManual, RevenueRealtime)
+
+TODAY = date(2024, 3, 31)
+ADMIN_SESSION = json.dumps({'id': 1, 'admin': 1})
+
+class RealtimeTestCase(TestCase):
+    """Tabel tm_lokasi, tt_sync_income_* dan tt_sync_realtime dibuat manual untuk database test."""
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            for model in UNMANAGED_MODELS:
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for model in reversed(UNMANAGED_MODELS):
+                editor.delete_model(model)
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        self.client = APIClient()
+        self.lokasi = [
+            Locations.objects.create(pengelola='p', site=f'Site {i}', alamat='-') for i in range(3)
+        ]
+        for lokasi in self.lokasi:
+            for offset in range(1, 31):
+                tanggal = TODAY - timedelta(days=offset)
+                IncomeParkir.objects.create(
+                    id_lokasi=lokasi, tanggal=tanggal, shift='1', kendaraan='MOBIL', kategori='C',
+                    tgl=tanggal.day, bln=tanggal.month, thn=tanggal.year, tarif=Decimal('5000'),
+                    cash=Decimal(100), prepaid=Decimal(0), casual=1, pass_field=0,
+                )
+            for hour in (8, 9):
+                RevenueRealtime.objects.create(
+                    id_lokasi=lokasi, tanggal=TODAY, shift='1', waktu=datetime(2024, 3, 31, hour),
+                    kendaraan='MOBIL', qty=2, jumlah=Decimal(50),
+                )
+
+    def get(self, url):
+        return self.client.get(url, HTTP_X_SESSION_DATA=ADMIN_SESSION)
+
+class SummaryCardsTests(RealtimeTestCase):
+
+    def test_window_totals(self):
+        response = self.get('/api/summarycards/')
+        self.assertEqual(response.status_code, 200)
+        # 6 hari tutup x 3 lokasi x 100 + hari ini 3 lokasi x 2 x 50
+        self.assertEqual(response.data['total_pendapatan'], 6 * 3 * 100 + 300)
+        self.assertEqual(response.data['pendapatan_hari_ini'], 300)
+        self.assertEqual(response.data['total_transaksi'], 6 * 3 + 12)
+
+        response = self.get('/api/summarycards/?days=30')
+        self.assertEqual(response.data['total_pendapatan'], 29 * 3 * 100 + 300)
+
+    def test_query_count_does_not_grow_with_window(self):
+        self.get('/api/summarycards/')  # isi cache lokasi
+
+        counts = {}
+        for days in (7, 30):
+            caches[RESPONSE_CACHE_ALIAS].clear()
+            # snapshot waktu terakhir, agregasi hari ini, probe watermark data, satu query histori
+            with self.assertNumQueries(4) as context:
+                self.get(f'/api/summarycards/?days={days}')
+            counts[days] = len(context.captured_queries)
+        self.assertEqual(counts[7], counts[30])
+
+    def test_closed_days_are_cached(self):
+        self.get('/api/summarycards/?days=14')
+        # Tersisa probe watermark data + agregasi hari ini
+        with self.assertNumQueries(2):
+            response = self.get('/api/summarycards/?days=14')
+        self.assertEqual(response.data['total_pendapatan'], 13 * 3 * 100 + 300)
+
+    def test_invalid_days(self):
+        self.assertEqual(self.get('/api/summarycards/?days=abc').status_code, 400)
+        self.assertEqual(self.get('/api/summarycards/?days=0').status_code, 400)
+
+class RealtimePollerTests(RealtimeTestCase):
+
+    def test_refresh_cost_does_not_depend_on_subscribers(self):
+        poller = RealtimePoller()
+        subscribers = [Subscriber([self.lokasi[i % 3].id]) for i in range(50)]
+        poller.subscribers.update(subscribers)
+
+        # waktu terakhir per lokasi + agregasi per kendaraan untuk lokasi yang berubah
+        with self.assertNumQueries(2):
+            changed = poller.refresh()
+        self.assertEqual(changed, {lokasi.id for lokasi in self.lokasi})
+        self.assertEqual(subscribers[0].take(), {self.lokasi[0].id})
+
+        # Tidak ada data baru: cukup satu query dan tidak ada notifikasi
+        with self.assertNumQueries(1):
+            self.assertEqual(poller.refresh(), set())
+        self.assertEqual(subscribers[0].take(), set())
+
+    def test_payload_sends_only_changed_locations(self):
+        poller = RealtimePoller()
+        subscriber = Subscriber([lokasi.id for lokasi in self.lokasi])
+        poller.subscribers.add(subscriber)
+        poller.refresh()
+        subscriber.take()
+
+        RevenueRealtime.objects.create(
+            id_lokasi=self.lokasi[1], tanggal=TODAY, shift='1', waktu=datetime(2024, 3, 31, 10),
+            kendaraan='MOTOR', qty=1, jumlah=Decimal(20),
+        )
+        poller.refresh()
+        changed = subscriber.take()
+        self.assertEqual(changed, {self.lokasi[1].id})
+
+        sites = {lokasi.id: lokasi.site for lokasi in self.lokasi}
+        payload = poller.payload(subscriber.location_ids, changed, sites)
+        self.assertEqual([entry['site'] for entry in payload['lokasi']], ['Site 1'])
+        self.assertEqual(
+            payload['lokasi'][0]['kendaraan'],
+            [{'jenis_kendaraan': 'MOBIL', 'jumlah_transaksi': 4, 'jumlah_pendapatan': 100},
+             {'jenis_kendaraan': 'MOTOR', 'jumlah_transaksi': 1, 'jumlah_pendapatan': 20}],
+        )
+        self.assertEqual(payload['summary']['pendapatan_hari_ini'], 320)
+        self.assertEqual(payload['summary']['transaksi_hari_ini'], 13)
+
+class RealtimeStreamTests(RealtimeTestCase):
+
+    async def test_first_event_contains_all_locations(self):
+        response = await self.async_client.get('/api/revenuerealtime/stream', {'session_data': ADMIN_SESSION})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        first = (await anext(stream)).decode()
+        await stream.aclose()
+
+        event, data = first.strip().split('\n')
+        self.assertEqual(event, 'event: realtime')
+        payload = json.loads(data[len('data: '):])
+        self.assertEqual([entry['site'] for entry in payload['lokasi']], ['Site 0', 'Site 1', 'Site 2'])
+        self.assertEqual(payload['summary']['pendapatan_hari_ini'], 300)
+
+    async def test_missing_session_data(self):
+        response = await self.async_client.get('/api/revenuerealtime/stream')
+        self.assertEqual(response.status_code, 400)
+
+class RevenueByLocationsTests(RealtimeTestCase):
+
+    def add_locations(self, count):
+        for i in range(count):
+            lokasi = Locations.objects.create(pengelola='p', site=f'Extra {i}', alamat='-')
+            RevenueRealtime.objects.create(
+                id_lokasi=lokasi, tanggal=TODAY - timedelta(days=1), shift='1', waktu=datetime(2024, 3, 30, 22),
+                kendaraan='MOBIL', qty=1, jumlah=Decimal(10),
+            )
+        invalidate_user_locations()
+
+    def test_query_count_is_constant(self):
+        counts = []
+        for extra in (0, 20):
+            self.add_locations(extra)
+            self.get('/api/revenuebylocations/all')  # isi cache lokasi user
+            with CaptureQueriesContext(connection) as context:
+                response = self.get('/api/revenuebylocations/all')
+            self.assertEqual(len(response.data), 3 + extra)
+            counts.append(len(context.captured_queries))
+        # Probe watermark untuk ETag + satu query snapshot
+        self.assertEqual(counts, [2, 2])
+
+    def test_latest_snapshot_rules(self):
+        # Lokasi 0: dua snapshot lain hari ini -> hanya waktu terakhir yang dihitung
+        snapshots = latest_snapshots([lokasi.id for lokasi in self.lokasi], today=TODAY)
+        self.assertEqual(snapshots[self.lokasi[0].id]['total_pendapatan'], 50)
+        self.assertEqual(snapshots[self.lokasi[0].id]['waktu'].hour, 9)
+
+        # Bukan hari ini -> seluruh baris di tanggal terakhir dijumlah
+        snapshots = latest_snapshots([self.lokasi[0].id], today=TODAY + timedelta(days=1))
+        self.assertEqual(snapshots[self.lokasi[0].id]['total_pendapatan'], 100)
+        self.assertEqual(snapshots[self.lokasi[0].id]['total_transaksi'], 4)
+
+    def test_by_locations_keyed_by_site(self):
+        response = self.get('/api/revenuebylocations/bylocations')
+        self.assertEqual(sorted(response.data), ['Site 0', 'Site 1', 'Site 2'])
+        self.assertEqual(response.data['Site 1'][0]['id_lokasi'], 'Site 1')
+
+class RevenueRealtimeExportTests(RealtimeTestCase):
+
+    def test_export_is_limited_to_user_locations(self):
+        session = json.dumps({'id': 2, 'admin': 0})
+        with mock.patch('app_users.authentication.fetch_user_locations') as fetch:
+            fetch.return_value = UserLocations([LocationRef(self.lokasi[0].id, 'Site 0')])
+            response = self.client.get('/api/revenuerealtime/export', HTTP_X_SESSION_DATA=session)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['id_lokasi'] for row in rows}, {self.lokasi[0].id})
+        self.assertEqual(rows[0]['jumlah'], 50.0)
 
-# Create your tests here.
+    def test_export_csv_with_date_filter(self):
+        response = self.get(f'/api/revenuerealtime/export?export=csv&start_date={TODAY + timedelta(days=1)}')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['id_lokasi,tanggal,shift,waktu,kendaraan,qty,jumlah'])
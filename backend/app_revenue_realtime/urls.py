@@ -4,6 +4,8 @@ from django.urls import path
 from .views_summary_cards import SummaryCardsView
 from .views_revenue_realtime import RevenueRealtimeView
 from .views_revenue_by_locations import RevenueByLocationsView
+from .views_stream import realtime_stream
+from .views_export import RevenueRealtimeExportView
 
 urlpatterns = [
     path('summarycards/', SummaryCardsView.as_view(), name='summary_cards'),
@@ -15,5 +17,11 @@ urlpatterns = [
     # path('revenuebylocations/', RevenueByLocationsView.as_view(), name='revenue_by_locations'),
     path('revenuebylocations/all', RevenueByLocationsView.as_view(), name='revenue_by_locations_all'),
     path('revenuebylocations/bylocations', RevenueByLocationsView.as_view(), name='revenue_by_locations_by_locations'),
+
+    # Server-Sent Events: push perubahan tt_sync_realtime (ganti polling endpoint di atas)
+    path('revenuerealtime/stream', realtime_stream, name='revenue_realtime_stream'),
+
+    # Export baris mentah tt_sync_realtime (NDJSON/CSV, streaming)
+    path('revenuerealtime/export', RevenueRealtimeExportView.as_view(), name='revenue_realtime_export'),
 ]
 
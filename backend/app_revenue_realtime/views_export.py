@@ -0,0 +1,29 @@
+# app_revenue_realtime/views_export.py
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.views import APIView
+from .models import RevenueRealtime
+from dashboard_backend.export import export_format, stream_export
+from dashboard_backend.filters import IncomeFilterBackend
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+
+EXPORT_FIELDS = ['id_lokasi', 'tanggal', 'shift', 'waktu', 'kendaraan', 'qty', 'jumlah']
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RevenueRealtimeExportView(APIView):
+    """
+    Export baris mentah tt_sync_realtime untuk lokasi user (NDJSON default, ?export=csv).
+    Filter start_date/end_date/shift/kendaraan sama dengan endpoint list income.
+    """
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
+
+    def get(self, request, *args, **kwargs):
+        # Session data & lokasi user sudah divalidasi oleh SessionDataAuthentication
+        locations = request.user.locations
+        fmt = export_format(request) or 'ndjson'
+
+        queryset = RevenueRealtime.objects.filter(id_lokasi__in=locations.ids)
+        queryset = IncomeFilterBackend().filter_queryset(request, queryset, self)
+        return stream_export(queryset, EXPORT_FIELDS, fmt, 'revenue_realtime')
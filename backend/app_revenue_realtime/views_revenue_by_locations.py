@@ -1,45 +1,28 @@
 # app_revenue_realtime/views_revenue_by_locations.py
 
-import json
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser
-from django.db.models import Sum, Max
-from datetime import datetime, date
-from app_users.utils import get_session_data_from_body, fetch_user_locations, is_admin_user
-from app_revenue_realtime.models import RevenueRealtime
+from app_revenue_rollup.conditional import conditional_get
+from dashboard_backend.db_router import replica_lag_guard
+from .models import RevenueRealtime
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+from .query import latest_snapshots
 
 @method_decorator(csrf_exempt, name='dispatch')
 class RevenueByLocationsView(APIView):
     parser_classes = [JSONParser]
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
 
+    @replica_lag_guard
+    @conditional_get(RevenueRealtime)
     def get(self, request, *args, **kwargs):
         try:
-            # Step 1: Get session data from body or fallback to query params/headers
-            session_data_result = get_session_data_from_body(request)
-            if isinstance(session_data_result, dict) and 'error' in session_data_result:
-                session_data_str = request.GET.get('session_data') or request.headers.get('X-Session-Data')
-                if session_data_str:
-                    try:
-                        session_data = json.loads(session_data_str)
-                    except json.JSONDecodeError:
-                        return Response({"status": "error", "message": "Invalid session data format"}, status=400)
-                else:
-                    return Response({"status": "error", "message": session_data_result['error']}, status=400)
-            else:
-                session_data = session_data_result
-
-            # Check if the user is an admin
-            is_admin = is_admin_user(session_data)
-            if isinstance(is_admin, dict) and 'error' in is_admin:
-                return Response({"status": "error", "message": is_admin['error']}, status=400)
-
-            # Fetch user locations based on session data
-            locations = fetch_user_locations(session_data)
-            if isinstance(locations, dict) and 'error' in locations:
-                return Response({"status": "error", "message": locations['error']}, status=400)
+            # Session data & lokasi user sudah divalidasi oleh SessionDataAuthentication
+            locations = request.user.locations
 
             # Check if it's view_all or view_by_locations endpoint
             if request.path.endswith('bylocations'):
@@ -50,55 +33,26 @@ class RevenueByLocationsView(APIView):
         except Exception as e:
             return Response({"status": "error", "message": f"Terjadi kesalahan: {str(e)}"}, status=500)
 
-    def get_location_data(self, site_name):
-        today = date.today()
-        
-        # Get the latest data for this location
-        latest_data = RevenueRealtime.objects.filter(
-            id_lokasi__site=site_name
-        ).order_by('-tanggal', '-waktu').first()
-
-        if latest_data:
-            if latest_data.tanggal == today:
-                # If there's data for today, use it
-                revenue_data = RevenueRealtime.objects.filter(
-                    id_lokasi__site=site_name,
-                    tanggal=latest_data.tanggal,
-                    waktu=latest_data.waktu
-                ).aggregate(
-                    total_transaksi=Sum('qty'),
-                    total_pendapatan=Sum('jumlah')
-                )
-            else:
-                # If no data for today, get the last available data
-                revenue_data = RevenueRealtime.objects.filter(
-                    id_lokasi__site=site_name,
-                    tanggal=latest_data.tanggal
-                ).aggregate(
-                    total_transaksi=Sum('qty'),
-                    total_pendapatan=Sum('jumlah')
-                )
-
-            return {
-                "waktu": latest_data.waktu,
-                "tanggal": latest_data.tanggal,
-                "id_lokasi": site_name,
-                "total_transaksi": revenue_data['total_transaksi'] or 0,
-                "total_pendapatan": int(revenue_data['total_pendapatan'] or 0)
-            }
-        
-        return None
+    def location_entries(self, locations):
+        """Snapshot terakhir tiap lokasi user, satu query berapapun jumlah lokasinya."""
+        snapshots = latest_snapshots(locations.ids)
+        entries = []
+        for location in locations:
+            snapshot = snapshots.get(location.id)
+            if snapshot is None:
+                continue
+            entries.append((location.site, {
+                "waktu": snapshot['waktu'],
+                "tanggal": snapshot['tanggal'],
+                "id_lokasi": location.site,
+                "total_transaksi": snapshot['total_transaksi'],
+                "total_pendapatan": int(snapshot['total_pendapatan'])
+            }))
+        return entries
 
     def view_all(self, locations):
         try:
-            data_list = []
-            for location in locations:
-                site_name = location.site
-                location_data = self.get_location_data(site_name)
-                
-                if location_data:
-                    data_list.append(location_data)
-
+            data_list = [data for _, data in self.location_entries(locations)]
             return Response(data_list)
 
         except Exception as e:
@@ -106,18 +60,11 @@ class RevenueByLocationsView(APIView):
 
     def view_by_locations(self, locations):
         try:
-            location_data = {}
-            
-            for location in locations:
-                site_name = location.site
-                data = self.get_location_data(site_name)
-                
-                if data:
-                    location_data[site_name] = [data]
-                else:
-                    location_data[site_name] = []
+            location_data = {location.site: [] for location in locations}
+            for site_name, data in self.location_entries(locations):
+                location_data[site_name].append(data)
 
             return Response(location_data)
 
         except Exception as e:
-            return Response({"status": "error", "message": f"Error in view_by_locations: {str(e)}"}, status=500)
\ No newline at end of file
+            return Response({"status": "error", "message": f"Error in view_by_locations: {str(e)}"}, status=500)
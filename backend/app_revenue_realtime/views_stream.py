@@ -0,0 +1,35 @@
+# app_revenue_realtime/views_stream.py
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from rest_framework.request import Request
+from app_users.authentication import SessionDataAuthentication, SessionDataError
+from .stream import event_stream
+
+def authenticate_session(request):
+    """Validasi session_data sama seperti APIView lain (EventSource mengirimnya lewat query param)."""
+    user, _ = SessionDataAuthentication().authenticate(Request(request))
+    return user
+
+@csrf_exempt
+@require_GET
+async def realtime_stream(request):
+    """
+    Server-Sent Events untuk widget realtime (revenue realtime, revenue by locations, summary cards).
+    Event `realtime` pertama berisi semua lokasi user, berikutnya hanya lokasi yang berubah.
+    Perlu dijalankan di server ASGI (dashboard_backend/asgi.py), mis. uvicorn/daphne.
+    """
+    try:
+        user = await sync_to_async(authenticate_session)(request)
+    except SessionDataError as e:
+        return JsonResponse(e.detail, status=e.status_code)
+
+    response = StreamingHttpResponse(
+        event_stream(user.locations.ids, dict(user.locations.sites)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # matikan buffering nginx
+    return response
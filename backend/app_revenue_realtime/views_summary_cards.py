@@ -1,21 +1,28 @@
 # app_revenue_realtime/views_summary_cards.py
 
-import json
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser
-from django.db.models import Sum, Max
-from django.utils import timezone
+from django.db.models import Sum
 from datetime import timedelta
-from decimal import Decimal
 from .models import RevenueRealtime
 from .serializers import SummaryCardsSerializer
-from app_users.utils import get_session_data_from_body, fetch_user_locations, is_admin_user
-from app_income_parkir.models import IncomeParkir
-from app_income_member.models import IncomeMember
-from app_income_manual.models import IncomeManual
+from app_revenue_rollup import watermarks
+from app_revenue_rollup.conditional import conditional_get
+from dashboard_backend.db_router import replica_lag_guard
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+from app_revenue_rollup.query import revenue_rows
+from app_revenue_rollup.cache import WATERMARK_MODELS, cached_data, location_fingerprint
+from app_revenue_rollup.money import to_cents, to_rupiah
+
+# Panjang window default dan maksimum (hari, termasuk hari ini) untuk parameter ?days=
+DEFAULT_WINDOW_DAYS = 7
+MAX_WINDOW_DAYS = 366
+
+# Total hari tutup hanya berubah saat ada sync income terlambat, simpan maksimal sehari
+CLOSED_DAYS_CACHE_TTL = 60 * 60 * 24
 
 @method_decorator(csrf_exempt, name='dispatch')
 class SummaryCardsView(APIView):
@@ -25,115 +32,57 @@ class SummaryCardsView(APIView):
     
     Dynamic Behavior:
     - All calculations use the latest timestamp (latest_waktu) as reference
+    - Window length comes from ?days= (default 7 = today + previous 6 closed days)
+    - Closed days are computed in one grouped query and cached; only today is re-read
+      from tt_sync_realtime on each request
     - When new transactions occur:
         1. Today's numbers (pendapatan_hari_ini, transaksi_hari_ini) update automatically
         2. Total numbers (total_pendapatan, total_transaksi) also update as they include today's numbers
     """
     parser_classes = [JSONParser]
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
     
+    @replica_lag_guard
+    @conditional_get(*WATERMARK_MODELS, RevenueRealtime)
     def get(self, request, *args, **kwargs):
         try:
-            # Step 1: Session Data Validation
-            session_data_result = get_session_data_from_body(request)
-            if isinstance(session_data_result, dict) and 'error' in session_data_result:
-                session_data_str = request.GET.get('session_data') or request.headers.get('X-Session-Data')
-                if session_data_str:
-                    try:
-                        session_data = json.loads(session_data_str)
-                    except json.JSONDecodeError:
-                        return Response({"status": "error", "message": "Invalid session data format"}, status=400)
-                else:
-                    return Response({"status": "error", "message": session_data_result['error']}, status=400)
-            else:
-                session_data = session_data_result
-
-            # Step 2: User Authorization Check
-            is_admin = is_admin_user(session_data)
-            if isinstance(is_admin, dict) and 'error' in is_admin:
-                return Response({"status": "error", "message": is_admin['error']}, status=400)
-
-            # Step 3: Location Access Validation
-            locations = fetch_user_locations(session_data)
-            if isinstance(locations, dict) and 'error' in locations:
-                return Response({"status": "error", "message": locations['error']}, status=400)
+            # Step 1-3: Session data, cek admin & lokasi user sudah divalidasi oleh SessionDataAuthentication
+            locations = request.user.locations
 
             # Step 4: Latest Data Timestamp Retrieval
-            latest_waktu = RevenueRealtime.objects.filter(
-                id_lokasi__in=locations
-            ).aggregate(Max('waktu'))['waktu__max']
+            latest_waktu = watermarks.latest_waktu(locations.ids)
 
             if not latest_waktu:
                 return Response({"detail": "No data available"}, status=404)
 
-            # Step 5: Calculate Today's Revenue and Transactions
+            # Step 5: Window length (jumlah hari termasuk hari ini), mis. 7/14/30
+            try:
+                days = int(request.GET.get('days', DEFAULT_WINDOW_DAYS))
+            except ValueError:
+                return Response({"status": "error", "message": "Invalid days format."}, status=400)
+            if not 1 <= days <= MAX_WINDOW_DAYS:
+                return Response({"status": "error", "message": f"Days must be between 1 and {MAX_WINDOW_DAYS}."}, status=400)
+
+            # Step 6: Today's Revenue and Transactions (satu query ke tt_sync_realtime)
             # These numbers automatically update when new transactions occur
-            today_date = latest_waktu.date() 
-            pendapatan_hari_ini = RevenueRealtime.objects.filter(
+            today_date = latest_waktu.date()
+            today_query = RevenueRealtime.objects.filter(
                 tanggal=today_date,
                 waktu__lte=latest_waktu,
-                id_lokasi__in=locations
-            ).aggregate(total=Sum('jumlah'))['total'] or 0
+                id_lokasi__in=locations.ids
+            )
 
-            # Calculate today's total transactions (qty)
-            transaksi_hari_ini = RevenueRealtime.objects.filter(
-                tanggal=today_date,
-                waktu__lte=latest_waktu,
-                id_lokasi__in=locations
-            ).aggregate(total=Sum('qty'))['total'] or 0
-
-            # Step 6: Define Date Range for Historical Data (excluding today)
-            end_date = latest_waktu.date() - timedelta(days=1)  # Yesterday
-            start_date = end_date - timedelta(days=5)  # Previous 6 days
-
-            # Step 7: Process Historical Data for Previous 6 Days
-            historical_pendapatan = 0
-            historical_transaksi = 0
-
-            # loop for historical data
-            for single_date in (start_date + timedelta(n) for n in range(6)):  # 6 days, excluding today
-                # Fetch parking revenue data
-                parkir_day = IncomeParkir.objects.filter(
-                    id_lokasi__in=locations,
-                    tanggal=single_date
-                ).aggregate(
-                    cash=Sum('cash'),
-                    prepaid=Sum('prepaid'),
-                    casual=Sum('casual'),
-                    pass_field=Sum('pass_field')
-                )
-
-                # Fetch membership revenue data
-                member_day = IncomeMember.objects.filter(
-                    id_lokasi__in=locations,
-                    tanggal=single_date
-                ).aggregate(member=Sum('member'))
-
-                # Fetch manual transaction data
-                manual_day = IncomeManual.objects.filter(
-                    id_lokasi__in=locations,
-                    tanggal=single_date
-                ).aggregate(
-                    manual=Sum('manual'),
-                    masalah=Sum('masalah')
-                )
-
-                # Calculate daily revenue
-                daily_revenue = (
-                    Decimal(parkir_day['cash'] or 0) +
-                    Decimal(parkir_day['prepaid'] or 0) +
-                    Decimal(manual_day['manual'] or 0) +
-                    Decimal(member_day['member'] or 0) -
-                    Decimal(manual_day['masalah'] or 0)
-                )
-
-                # Calculate daily transactions
-                daily_transactions = (
-                    Decimal(parkir_day['casual'] or 0) +
-                    Decimal(parkir_day['pass_field'] or 0)
-                )
-
-                historical_pendapatan += daily_revenue
-                historical_transaksi += daily_transactions
+            # Step 7: Historical Data for the closed days (excluding today)
+            end_date = today_date - timedelta(days=1)  # Yesterday
+            start_date = end_date - timedelta(days=days - 2)
+
+            # Total hari tutup biasanya cache hit, jadi dijalankan di thread request saja
+            today_data = today_query.aggregate(pendapatan=Sum('jumlah'), transaksi=Sum('qty'))
+            historical_pendapatan, historical_transaksi = self.closed_days_totals(locations.ids, start_date, end_date)
+            # Uang dihitung dalam int sen, dikonversi ke rupiah saat membentuk response
+            pendapatan_hari_ini = to_cents(today_data['pendapatan'])
+            transaksi_hari_ini = today_data['transaksi'] or 0
 
             # Step 8: Calculate Total Numbers
             # These totals automatically update as they include the dynamic today's numbers
@@ -142,8 +91,8 @@ class SummaryCardsView(APIView):
 
             # Step 9: Prepare Final Summary Data
             summary_data = {
-                "total_pendapatan": int(total_pendapatan),
-                "pendapatan_hari_ini": int(pendapatan_hari_ini),
+                "total_pendapatan": to_rupiah(total_pendapatan),
+                "pendapatan_hari_ini": to_rupiah(pendapatan_hari_ini),
                 "total_transaksi": int(total_transaksi),
                 "transaksi_hari_ini": int(transaksi_hari_ini),
                 "waktu": latest_waktu,
@@ -157,4 +106,24 @@ class SummaryCardsView(APIView):
             return Response({
                 "status": "error", 
                 "message": f"An error occurred: {str(e)}"
-            }, status=500)
\ No newline at end of file
+            }, status=500)
+
+    def closed_days_totals(self, location_ids, start_date, end_date):
+        """
+        Total pendapatan (int sen) dan transaksi untuk hari yang sudah tutup, satu grouped query
+        berapapun panjang window-nya. Hasil di-cache per (lokasi, rentang tanggal), jadi
+        otomatis ganti key saat tanggal berganti; sync income yang terlambat membatalkan
+        cache lewat token watermark data.
+        """
+        if start_date > end_date:
+            return 0, 0
+
+        def build():
+            # Satu statement: rollup harian + hari yang belum masuk rollup
+            rows = revenue_rows(location_ids, start_date, end_date, bucket=None, group_by=None, cents=True)
+            data = rows[0] if rows else {}
+            return data.get('total_pendapatan', 0), data.get('casual', 0) + data.get('pass_field', 0)
+
+        key = f"summarycards:closed-days-cents:{location_fingerprint(location_ids)}:{start_date}:{end_date}"
+        totals, _ = cached_data(key, build, timeout=CLOSED_DAYS_CACHE_TTL, endpoint='summarycards/closed-days')
+        return totals
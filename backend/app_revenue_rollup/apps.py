@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class AppRevenueRollupConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'app_revenue_rollup'
+
+    def ready(self):
+        # Daftarkan receiver sinyal ingestion / save model untuk service watermark
+        from . import watermarks  # noqa: F401 (import untuk mendaftarkan receiver)
+        from . import prefix  # noqa: F401
+        from . import conditional  # noqa: F401
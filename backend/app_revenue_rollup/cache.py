@@ -0,0 +1,176 @@
+# app_revenue_rollup/cache.py
+
+"""
+Cache response untuk endpoint tren historis.
+
+Data periode yang sudah lewat hanya berubah kalau ada baris baru yang di-sync, jadi
+response disimpan per (endpoint, fingerprint set lokasi) bersama token watermark
+data (MAX(id) dan MAX(tanggal) tiap tabel income, plus generasi data_synced). Request
+berikutnya cukup satu query watermark; jika token masih sama response lama dipakai ulang.
+"""
+
+import contextvars
+import hashlib
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, router
+from rest_framework.response import Response
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from .watermarks import TRACKED_FIELDS, data_generation, invalidate_watermarks
+
+# Alias cache Django yang dipakai dan umur maksimal entri (detik)
+RESPONSE_CACHE_ALIAS = getattr(settings, 'REVENUE_RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TTL = getattr(settings, 'REVENUE_RESPONSE_CACHE_TTL', 60 * 60 * 24)
+
+WATERMARK_MODELS = (IncomeParkir, IncomeMember, IncomeManual)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+# Memo token data_watermark() selama satu blok shared_data_watermark()
+_watermark_memo = contextvars.ContextVar('data_watermark_memo', default=None)
+
+def location_fingerprint(location_ids):
+    """Hash pendek dan stabil untuk set id lokasi (urutan tidak berpengaruh)."""
+    joined = ','.join(str(location_id) for location_id in sorted(set(location_ids)))
+    return hashlib.sha1(joined.encode()).hexdigest()[:16]
+
+def table_watermark(models):
+    """
+    (MAX(id), MAX(kolom watermark)) tiap tabel `models` dalam satu round-trip. Kolom
+    watermark sesuai watermarks.TRACKED_FIELDS (tanggal / waktu), dibaca dari index.
+    """
+    connection = connections[router.db_for_read(models[0])]
+    quote = connection.ops.quote_name
+    sql = ' UNION ALL '.join(
+        "SELECT MAX({id}), MAX({column}) FROM {table}".format(
+            id=quote(model._meta.pk.column),
+            column=quote(model._meta.get_field(TRACKED_FIELDS[model]).column),
+            table=quote(model._meta.db_table),
+        )
+        for model in models
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return tuple((max_id, str(max_value)) for max_id, max_value in cursor.fetchall())
+
+def data_watermark(extra_models=()):
+    """
+    Token validitas data: generasi data_synced, lalu (MAX(id), MAX(tanggal)) tiap tabel
+    income dalam satu round-trip. Keduanya dibaca dari index sehingga murah walau
+    tabelnya besar; generasi menangkap baris lama yang di-update di tempat oleh job sync.
+    Di dalam shared_data_watermark() probe hanya dijalankan sekali.
+
+    extra_models : tabel lain yang ikut di-probe di round-trip yang sama; tokennya
+    ditambahkan di belakang token income (yang tetap di-memo seperti biasa).
+    """
+    memo = _watermark_memo.get()
+    if memo is not None and 'token' in memo and not extra_models:
+        return memo['token']
+
+    token = (data_generation(),) + table_watermark(WATERMARK_MODELS + tuple(extra_models))
+    if memo is not None:
+        memo['token'] = token[:len(WATERMARK_MODELS) + 1]
+    return token
+
+@contextmanager
+def shared_data_watermark():
+    """
+    Pakai satu token data_watermark() untuk semua pemanggilan di dalam blok, termasuk
+    callable yang dijalankan lewat fan_out (contextvars ikut disalin ke thread pool).
+    Dipakai endpoint batch dashboard dan conditional GET supaya watermark tidak di-probe
+    berulang dalam satu request. Blok bersarang memakai memo blok terluar.
+    """
+    if _watermark_memo.get() is not None:
+        yield
+        return
+    reset_token = _watermark_memo.set({})
+    try:
+        yield
+    finally:
+        _watermark_memo.reset(reset_token)
+
+def record(endpoint, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(endpoint, {'hit': 0, 'miss': 0})
+        counters[outcome] += 1
+
+def cache_stats():
+    """Counter hit/miss per endpoint beserta totalnya (per proses)."""
+    with _stats_lock:
+        endpoints = {endpoint: dict(counters) for endpoint, counters in _stats.items()}
+    hits = sum(counters['hit'] for counters in endpoints.values())
+    misses = sum(counters['miss'] for counters in endpoints.values())
+    return {
+        'hit': hits,
+        'miss': misses,
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+        'endpoints': endpoints,
+    }
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+def sync_watermarks(cache, token):
+    """
+    Probe data_watermark() selalu segar, snapshot service watermark bisa tertinggal
+    sampai DATA_WATERMARK_TTL. Kalau token berubah sejak probe terakhir, buang snapshot
+    tabel income supaya view tidak membangun response baru dengan tanggal terakhir basi.
+    """
+    key = "revenue-response:last-token"
+    if cache.get(key) != token:
+        for model in WATERMARK_MODELS:
+            invalidate_watermarks(model)
+        cache.set(key, token, None)
+
+def cached_data(key, build, timeout=RESPONSE_CACHE_TTL, endpoint=None):
+    """
+    Versi umum cached_response untuk data non-Response: kembalikan (value, hit).
+    Nilai dipakai ulang selama token data_watermark() belum berubah; jika endpoint
+    diisi, hit/miss ikut dicatat di cache_stats().
+    """
+    cache = caches[RESPONSE_CACHE_ALIAS]
+    token = data_watermark()
+    sync_watermarks(cache, token)
+
+    entry = cache.get(key)
+    hit = entry is not None and entry[0] == token
+    if endpoint is not None:
+        record(endpoint, 'hit' if hit else 'miss')
+    if hit:
+        return entry[1], True
+
+    value = build()
+    cache.set(key, (token, value), timeout)
+    return value, False
+
+def cached_response(endpoint, location_ids, build, period=''):
+    """
+    Kembalikan Response dari cache jika watermark data belum berubah, selain itu
+    panggil build() dan simpan hasilnya. Hanya response 200 yang disimpan.
+
+    endpoint : nama endpoint (mis. request.path)
+    location_ids : id lokasi yang boleh dibaca user
+    build : callable tanpa argumen yang mengembalikan Response
+    period : parameter periode tambahan yang membedakan response, jika ada
+    """
+    cache = caches[RESPONSE_CACHE_ALIAS]
+    key = f"revenue-response:{endpoint}:{location_fingerprint(location_ids)}:{period}"
+    token = data_watermark()
+    sync_watermarks(cache, token)
+
+    entry = cache.get(key)
+    if entry is not None and entry[0] == token:
+        record(endpoint, 'hit')
+        return Response(entry[1], status=200)
+
+    record(endpoint, 'miss')
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, (token, response.data), RESPONSE_CACHE_TTL)
+    return response
@@ -0,0 +1,99 @@
+# app_revenue_rollup/conditional.py
+
+"""
+ETag / conditional GET untuk endpoint analitik.
+
+ETag dihitung dari token watermark tabel yang dibaca endpoint (MAX(id) + MAX(tanggal/waktu)),
+fingerprint set lokasi user, path dan query param. Semuanya tersedia setelah
+SessionDataAuthentication, jadi request dengan If-None-Match yang cocok langsung
+dijawab 304 tanpa agregasi, serialisasi maupun body.
+
+- Response 200 membawa ETag dan `Cache-Control: private, no-cache` (client wajib
+  revalidasi; data per user).
+- Job sync yang menulis ulang tanggal lama tanpa mengubah watermark mengirim
+  data_synced; sinyal itu menaikkan generasi data (watermarks.data_generation) yang ada
+  di dalam token. ETag dan cache response (cached_response/cached_data) membaca token
+  yang sama lewat shared_data_watermark(), jadi ETag baru selalu berarti body baru.
+- Tabel snapshot yang di-update di tempat (tt_data_hour, tt_pos_aktif) tidak punya
+  watermark yang bisa dipercaya, jadi endpoint-nya tidak memakai decorator ini.
+"""
+
+import hashlib
+from datetime import date
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import parse_etags
+from rest_framework.response import Response
+from app_revenue_realtime.models import RevenueRealtime
+from . import watermarks
+from .cache import WATERMARK_MODELS, data_watermark, location_fingerprint, shared_data_watermark, table_watermark
+
+# Matikan untuk selalu mengirim response penuh
+CONDITIONAL_GET_ENABLED = getattr(settings, 'CONDITIONAL_GET_ENABLED', True)
+
+# Query param yang tidak mempengaruhi isi response
+IGNORED_PARAMS = ('session_data', 'profile')
+
+def watermark_token(models, location_ids):
+    """
+    Token data untuk `models`, selalu diawali generasi data_synced. Tabel income di-probe
+    lewat data_watermark() sehingga tokennya ikut di-memo dan dipakai ulang oleh cache
+    response di view yang sama.
+    """
+    extra_models = tuple(model for model in models if model not in WATERMARK_MODELS)
+    if len(extra_models) == len(models):
+        token = (watermarks.data_generation(),) + table_watermark(models)
+    else:
+        token = data_watermark(extra_models)
+    if RevenueRealtime in models:
+        # View realtime memilih jendela dari snapshot watermark per lokasi (ber-TTL)
+        # dan dari tanggal hari ini, jadi keduanya ikut menentukan ETag
+        token += (str(watermarks.latest_waktu(location_ids)), str(date.today()))
+    return token
+
+def response_etag(request, models):
+    params = sorted((key, value) for key, values in request.query_params.lists()
+                    if key not in IGNORED_PARAMS for value in values)
+    parts = (
+        request.path,
+        repr(params),
+        location_fingerprint(request.user.locations.ids),
+        repr(watermark_token(models, request.user.locations.ids)),
+    )
+    return '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+def conditional_get(*models):
+    """
+    Decorator untuk method get() APIView yang sudah memakai SessionDataAuthentication:
+    kembalikan 304 jika If-None-Match cocok, selain itu pasang ETag pada response 200.
+    `models` : tabel yang dibaca endpoint (default tabel income).
+    """
+    models = models or WATERMARK_MODELS
+
+    def decorator(get):
+        @wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            if not CONDITIONAL_GET_ENABLED:
+                return get(self, request, *args, **kwargs)
+
+            with shared_data_watermark():
+                try:
+                    etag = response_etag(request, models)
+                except Exception:
+                    # Probe gagal: layani seperti biasa, view yang melaporkan error-nya
+                    return get(self, request, *args, **kwargs)
+
+                headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+                if_none_match = request.headers.get('If-None-Match')
+                # Perbandingan weak: GZipMiddleware mengubah ETag response menjadi W/"..."
+                if if_none_match and (if_none_match.strip() == '*' or
+                                      etag in {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}):
+                    return Response(status=304, headers=headers)
+
+                response = get(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,281 @@
+# app_revenue_rollup/management/commands/bench_endpoints.py
+
+import json
+import math
+import statistics
+import time
+from datetime import date
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import get_resolver, resolve
+from django.utils import timezone
+from app_users.models import Users
+from app_users.utils import invalidate_user_locations
+from app_revenue_rollup.cache import RESPONSE_CACHE_ALIAS
+from app_revenue_rollup.prefix import prefix_index
+from app_revenue_rollup.utils import source_date_range
+from app_revenue_rollup.watermarks import forget_generation, invalidate_watermarks
+from dashboard_backend.metrics import registry
+from .generate_synthetic_data import GENERATED_MODELS
+
+# Route GET yang diukur; {placeholder} diisi dari tanggal data terakhir
+BENCH_ROUTES = (
+    '/api/summarycards/',
+    '/api/revenuerealtime/all',
+    '/api/revenuerealtime/bylocations',
+    '/api/revenuebylocations/all',
+    '/api/revenuebylocations/bylocations',
+    '/api/poststatus/all',
+    '/api/poststatus/bylocations',
+    '/api/traffichours/all',
+    '/api/traffichours/bylocations',
+    '/api/revenue/filterbydays/all',
+    '/api/revenue/filterbydays/bylocations',
+    '/api/revenue/filterbymonths/all',
+    '/api/revenue/filterbymonths/bylocations',
+    '/api/revenue/filterbyyears/all',
+    '/api/revenue/filterbyyears/bylocations',
+    '/api/revenuebylocations/filterbydays/',
+    '/api/revenuebylocations/filterbymonths/',
+    '/api/revenuebylocations/filterbyyears/',
+    '/api/revenue/range/all?start_date={year_start}&end_date={end}',
+    '/api/revenue/range/bylocations?start_date={year_start}&end_date={end}',
+    '/api/revenuedetails/locations/',
+    '/api/revenuedetails/filterbydays/?year={year}&month={month}',
+    '/api/revenuedetails/filterbymonths/?year={year}',
+    '/api/revenuedetails/filterbyyears/',
+    '/api/trouble/filterbydays/',
+    '/api/trouble/filterbymonths/',
+    '/api/trouble/filterbyyears/',
+    '/api/incomeparkir/?start_date={month_start}&end_date={end}',
+    '/api/incomemember/?start_date={month_start}&end_date={end}',
+    '/api/incomemanual/?start_date={month_start}&end_date={end}',
+    '/api/locations/',
+)
+
+# Widget dashboard utama untuk mengukur endpoint batch (POST)
+BATCH_WIDGETS = [
+    {'id': 'cards', 'path': 'summarycards/'},
+    {'id': 'realtime', 'path': 'revenuerealtime/all'},
+    {'id': 'days', 'path': 'revenue/filterbydays/all'},
+    {'id': 'months', 'path': 'revenue/filterbymonths/all'},
+    {'id': 'posts', 'path': 'poststatus/all'},
+    {'id': 'traffic', 'path': 'traffichours/all'},
+    {'id': 'trouble', 'path': 'trouble/filterbydays/'},
+]
+
+# Route api/ yang sengaja tidak diukur (manajemen user, stream/export, endpoint operasional)
+SKIPPED_ROUTES = (
+    'api/users/', 'api/userslocations/', 'api/locations/<', 'api/revenuerealtime/stream',
+    'api/revenuerealtime/export', 'api/revenue/cache/stats', 'api/metrics', 'api/profiles/', '/lokasi/<',
+)
+
+class Command(BaseCommand):
+    help = (
+        "Ukur latency dan jumlah query setiap route API (GET + batch dashboard) untuk role admin dan "
+        "user, dalam kondisi cache dingin dan hangat, lalu simpan hasilnya sebagai baseline JSON. "
+        "Dengan --scale, database stand-in diisi ulang lewat generate_synthetic_data untuk tiap skala."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', default=[],
+                            help='Skala LOKASIxTAHUN (mis. 50x2), bisa diulang. Tanpa opsi: pakai data yang ada.')
+        parser.add_argument('--repeat', type=int, default=5, help='Pengulangan per route dan mode (default: 5).')
+        parser.add_argument('--roles', nargs='+', choices=['admin', 'user'], default=['admin', 'user'])
+        parser.add_argument('--routes', nargs='+', help='Hanya route yang mengandung salah satu teks ini.')
+        parser.add_argument('--end', type=date.fromisoformat, help='Tanggal data terakhir untuk --scale.')
+        parser.add_argument('--output', default='bench_endpoints.json', help='File JSON hasil.')
+        parser.add_argument('--baseline', help='File JSON baseline sebelumnya untuk dibandingkan.')
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help='Rasio median terhadap baseline yang dianggap regresi (default: 1.2).')
+
+    def handle(self, *args, **options):
+        if 'dashboard_backend.middleware.MetricsMiddleware' not in settings.MIDDLEWARE:
+            raise CommandError("MetricsMiddleware harus aktif: jumlah query diambil dari metrics.registry.")
+        scales = [self.parse_scale(scale) for scale in options['scale']] or [None]
+
+        self.report_uncovered_routes()
+        result = {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'query_fanout_workers': getattr(settings, 'QUERY_FANOUT_WORKERS', 8),
+            'repeat': options['repeat'],
+            'scales': {},
+        }
+        for scale in scales:
+            if scale is not None:
+                locations, years = scale
+                self.stdout.write(f"Mengisi data sintetis {locations} lokasi x {years} tahun...")
+                generate_options = ['--create-tables', '--flush', '--rollup',
+                                    '--locations', str(locations), '--years', str(years)]
+                if options['end']:
+                    generate_options += ['--end', options['end'].isoformat()]
+                call_command('generate_synthetic_data', *generate_options, verbosity=0)
+            label = f"{scale[0]}x{scale[1]}" if scale else 'current'
+            result['scales'][label] = self.run_scale(label, options)
+
+        with open(options['output'], 'w') as output:
+            json.dump(result, output, indent=1, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Hasil disimpan ke {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                self.compare(json.load(baseline), result, options['threshold'])
+
+    def parse_scale(self, value):
+        try:
+            locations, years = (int(part) for part in value.lower().split('x'))
+        except ValueError:
+            raise CommandError(f"Skala tidak valid: {value} (format LOKASIxTAHUN, mis. 50x2).")
+        return locations, years
+
+    def report_uncovered_routes(self):
+        for route in uncovered_routes():
+            self.stderr.write(f"Route belum diukur: {route}")
+
+    def run_scale(self, label, options):
+        first, last = source_date_range()
+        if last is None:
+            raise CommandError("Tabel income kosong. Isi dulu dengan generate_synthetic_data atau pakai --scale.")
+        routes = bench_routes(first, last)
+        if options['routes']:
+            routes = [(method, path) for method, path in routes if any(text in path for text in options['routes'])]
+
+        sessions = self.sessions(options['roles'])
+        client = Client(HTTP_HOST=bench_host())
+        measured = {}
+        self.stdout.write(
+            f"{'skala':<8} {'role':<6} {'route':<72} {'status':>6} {'dingin (ms)':>12} {'hangat (ms)':>12} "
+            f"{'query':>9}"
+        )
+        for role, session in sessions.items():
+            for method, path in routes:
+                cold = self.measure(client, method, path, session, options['repeat'], clear=True)
+                warm = self.measure(client, method, path, session, options['repeat'], clear=False)
+                key = f"{role} {method} {path}"
+                measured[key] = {'status': cold['status'], 'cold': cold, 'warm': warm}
+                self.stdout.write(
+                    f"{label:<8} {role:<6} {method + ' ' + path:<72} {cold['status']:>6} "
+                    f"{cold['median_ms']:>12.2f} {warm['median_ms']:>12.2f} "
+                    f"{cold['queries']!s:>4}/{warm['queries']!s:<4}"
+                )
+        return {
+            'data_range': [first.isoformat(), last.isoformat()],
+            'rows': {model._meta.db_table: model.objects.count() for model in GENERATED_MODELS},
+            'routes': measured,
+        }
+
+    def sessions(self, roles):
+        result = {}
+        if 'admin' in roles:
+            admin = Users.objects.filter(admin=1).order_by('id').first()
+            result['admin'] = json.dumps({'id': admin.id if admin else 1, 'admin': 1})
+        if 'user' in roles:
+            user = Users.objects.filter(admin=0).order_by('id').first()
+            if user is None:
+                self.stderr.write("Tidak ada user non-admin, role user dilewati.")
+            else:
+                result['user'] = json.dumps({'id': user.id, 'admin': 0})
+        return result
+
+    def measure(self, client, method, path, session, repeat, clear):
+        """Jalankan request `repeat` kali; cold = semua cache aplikasi dibuang sebelum tiap request."""
+        view = resolve(path.split('?')[0]).view_name
+        timings, queries, db_times, sizes, status = [], [], [], [], None
+        for _ in range(repeat):
+            if clear:
+                clear_caches()
+            registry.reset()
+            started = time.perf_counter()
+            response = send(client, method, path, session)
+            timings.append(time.perf_counter() - started)
+            status = response.status_code
+
+            totals = registry.totals(view, method)
+            if totals:
+                queries.append(int(totals['dashboard_db_queries']))
+                db_times.append(totals['dashboard_db_duration_seconds'])
+                sizes.append(int(totals['dashboard_response_bytes']))
+
+        timings.sort()
+        return {
+            'status': status,
+            'median_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(timings[max(0, math.ceil(len(timings) * 0.95) - 1)] * 1000, 3),
+            'min_ms': round(timings[0] * 1000, 3),
+            'queries': max(queries) if queries else None,
+            'db_median_ms': round(statistics.median(db_times) * 1000, 3) if db_times else None,
+            'bytes': sizes[-1] if sizes else None,
+        }
+
+    def compare(self, baseline, result, threshold):
+        """Cetak route yang median-nya naik di atas threshold atau jumlah query-nya bertambah."""
+        regressions = 0
+        for label, scale in result['scales'].items():
+            previous = baseline.get('scales', {}).get(label)
+            if previous is None:
+                self.stdout.write(f"Skala {label} tidak ada di baseline.")
+                continue
+            for key, current in scale['routes'].items():
+                before = previous['routes'].get(key)
+                if before is None:
+                    continue
+                for mode in ('cold', 'warm'):
+                    ratio = current[mode]['median_ms'] / before[mode]['median_ms'] if before[mode]['median_ms'] else 0
+                    more_queries = (current[mode]['queries'] or 0) > (before[mode]['queries'] or 0)
+                    if ratio > threshold or more_queries:
+                        regressions += 1
+                        self.stdout.write(self.style.WARNING(
+                            f"{label} {key} [{mode}]: {before[mode]['median_ms']:.2f} -> "
+                            f"{current[mode]['median_ms']:.2f} ms ({ratio:.2f}x), "
+                            f"query {before[mode]['queries']} -> {current[mode]['queries']}"
+                        ))
+        self.stdout.write(f"{regressions} regresi dibanding baseline.")
+
+def bench_routes(first, last):
+    """(method, path) semua route yang diukur, placeholder diisi dari rentang data income."""
+    placeholders = {
+        'end': last.isoformat(), 'year': last.year, 'month': last.month,
+        'year_start': max(first, last.replace(month=1, day=1)).isoformat(),
+        'month_start': max(first, last.replace(day=1)).isoformat(),
+    }
+    return [('GET', route.format(**placeholders)) for route in BENCH_ROUTES] + [('POST', '/api/dashboard/batch')]
+
+def send(client, method, path, session):
+    if method == 'POST':
+        return client.post(path, {'widgets': BATCH_WIDGETS}, content_type='application/json',
+                           HTTP_X_SESSION_DATA=session)
+    return client.get(path, HTTP_X_SESSION_DATA=session)
+
+def clear_caches():
+    """Buang semua cache aplikasi (response & partial income, watermark, lokasi user, prefix index)."""
+    caches[RESPONSE_CACHE_ALIAS].clear()
+    forget_generation()
+    invalidate_watermarks()
+    invalidate_user_locations()
+    prefix_index.invalidate()
+
+def uncovered_routes():
+    """Route api/ di urls.py yang belum masuk BENCH_ROUTES maupun SKIPPED_ROUTES."""
+    covered = {route.split('?')[0].lstrip('/') for route in BENCH_ROUTES} | {'api/dashboard/batch'}
+    return [route for route in api_routes(get_resolver())
+            if route not in covered and not any(skip in route for skip in SKIPPED_ROUTES)]
+
+def api_routes(resolver, prefix=''):
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if hasattr(pattern, 'url_patterns'):
+            yield from api_routes(pattern, route)
+        elif route.startswith('api/'):
+            yield route
+
+def bench_host():
+    """Host yang lolos ALLOWED_HOSTS untuk test Client (command ini tidak lewat test runner)."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
@@ -0,0 +1,71 @@
+# app_revenue_rollup/management/commands/bench_fanout.py
+
+import json
+import math
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client
+from dashboard_backend import concurrency
+from .bench_endpoints import bench_host, send
+
+# Endpoint yang memakai fan_out (view widget dijalankan paralel)
+DEFAULT_ENDPOINTS = ['/api/dashboard/batch']
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan latency endpoint dengan query berurutan vs fan-out paralel "
+        "(dashboard_backend.concurrency) di bawah beban concurrent. Memakai database yang dikonfigurasi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS)
+        parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32],
+                            help='Jumlah client concurrent.')
+        parser.add_argument('--requests', type=int, default=20, help='Request per client.')
+        parser.add_argument('--session', default='{"id": 1, "admin": 1}',
+                            help='session_data JSON yang dikirim lewat header X-Session-Data.')
+
+    def handle(self, *args, **options):
+        json.loads(options['session'])  # validasi lebih awal
+
+        self.stdout.write(f"{'endpoint':<26} {'client':>6} {'mode':>10} {'mean (ms)':>10} {'p95 (ms)':>10} {'req/s':>8}")
+        original_workers = concurrency.QUERY_FANOUT_WORKERS
+        try:
+            for endpoint in options['endpoints']:
+                for clients in options['clients']:
+                    for mode, workers in (('berurutan', 1), ('fan-out', max(original_workers, 2))):
+                        concurrency.QUERY_FANOUT_WORKERS = workers
+                        latencies, elapsed = self.run_load(endpoint, clients, options['requests'], options['session'])
+                        latencies.sort()
+                        p95 = latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)]
+                        self.stdout.write(
+                            f"{endpoint:<26} {clients:>6} {mode:>10} {statistics.mean(latencies) * 1000:>10.2f} "
+                            f"{p95 * 1000:>10.2f} {len(latencies) / elapsed:>8.1f}"
+                        )
+        finally:
+            concurrency.QUERY_FANOUT_WORKERS = original_workers
+
+    def run_load(self, endpoint, clients, requests, session):
+        method = 'POST' if endpoint == '/api/dashboard/batch' else 'GET'
+
+        def worker():
+            client = Client(HTTP_HOST=bench_host())
+            timings = []
+            try:
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    response = send(client, method, endpoint, session)
+                    timings.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{endpoint} -> {response.status_code}: {response.content[:200]!r}")
+            finally:
+                close_old_connections()
+            return timings
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = [future.result() for future in [pool.submit(worker) for _ in range(clients)]]
+        return [timing for timings in results for timing in timings], time.perf_counter() - started
@@ -0,0 +1,82 @@
+# app_revenue_rollup/management/commands/bench_merge.py
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from app_revenue_rollup.merge import index_rows, group_rows
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan biaya lookup next()-scan lama dengan hash-join (merge.index_rows / merge.group_rows) "
+        "pada bentuk loop yang dipakai view, untuk jumlah lokasi yang berbeda. Tidak menyentuh database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, nargs='+', default=[10, 50, 100, 200, 400])
+        parser.add_argument('--periods', type=int, default=7, help='Jumlah periode (mis. 7 hari).')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        periods = [date(2024, 1, 1) + timedelta(days=i) for i in range(options['periods'])]
+
+        # (nama, loop lama, loop baru) -- bentuk loop sama dengan view yang disebut
+        cases = (
+            ('revenuebylocations', self.by_locations_scan, self.by_locations_index),
+            ('revenuetrends/bylocations', self.trends_by_site_scan, self.trends_by_site_group),
+        )
+
+        self.stdout.write(f"{'kasus':<28} {'lokasi':>8} {'baris':>8} {'next-scan (ms)':>16} {'hash-join (ms)':>16} {'speedup':>9}")
+        for name, scan, hashed in cases:
+            for location_count in options['locations']:
+                sites = [f"Lokasi {i}" for i in range(location_count)]
+                # Bentuk baris sama dengan keluaran app_revenue_rollup.query.revenue_rows(group_by='site')
+                rows = [
+                    {'periode': periode, 'site': site, 'total_pendapatan': Decimal(i * 1000)}
+                    for periode in periods for i, site in enumerate(sites)
+                ]
+
+                scan_time = self.best_of(options['repeat'], lambda: scan(rows, periods, sites))
+                hash_time = self.best_of(options['repeat'], lambda: hashed(rows, periods, sites))
+
+                self.stdout.write(
+                    f"{name:<28} {location_count:>8} {len(rows):>8} {scan_time * 1000:>16.2f} {hash_time * 1000:>16.2f} "
+                    f"{scan_time / hash_time if hash_time else 0:>8.1f}x"
+                )
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    # app_revenue_trends_by_locations / app_trouble_transactions: periode x lokasi
+    def by_locations_scan(self, rows, periods, sites):
+        result = {}
+        for periode in periods:
+            result[str(periode)] = [
+                {'nama_lokasi': site, 'total': next((item['total_pendapatan'] for item in rows
+                                                     if item['periode'] == periode and item['site'] == site), Decimal(0))}
+                for site in sites
+            ]
+        return result
+
+    def by_locations_index(self, rows, periods, sites):
+        revenue_index = index_rows(rows, ('periode', 'site'))
+        result = {}
+        for periode in periods:
+            result[str(periode)] = [
+                {'nama_lokasi': site, 'total': revenue_index.get((periode, site), {}).get('total_pendapatan', Decimal(0))}
+                for site in sites
+            ]
+        return result
+
+    # app_revenue_trends view_by_locations: lokasi -> daftar periode
+    def trends_by_site_scan(self, rows, periods, sites):
+        return {site: [row for row in rows if row['site'] == site] for site in sites}
+
+    def trends_by_site_group(self, rows, periods, sites):
+        revenue_by_site = group_rows(rows, 'site')
+        return {site: revenue_by_site.get(site, []) for site in sites}
@@ -0,0 +1,108 @@
+# app_revenue_rollup/management/commands/bench_money.py
+
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from app_revenue_details.stats import FIELDS, present, summarize
+from app_revenue_rollup.money import from_cents
+from app_revenue_rollup.query import MONEY_COMPONENTS, as_decimal
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan biaya CPU per request jalur Decimal lama dengan jalur int sen (money.py, "
+        "RevenueQuery.rows(cents=True)) untuk konversi hasil query dan detail pendapatan + ringkasan. "
+        "Tidak menyentuh database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[31, 365, 2000],
+                            help='Jumlah baris (mis. hari dalam sebulan, setahun, histori panjang).')
+        parser.add_argument('--locations', type=int, default=20, help='Jumlah lokasi per request.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+
+        # (nama, jalur Decimal, jalur int sen)
+        cases = (
+            ('query rows -> nilai uang', self.convert_decimal, self.convert_cents),
+            ('detail + ringkasan', self.details_decimal, self.details_cents),
+        )
+
+        self.stdout.write(f"{'kasus':<26} {'baris':>8} {'Decimal (ms)':>14} {'int sen (ms)':>14} {'speedup':>9}")
+        for name, decimal_path, cents_path in cases:
+            for row_count in options['rows']:
+                # Nilai yang dikembalikan driver: int sen untuk query cents=True,
+                # Decimal 2 digit (SUM kolom DECIMAL) untuk query lama
+                raw_cents = [
+                    [
+                        {component: rng.randint(0, 5_000_000) for component in MONEY_COMPONENTS + ('total_pendapatan',)}
+                        | {'casual': rng.randint(0, 300), 'pass_field': rng.randint(0, 40)}
+                        for _ in range(row_count)
+                    ]
+                    for _ in range(options['locations'])
+                ]
+                raw_decimal = [
+                    [{key: from_cents(value) if key not in ('casual', 'pass_field') else value for key, value in row.items()}
+                     for row in rows]
+                    for rows in raw_cents
+                ]
+
+                decimal_time = self.best_of(options['repeat'], lambda: decimal_path(raw_decimal))
+                cents_time = self.best_of(options['repeat'], lambda: cents_path(raw_cents))
+                self.stdout.write(
+                    f"{name:<26} {row_count:>8} {decimal_time * 1000:>14.2f} {cents_time * 1000:>14.2f} "
+                    f"{decimal_time / cents_time if cents_time else 0:>8.1f}x"
+                )
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.process_time()
+            func()
+            timings.append(time.process_time() - started)
+        return min(timings)
+
+    # query.RevenueQuery.rows(): quantize Decimal vs int sen dari database
+    def convert_decimal(self, raw):
+        return [[{key: as_decimal(value) for key, value in row.items()} for row in rows] for rows in raw]
+
+    def convert_cents(self, raw):
+        return [[{key: int(value or 0) for key, value in row.items()} for row in rows] for rows in raw]
+
+    # app_revenue_details: baris detail + blok total/minimal/maksimal/rata-rata per lokasi
+    def detail_rows(self, rows, money):
+        return [
+            {
+                'tarif_tunai': money(row['cash']), 'tarif_non_tunai': money(row['prepaid']),
+                'member': money(row['member']), 'manual': money(row['manual']),
+                'tiket_masalah': money(row['masalah']), 'total_pendapatan': money(row['total_pendapatan']),
+                'qty_casual': row['casual'], 'qty_pass': row['pass_field'],
+                'total_qty': row['casual'] + row['pass_field'],
+            }
+            for row in rows
+        ]
+
+    def details_decimal(self, raw):
+        result = []
+        for rows in raw:
+            data_list = self.detail_rows(rows, as_decimal)
+            for d in data_list:
+                d['qty_casual'], d['qty_pass'], d['total_qty'] = (
+                    Decimal(d['qty_casual']), Decimal(d['qty_pass']), Decimal(d['total_qty']))
+            totals = {key: sum(d[key] for d in data_list) for key in FIELDS}
+            result.append(data_list + [{
+                'total': totals,
+                'minimal': {key: min(d[key] for d in data_list) for key in FIELDS},
+                'maksimal': {key: max(d[key] for d in data_list) for key in FIELDS},
+                'rata-rata': {key: value / len(data_list) for key, value in totals.items()},
+            }])
+        return result
+
+    def details_cents(self, raw):
+        result = []
+        for rows in raw:
+            data_list = self.detail_rows(rows, int)
+            result.append([present(d) for d in data_list] + [summarize(data_list)])
+        return result
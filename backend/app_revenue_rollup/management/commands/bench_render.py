@@ -0,0 +1,88 @@
+# app_revenue_rollup/management/commands/bench_render.py
+
+import gzip
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from app_revenue_details.stats import present, summarize
+from dashboard_backend.renderers import ORJSONRenderer
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan waktu render JSONRenderer DRF dengan ORJSONRenderer untuk payload berbentuk "
+        "response revenuedetails dan by-locations, beserta ukuran body sebelum/sesudah gzip. "
+        "Tidak menyentuh database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, nargs='+', default=[10, 50, 200],
+                            help='Jumlah lokasi dalam payload.')
+        parser.add_argument('--days', type=int, default=31, help='Jumlah baris detail per lokasi.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        cases = (
+            ('revenuedetails', lambda count: self.details_payload(rng, count, options['days'])),
+            ('by-locations', lambda count: self.by_locations_payload(rng, count)),
+        )
+
+        self.stdout.write(
+            f"{'payload':<16} {'lokasi':>7} {'DRF (ms)':>10} {'orjson (ms)':>12} {'speedup':>9} "
+            f"{'body (KB)':>10} {'gzip (KB)':>10}"
+        )
+        for name, build in cases:
+            for count in options['locations']:
+                payload = build(count)
+                drf_body = JSONRenderer().render(payload)
+                fast_body = ORJSONRenderer().render(payload)
+                if drf_body != fast_body:
+                    self.stderr.write(f"{name} {count}: output renderer berbeda")
+
+                drf_time = self.best_of(options['repeat'], lambda: JSONRenderer().render(payload))
+                fast_time = self.best_of(options['repeat'], lambda: ORJSONRenderer().render(payload))
+                self.stdout.write(
+                    f"{name:<16} {count:>7} {drf_time * 1000:>10.2f} {fast_time * 1000:>12.2f} "
+                    f"{drf_time / fast_time if fast_time else 0:>8.1f}x "
+                    f"{len(fast_body) / 1024:>10.1f} {len(gzip.compress(fast_body)) / 1024:>10.1f}"
+                )
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def details_payload(self, rng, count, days):
+        """Bentuk response revenuedetails/filterbydays: baris Decimal per tanggal + blok ringkasan."""
+        start = date(2024, 1, 1)
+        result = {}
+        for index in range(count):
+            data_list = []
+            for offset in range(days):
+                cash, prepaid, member, manual, masalah = (rng.randint(0, 5_000_000) for _ in range(5))
+                casual, pass_field = rng.randint(0, 300), rng.randint(0, 40)
+                data_list.append({
+                    'tanggal': start + timedelta(days=offset),
+                    'tarif_tunai': cash, 'tarif_non_tunai': prepaid, 'member': member, 'manual': manual,
+                    'tiket_masalah': masalah, 'total_pendapatan': cash + prepaid + member + manual - masalah,
+                    'qty_casual': casual, 'qty_pass': pass_field, 'total_qty': casual + pass_field,
+                })
+            result[f'Site {index}'] = [present(d) for d in data_list] + [summarize(data_list)]
+        return result
+
+    def by_locations_payload(self, rng, count):
+        """Bentuk response revenuerealtime/bylocations: list kendaraan per site dengan datetime UTC."""
+        waktu = datetime(2024, 3, 31, 9, tzinfo=timezone.utc)
+        return {
+            f'Site {index}': [
+                {'waktu': waktu, 'jenis_kendaraan': kendaraan, 'jumlah_transaksi': rng.randint(0, 500),
+                 'jumlah_pendapatan': rng.randint(0, 5_000_000)}
+                for kendaraan in ('MOBIL', 'MOTOR', 'TRUK', 'BUS')
+            ]
+            for index in range(count)
+        }
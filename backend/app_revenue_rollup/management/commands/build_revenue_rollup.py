@@ -0,0 +1,51 @@
+# app_revenue_rollup/management/commands/build_revenue_rollup.py
+
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from app_revenue_rollup.utils import source_date_range, incremental_range, covered_start, iter_chunks, refresh_rollup
+
+class Command(BaseCommand):
+    help = (
+        "Bangun atau refresh tabel rollup pendapatan harian (tt_rollup_pendapatan_harian). "
+        "Tanpa opsi, hanya hari-hari terakhir yang di-refresh; jalankan setelah setiap sync income."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Bangun ulang seluruh histori.')
+        parser.add_argument('--start', type=date.fromisoformat, help='Tanggal awal (YYYY-MM-DD).')
+        parser.add_argument('--end', type=date.fromisoformat, help='Tanggal akhir (YYYY-MM-DD).')
+        parser.add_argument('--lookback', type=int, default=3,
+                            help='Jumlah hari sebelum rollup terakhir yang ikut di-refresh (default: 3).')
+        parser.add_argument('--lokasi', type=int, nargs='+', help='Batasi refresh ke id_lokasi tertentu.')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            start_date, end_date = source_date_range()
+        elif options['start'] or options['end']:
+            first_source, last_source = source_date_range()
+            start_date = options['start'] or first_source
+            end_date = options['end'] or last_source
+            if start_date is not None:
+                # Jangan tinggalkan lubang di bawah rollup yang baru ditulis
+                covered = covered_start(start_date, options['lokasi'])
+                if covered < start_date:
+                    self.stdout.write(f"Tanggal awal dimundurkan ke {covered} supaya rollup tetap bersambung.")
+                    start_date = covered
+        else:
+            start_date, end_date = incremental_range(options['lookback'], options['lokasi'])
+
+        if start_date is None or end_date is None:
+            self.stdout.write("Tidak ada data income, rollup tidak diubah.")
+            return
+
+        if start_date > end_date:
+            raise CommandError("Tanggal awal tidak boleh setelah tanggal akhir.")
+
+        total = 0
+        for chunk_start, chunk_end in iter_chunks(start_date, end_date):
+            written = refresh_rollup(chunk_start, chunk_end, options['lokasi'])
+            total += written
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{chunk_start} s/d {chunk_end}: {written} baris")
+
+        self.stdout.write(self.style.SUCCESS(f"Rollup selesai: {total} baris ({start_date} s/d {end_date})."))
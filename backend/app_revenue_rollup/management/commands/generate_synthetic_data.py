@@ -0,0 +1,245 @@
+# app_revenue_rollup/management/commands/generate_synthetic_data.py
+
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from app_locations.models import Locations
+from app_users.models import Users
+from app_users.utils import invalidate_user_locations
+from app_users_locations.models import UsersLocations
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from app_revenue_realtime.models import RevenueRealtime
+from app_traffic_hours.models import TrafficHours
+from app_post_status.models import PostStatus
+from app_revenue_rollup.models import RevenueRollup
+from app_revenue_rollup.watermarks import data_synced
+
+# Urutan pembuatan tabel (parent dulu); penghapusan memakai urutan terbalik
+GENERATED_MODELS = (
+    Locations, Users, UsersLocations,
+    IncomeParkir, IncomeMember, IncomeManual, RevenueRealtime, TrafficHours, PostStatus,
+)
+
+# Penanda lokasi hasil generator; --flush menolak menghapus tabel yang berisi lokasi lain
+SYNTHETIC_PENGELOLA = 'SYNTHETIC'
+
+TARIF = {'MOBIL': 5000, 'MOTOR': 2000, 'TRUK': 10000, 'BUS': 10000}
+
+class Command(BaseCommand):
+    help = (
+        "Isi database stand-in (SQLite/MySQL lokal) dengan data sintetis yang kompatibel dengan "
+        "skema produksi: tm_lokasi, tm_user, tm_lokasi_user, tt_sync_income_parkir/member/manual, "
+        "tt_sync_realtime, tt_data_hour dan tt_pos_aktif. Volume diatur lewat jumlah lokasi, tahun, "
+        "shift dan jenis kendaraan. Jangan jalankan ke database produksi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=20, help='Jumlah lokasi (default: 20).')
+        parser.add_argument('--years', type=int, default=1, help='Panjang histori income dalam tahun (default: 1).')
+        parser.add_argument('--days', type=int, help='Panjang histori dalam hari (menggantikan --years).')
+        parser.add_argument('--end', type=date.fromisoformat, default=None,
+                            help='Tanggal data terakhir, YYYY-MM-DD (default: hari ini).')
+        parser.add_argument('--shifts', type=int, default=3, help='Jumlah shift per hari (default: 3).')
+        parser.add_argument('--vehicles', nargs='+', default=['MOBIL', 'MOTOR'],
+                            help='Jenis kendaraan (default: MOBIL MOTOR).')
+        parser.add_argument('--realtime-days', type=int, default=2,
+                            help='Jumlah hari terakhir yang punya data tt_sync_realtime per jam (default: 2).')
+        parser.add_argument('--users', type=int, default=5, help='Jumlah user non-admin (default: 5).')
+        parser.add_argument('--locations-per-user', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--create-tables', action='store_true',
+                            help='Buat tabel unmanaged yang belum ada (tabel rollup dibuat lewat migrate).')
+        parser.add_argument('--flush', action='store_true',
+                            help='Kosongkan tabel (termasuk rollup) sebelum mengisi. Hanya untuk data sintetis.')
+        parser.add_argument('--rollup', action='store_true', help='Jalankan build_revenue_rollup --full setelahnya.')
+
+    def handle(self, *args, **options):
+        if options['locations'] < 1 or options['shifts'] < 1 or not options['vehicles']:
+            raise CommandError("--locations, --shifts dan --vehicles minimal 1.")
+
+        self.verbosity = options['verbosity']
+        if options['create_tables']:
+            self.create_tables()
+        self.prepare_tables(options['flush'])
+
+        rng = random.Random(options['seed'])
+        end = options['end'] or date.today()
+        days = options['days'] or options['years'] * 365
+        start = end - timedelta(days=days - 1)
+
+        locations = self.create_locations(options['locations'])
+        self.create_users(rng, locations, options['users'], options['locations_per_user'])
+
+        # Bobot volume per lokasi supaya lokasi besar dan kecil tercampur
+        weights = {lokasi.id: rng.uniform(0.3, 3.0) for lokasi in locations}
+        shifts = [str(number) for number in range(1, options['shifts'] + 1)]
+
+        vehicles = options['vehicles']
+        hours = range(24)
+        tables = (
+            (IncomeParkir, ('id_lokasi', 'tanggal', 'shift', 'kendaraan', 'kategori', 'tgl', 'bln', 'thn',
+                            'tarif', 'cash', 'prepaid', 'casual', 'pass_field'),
+             self.parkir_rows(rng, locations, weights, start, end, shifts, vehicles)),
+            (IncomeMember, ('id_lokasi', 'tanggal', 'tgl', 'bln', 'thn', 'member'),
+             self.member_rows(rng, locations, weights, start, end)),
+            (IncomeManual, ('id_lokasi', 'tanggal', 'shift', 'tgl', 'bln', 'thn', 'manual', 'masalah'),
+             self.manual_rows(rng, locations, start, end, shifts)),
+            (RevenueRealtime, ('id_lokasi', 'tanggal', 'shift', 'waktu', 'kendaraan', 'qty', 'jumlah'),
+             self.realtime_rows(rng, locations, weights, end, options['realtime_days'], shifts, vehicles)),
+            (TrafficHours, ('id_lokasi', *(f'jam_{hour}' for hour in hours), *(f'tarif_{hour}' for hour in hours)),
+             self.traffic_rows(rng, locations, weights)),
+            (PostStatus, ('id_lokasi', 'pos', 'aktif', 'trafic'), self.post_rows(rng, locations)),
+        )
+        counts = {model: self.insert(model, fields, rows, options['batch_size']) for model, fields, rows in tables}
+
+        # Snapshot watermark, partial per lokasi dan cache response di proses ini ikut dibuang
+        data_synced.send(sender=None)
+        invalidate_user_locations()
+
+        if self.verbosity:
+            for model, count in counts.items():
+                self.stdout.write(f"{model._meta.db_table}: {count} baris")
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(locations)} lokasi, {start} s/d {end}, {len(shifts)} shift x {len(vehicles)} kendaraan."
+            ))
+
+        if options['rollup']:
+            call_command('build_revenue_rollup', '--full', verbosity=options['verbosity'])
+
+    def create_tables(self):
+        existing = set(connection.introspection.table_names())
+        with connection.schema_editor() as editor:
+            for model in GENERATED_MODELS:
+                if model._meta.db_table not in existing:
+                    editor.create_model(model)
+                    if self.verbosity:
+                        self.stdout.write(f"Tabel {model._meta.db_table} dibuat.")
+
+    def prepare_tables(self, flush):
+        existing = set(connection.introspection.table_names())
+        missing = [model._meta.db_table for model in GENERATED_MODELS if model._meta.db_table not in existing]
+        if missing:
+            raise CommandError(f"Tabel belum ada: {', '.join(missing)}. Jalankan dengan --create-tables.")
+
+        if not any(model.objects.exists() for model in GENERATED_MODELS):
+            return
+        if not flush:
+            raise CommandError("Tabel sudah berisi data. Pakai --flush untuk mengosongkan data sintetis lama.")
+        if Locations.objects.exclude(pengelola=SYNTHETIC_PENGELOLA).exists():
+            raise CommandError("tm_lokasi berisi lokasi yang bukan hasil generator, --flush dibatalkan.")
+
+        models = list(reversed(GENERATED_MODELS))
+        if RevenueRollup._meta.db_table in existing:
+            models.insert(0, RevenueRollup)
+        with connection.cursor() as cursor:
+            for model in models:
+                # DELETE langsung: QuerySet.delete() memuat baris untuk cascade/sinyal
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+    def insert(self, model, fields, rows, batch_size):
+        """
+        INSERT per batch lewat executemany. Baris berupa tuple sesuai `fields` yang nilainya
+        sudah diadaptasi ke database; jauh lebih cepat daripada bulk_create untuk jutaan
+        baris karena tidak membuat instance model.
+        """
+        quote_name = connection.ops.quote_name
+        columns = ', '.join(quote_name(model._meta.get_field(name).column) for name in fields)
+        sql = (f"INSERT INTO {quote_name(model._meta.db_table)} ({columns}) "
+               f"VALUES ({', '.join(['%s'] * len(fields))})")
+        total = 0
+        with connection.cursor() as cursor:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    return total
+                # Satu transaksi per batch (autocommit per baris sangat lambat di SQLite)
+                with transaction.atomic():
+                    cursor.executemany(sql, batch)
+                total += len(batch)
+                if self.verbosity > 1:
+                    self.stdout.write(f"{model._meta.db_table}: {total} baris")
+
+    def create_locations(self, count):
+        Locations.objects.bulk_create(
+            Locations(pengelola=SYNTHETIC_PENGELOLA, site=f"Site {index:04d}", alamat=f"Jl. Sintetis No. {index}")
+            for index in range(1, count + 1)
+        )
+        # bulk_create tidak mengisi pk di MySQL, jadi baca ulang
+        return list(Locations.objects.filter(pengelola=SYNTHETIC_PENGELOLA).order_by('id'))
+
+    def create_users(self, rng, locations, count, per_user):
+        Users.objects.bulk_create(
+            [Users(id_user='admin', nama_user='Admin Sintetis', password='admin', admin=1)] +
+            [Users(id_user=f'user{index}', nama_user=f'User {index}', password='user', admin=0)
+             for index in range(1, count + 1)]
+        )
+        UsersLocations.objects.bulk_create(
+            UsersLocations(id_user=user, id_lokasi=lokasi)
+            for user in Users.objects.filter(admin=0).order_by('id')
+            for lokasi in rng.sample(locations, min(per_user, len(locations)))
+        )
+
+    # Generator baris: nominal rupiah dikirim sebagai int (kolom DECIMAL menerimanya apa adanya)
+
+    def parkir_rows(self, rng, locations, weights, start, end, shifts, vehicles):
+        for lokasi in locations:
+            weight = weights[lokasi.id]
+            for tanggal, value in date_range(start, end):
+                # Akhir pekan lebih ramai
+                season = 1.3 if tanggal.weekday() >= 5 else 1.0
+                for shift in shifts:
+                    for kendaraan in vehicles:
+                        tarif = TARIF.get(kendaraan, 5000)
+                        casual = int(rng.randint(0, 120) * weight * season)
+                        cash = int(casual * tarif * rng.random())
+                        yield (lokasi.id, value, shift, kendaraan, 'C', tanggal.day, tanggal.month, tanggal.year,
+                               tarif, cash, casual * tarif - cash, casual, rng.randint(0, 15))
+
+    def member_rows(self, rng, locations, weights, start, end):
+        for lokasi in locations:
+            for tanggal, value in date_range(start, end):
+                if rng.random() < 0.7:
+                    member = int(rng.randint(0, 40) * weights[lokasi.id]) * 10000
+                    yield (lokasi.id, value, tanggal.day, tanggal.month, tanggal.year, member)
+
+    def manual_rows(self, rng, locations, start, end, shifts):
+        for lokasi in locations:
+            for tanggal, value in date_range(start, end):
+                for shift in shifts:
+                    if rng.random() < 0.3:
+                        masalah = rng.randint(1, 10) * 1000 if rng.random() < 0.2 else 0
+                        yield (lokasi.id, value, shift, tanggal.day, tanggal.month, tanggal.year,
+                               rng.randint(1, 50) * 1000, masalah)
+
+    def realtime_rows(self, rng, locations, weights, end, days, shifts, vehicles):
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        for lokasi in locations:
+            for tanggal, value in date_range(end - timedelta(days=days - 1), end):
+                for hour in range(24):
+                    shift = shifts[hour * len(shifts) // 24]
+                    waktu = adapt_datetime(datetime.combine(tanggal, time(hour), tzinfo=timezone.utc))
+                    for kendaraan in vehicles:
+                        qty = int(rng.randint(0, 30) * weights[lokasi.id])
+                        yield (lokasi.id, value, shift, waktu, kendaraan, qty, qty * TARIF.get(kendaraan, 5000))
+
+    def traffic_rows(self, rng, locations, weights):
+        for lokasi in locations:
+            jam = [int(rng.randint(0, 200) * weights[lokasi.id]) for hour in range(24)]
+            yield (lokasi.id, *jam, *(count * 5000 for count in jam))
+
+    def post_rows(self, rng, locations):
+        for lokasi in locations:
+            for number in range(1, rng.randint(2, 6) + 1):
+                yield (lokasi.id, f'POS {number}', rng.random() < 0.8, rng.randint(0, 500))
+
+def date_range(start, end):
+    """(tanggal, nilai kolom DATE yang sudah diadaptasi) untuk setiap hari start..end."""
+    for offset in range((end - start).days + 1):
+        tanggal = start + timedelta(days=offset)
+        yield tanggal, connection.ops.adapt_datefield_value(tanggal)
@@ -0,0 +1,24 @@
+# app_revenue_rollup/management/commands/refresh_watermarks.py
+
+from django.core.management.base import BaseCommand
+from app_revenue_rollup.watermarks import data_synced, location_watermarks, TRACKED_FIELDS
+
+class Command(BaseCommand):
+    help = (
+        "Kirim sinyal data_synced: generasi data di cache bersama naik, sehingga semua worker web "
+        "menghitung ulang snapshot watermark, cache response, partial, prefix index dan ETag "
+        "(paling lambat DATA_GENERATION_CHECK_INTERVAL detik). Jalankan dari job sync setelah "
+        "menulis ke tabel tt_sync_*, tt_data_hour atau tt_pos_aktif."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warm', action='store_true',
+                            help='Langsung hitung ulang snapshot di proses ini (hanya berguna untuk cache bersama).')
+
+    def handle(self, *args, **options):
+        data_synced.send(sender=None)
+        if options['warm']:
+            for model in TRACKED_FIELDS:
+                snapshot = location_watermarks(model)
+                self.stdout.write(f"{model._meta.db_table}: {len(snapshot)} lokasi")
+        self.stdout.write(self.style.SUCCESS("Watermark data di-refresh."))
@@ -0,0 +1,29 @@
+# app_revenue_rollup/merge.py
+
+"""
+Hash-join untuk hasil agregasi (list of dict dari .values().annotate()).
+
+Hasil query diindeks sekali berdasarkan key (mis. lokasi + periode), lalu
+dibaca dengan lookup O(1). Menggantikan pola `next(... for item in data if ...)`
+per baris yang biayanya O(baris^2).
+"""
+
+def make_key(row, key_fields):
+    return tuple(row[field] for field in key_fields)
+
+def index_rows(rows, key_fields):
+    """
+    Indeks baris berdasarkan key_fields. Mengembalikan dict {key: row}.
+    Jika ada key ganda, baris terakhir yang dipakai.
+    """
+    return {make_key(row, key_fields): row for row in rows}
+
+def group_rows(rows, field):
+    """
+    Kelompokkan baris berdasarkan satu field (mis. 'id_lokasi__site'),
+    urutan baris di dalam tiap grup dipertahankan.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[field], []).append(row)
+    return groups
@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-18 08:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('app_locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tanggal', models.DateField()),
+                ('cash', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('prepaid', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('casual', models.IntegerField(default=0)),
+                ('pass_field', models.IntegerField(db_column='pass', default=0)),
+                ('member', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('manual', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('masalah', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total_pendapatan', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id_lokasi', models.ForeignKey(db_column='id_lokasi', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='app_locations.locations')),
+            ],
+            options={
+                'db_table': 'tt_rollup_pendapatan_harian',
+                'indexes': [models.Index(fields=['tanggal', 'id_lokasi'], name='idx_rollup_tanggal_lokasi')],
+                'constraints': [models.UniqueConstraint(fields=('id_lokasi', 'tanggal'), name='uniq_rollup_lokasi_tanggal')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+def backfill_jumlah_parkir(apps, schema_editor):
+    # Isi kolom baru untuk baris rollup yang sudah ada. Tabel sync tidak dikelola
+    # Django, jadi lewati jika belum ada (mis. database test yang masih kosong).
+    connection = schema_editor.connection
+    if 'tt_sync_income_parkir' not in connection.introspection.table_names():
+        return
+    schema_editor.execute(
+        "UPDATE tt_rollup_pendapatan_harian SET jumlah_parkir = ("
+        "SELECT COUNT(*) FROM tt_sync_income_parkir p "
+        "WHERE p.id_lokasi = tt_rollup_pendapatan_harian.id_lokasi "
+        "AND p.tanggal = tt_rollup_pendapatan_harian.tanggal)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_revenue_rollup', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revenuerollup',
+            name='jumlah_parkir',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_jumlah_parkir, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# app_revenue_rollup/models.py
+
+from django.db import models
+from app_locations.models import Locations
+
+class RevenueRollup(models.Model):
+    """
+    Rekap pendapatan harian per lokasi (satu baris per id_lokasi x tanggal).
+    Gabungan dari tt_sync_income_parkir, tt_sync_income_member dan tt_sync_income_manual,
+    diisi ulang lewat command `build_revenue_rollup`.
+    """
+    id_lokasi = models.ForeignKey(Locations, on_delete=models.CASCADE, db_column='id_lokasi', db_constraint=False)
+    tanggal = models.DateField()
+    cash = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    prepaid = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    casual = models.IntegerField(default=0)
+    pass_field = models.IntegerField(db_column='pass', default=0)
+    member = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    manual = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    masalah = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_pendapatan = models.DecimalField(max_digits=15, decimal_places=2, default=0)  # cash + prepaid + member + manual - masalah
+    jumlah_parkir = models.IntegerField(default=0)  # jumlah baris tt_sync_income_parkir pada hari tersebut
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tt_rollup_pendapatan_harian'
+        constraints = [
+            models.UniqueConstraint(fields=['id_lokasi', 'tanggal'], name='uniq_rollup_lokasi_tanggal'),
+        ]
+        indexes = [
+            models.Index(fields=['tanggal', 'id_lokasi'], name='idx_rollup_tanggal_lokasi'),
+        ]
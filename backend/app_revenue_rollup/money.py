@@ -0,0 +1,36 @@
+# app_revenue_rollup/money.py
+
+"""
+Representasi uang internal dalam sen (int).
+
+Kolom pendapatan bertipe DECIMAL(10,2) rupiah, jadi penjumlahan, selisih, min/max di
+pipeline agregasi cukup pakai int sen yang eksak dan jauh lebih murah daripada
+aritmetika Decimal. Konversi balik hanya dilakukan saat membentuk response:
+- from_cents : Decimal 2 digit (bentuk sama dengan SUM DECIMAL dari database)
+- to_rupiah  : int rupiah, sama dengan int(Decimal) yang dipakai sebelumnya
+"""
+
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+def to_cents(value):
+    """Nilai dari database/driver (Decimal, int, float, string, None) ke int sen."""
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        # SQLite mengembalikan float; bulatkan ke 2 digit seperti query.as_decimal
+        value = str(round(value, 2))
+    return int(Decimal(value).quantize(CENT).scaleb(2))
+
+def from_cents(cents):
+    """Int sen ke Decimal 2 digit, mis. 9050 -> Decimal('90.50')."""
+    # Decimal * int eksak dan lebih murah daripada Decimal(cents).scaleb(-2)
+    return CENT * cents
+
+def to_rupiah(cents):
+    """Int sen ke int rupiah, dibulatkan ke arah nol seperti int(Decimal)."""
+    rupiah = abs(cents) // 100
+    return rupiah if cents >= 0 else -rupiah
@@ -0,0 +1,107 @@
+# app_revenue_rollup/partials.py
+
+"""
+Agregat parsial per lokasi, dihitung sekali untuk SEMUA lokasi dan dipakai bersama.
+
+Endpoint ringkasan (jam ramai, status pos, transaksi bermasalah) dulu menjalankan
+agregasi `id_lokasi IN (<lokasi user>)` per request. Sekarang satu query GROUP BY
+id_lokasi tanpa filter lokasi membentuk {id_lokasi: partial}, disimpan di cache, dan
+tampilan tiap user cukup menjumlahkan partial untuk lokasi miliknya: O(|lokasi user|),
+tidak bergantung pada jumlah baris data. (Tren pendapatan memakai pola yang sama lewat
+prefix index di prefix.py.)
+
+- Partial dari tabel income (tt_sync_*) divalidasi token data_watermark(), seperti cached_data.
+- Tabel snapshot (tt_data_hour, tt_pos_aktif) di-update di tempat di luar ORM dan tidak
+  punya kolom waktu, jadi tidak ada watermark murah yang menangkap perubahannya. Partial
+  dari tabel ini tidak di-cache: dibaca langsung per request, hanya untuk lokasi user
+  (satu query, seperti sebelumnya), lalu dijumlahkan dengan helper yang sama.
+"""
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncYear
+from app_income_manual.models import IncomeManual
+from app_post_status.models import PostStatus
+from app_traffic_hours.models import TrafficHours
+from .cache import cached_data
+
+def income_partials(name, build):
+    """{id_lokasi: partial} dari tabel income, valid selama token data_watermark() sama."""
+    value, _ = cached_data(f"location-partials:{name}", build, endpoint=f"partials/{name}")
+    return value
+
+def sum_vectors(partials, location_ids, width):
+    """Jumlahkan partial berbentuk list angka (panjang `width`) per posisi untuk location_ids."""
+    total = [0] * width
+    for location_id in location_ids:
+        vector = partials.get(location_id)
+        if vector is not None:
+            total = [a + b for a, b in zip(total, vector)]
+    return total
+
+def ids_by_site(locations):
+    """{site: [id_lokasi...]} dari UserLocations, urut id seperti `locations`."""
+    by_site = {}
+    for location in locations:
+        by_site.setdefault(location.site, []).append(location.id)
+    return by_site
+
+# --- partial per endpoint -----------------------------------------------------
+
+HOURS = range(24)
+TRAFFIC_WIDTH = 2 * len(HOURS)
+
+def traffic_hours_partials(location_ids):
+    """{id_lokasi: (jam_0..jam_23, tarif_0..tarif_23)} dari tt_data_hour (live), lebar TRAFFIC_WIDTH."""
+    fields = [f'jam_{i}' for i in HOURS] + [f'tarif_{i}' for i in HOURS]
+    rows = TrafficHours.objects.filter(id_lokasi__in=location_ids).order_by().values('id_lokasi').annotate(
+        **{f'sum_{field}': Sum(field) for field in fields}
+    )
+    return {row['id_lokasi']: tuple(row[f'sum_{field}'] or 0 for field in fields) for row in rows}
+
+def post_status_partials(location_ids):
+    """
+    {'pos': {id_lokasi: [(pos, aktif, trafic)...]}, 'totals': {id_lokasi: [trafic online,
+    trafic offline, jumlah pos online, jumlah pos offline]}} dari tt_pos_aktif (live).
+    """
+    pos_lists, totals = {}, {}
+    rows = PostStatus.objects.filter(id_lokasi__in=location_ids).order_by('id').values_list('id_lokasi', 'pos', 'aktif', 'trafic')
+    for id_lokasi, pos, aktif, trafic in rows:
+        pos_lists.setdefault(id_lokasi, []).append((pos, aktif, trafic))
+        entry = totals.setdefault(id_lokasi, [0, 0, 0, 0])
+        offset = 0 if aktif else 1
+        entry[offset] += trafic or 0
+        entry[offset + 2] += 1
+    return {'pos': pos_lists, 'totals': totals}
+
+def trouble_partials(period, start_date, end_date, exclude_zero=False):
+    """
+    {id_lokasi: {periode: Sum(masalah)}} dari tt_sync_manual di [start_date, end_date].
+    period: None (per tanggal), 'month' atau 'year'.
+    """
+    def build():
+        queryset = IncomeManual.objects.filter(tanggal__range=[start_date, end_date])
+        if exclude_zero:
+            queryset = queryset.exclude(masalah=0)
+        if period is None:
+            queryset = queryset.annotate(periode=F('tanggal'))
+        else:
+            queryset = queryset.annotate(periode=(TruncMonth if period == 'month' else TruncYear)('tanggal'))
+        rows = queryset.values('id_lokasi', 'periode').annotate(total_masalah=Sum('masalah')).order_by()
+        partials = {}
+        for row in rows:
+            partials.setdefault(row['id_lokasi'], {})[row['periode']] = row['total_masalah']
+        return partials
+
+    name = f"trouble:{period or 'day'}:{start_date}:{end_date}:{int(exclude_zero)}"
+    return income_partials(name, build)
+
+def sum_by_site(partials, location_ids):
+    """
+    Jumlahkan partial {periode: nilai} untuk location_ids -> {periode: total}. Periode
+    hanya muncul jika minimal satu lokasi punya baris, seperti GROUP BY di database.
+    """
+    totals = {}
+    for location_id in location_ids:
+        for periode, value in partials.get(location_id, {}).items():
+            totals[periode] = value if periode not in totals else totals[periode] + value
+    return totals
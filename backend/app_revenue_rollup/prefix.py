@@ -0,0 +1,291 @@
+# app_revenue_rollup/prefix.py
+
+"""
+Index prefix-sum (jumlah kumulatif) pendapatan harian per lokasi, di memori proses.
+
+Untuk tiap lokasi dan tiap komponen disimpan array kumulatif harian yang padat mulai
+dari tanggal income pertama, sehingga total lokasi L di rentang [d1, d2] cukup
+cum[d2 + 1] - cum[d1] per lokasi: O(|L|) berapapun panjang rentangnya.
+
+- Nilai uang disimpan dalam sen (int64, array('q'), lihat money.py) supaya penjumlahan tetap eksak.
+- Index dibangun dari RevenueQuery (rollup + LIVE_DAYS terakhir dari tabel income),
+  jadi angkanya sama dengan revenue_rows.
+- Saat token data_watermark() berubah, index diperpanjang mulai beberapa hari sebelum
+  tanggal terakhirnya (data sync yang datang terlambat), bukan dibangun ulang.
+  Build penuh dilakukan ulang tiap PREFIX_INDEX_REBUILD_SECONDS, dan saat generasi
+  data_synced (elemen pertama token) berubah karena job sync bisa menulis ulang tanggal lama.
+- Build tidak berjalan di jalur request: tiap versi index adalah PrefixSnapshot yang tidak
+  diubah lagi, dibangun di thread latar belakang lalu dipasang dengan satu assignment.
+  Selama belum ada snapshot dengan token yang sama, range_rows memakai revenue_rows (SQL)
+  dan tidak menunggu; snapshot yang hanya kedaluwarsa umurnya tetap dipakai sampai
+  penggantinya siap. Di dalam transaksi (mis. TestCase) build dijalankan langsung karena
+  thread lain tidak melihat data transaksi tersebut, sama seperti fan_out.
+- Index ada di memori tiap proses worker, jadi tiap proses membangunnya sendiri.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import connection, connections
+from app_locations.models import Locations
+from .cache import data_watermark
+from .money import from_cents
+from .query import LIVE_DAYS, MONEY_COMPONENTS, RevenueQuery, as_date, revenue_rows
+from .utils import iter_chunks, source_date_range
+
+logger = logging.getLogger(__name__)
+
+# Matikan untuk kembali ke query agregasi biasa
+PREFIX_INDEX_ENABLED = getattr(settings, 'REVENUE_PREFIX_INDEX', True)
+# Interval build penuh (detik) untuk menangkap perubahan data lama
+PREFIX_INDEX_REBUILD_SECONDS = getattr(settings, 'REVENUE_PREFIX_INDEX_REBUILD_SECONDS', 60 * 60)
+
+# Komponen yang diindeks; 'hari' = jumlah hari yang punya baris income (untuk
+# membedakan periode kosong seperti GROUP BY di database)
+COMPONENTS = ('cash', 'prepaid', 'casual', 'pass_field', 'member', 'manual', 'masalah', 'jumlah_parkir',
+              'total_pendapatan', 'hari')
+CENT_COMPONENTS = MONEY_COMPONENTS + ('total_pendapatan',)
+
+def bucket_start(day, bucket):
+    if bucket == 'month':
+        return day.replace(day=1)
+    if bucket == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+def next_bucket(day, bucket):
+    if bucket == 'month':
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    if bucket == 'year':
+        return date(day.year + 1, 1, 1)
+    return day + timedelta(days=1)
+
+class PrefixSnapshot:
+    """Satu versi index. Setelah dipasang di RevenuePrefixIndex tidak diubah lagi."""
+
+    def __init__(self, token, origin=None, end=None, cum=None, sites=None, built_at=None):
+        self.token = token
+        self.origin = origin    # tanggal index ke-0
+        self.end = end          # tanggal terakhir yang terindeks
+        self.cum = cum or {}    # {id_lokasi: {komponen: array('q') sepanjang jumlah hari + 1}}
+        self.sites = sites or {}    # {id_lokasi: site}
+        self.built_at = built_at    # waktu build penuh terakhir (monotonic)
+
+    def expired(self):
+        return time.monotonic() - self.built_at >= PREFIX_INDEX_REBUILD_SECONDS
+
+    # --- build ---------------------------------------------------------------
+
+    def append_days(self, start_date, end_date, values):
+        """Tambahkan hari start_date..end_date ke array kumulatif semua lokasi."""
+        length = (start_date - self.origin).days + 1
+        for id_lokasi in {id_lokasi for id_lokasi, _ in values}:
+            if id_lokasi not in self.cum:
+                self.cum[id_lokasi] = {component: array('q', [0] * length) for component in COMPONENTS}
+
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        for id_lokasi, series in self.cum.items():
+            for component, cum in series.items():
+                del cum[length:]
+                total = cum[-1]
+                for day in days:
+                    row = values.get((id_lokasi, day))
+                    if row is not None:
+                        total += row[component]
+                    cum.append(total)
+
+    # --- query ---------------------------------------------------------------
+
+    def offset(self, day):
+        """Posisi di array kumulatif untuk awal hari `day`, dibatasi ke rentang index."""
+        return min(max((day - self.origin).days, 0), (self.end - self.origin).days + 1)
+
+    def sum_range(self, location_ids, start_date, end_date):
+        """Total mentah (int, uang dalam sen) semua komponen untuk lokasi di rentang inklusif."""
+        totals = dict.fromkeys(COMPONENTS, 0)
+        if self.origin is None or start_date > end_date:
+            return totals
+        lo, hi = self.offset(start_date), self.offset(end_date + timedelta(days=1))
+        if hi <= lo:
+            return totals
+        for id_lokasi in location_ids:
+            series = self.cum.get(id_lokasi)
+            if series is None:
+                continue
+            for component, cum in series.items():
+                totals[component] += cum[hi] - cum[lo]
+        return totals
+
+    def groups(self, location_ids, group_by):
+        """[(key, [id_lokasi...])] sesuai group_by RevenueQuery."""
+        if group_by is None:
+            return [(None, list(location_ids))]
+        if group_by == 'id_lokasi':
+            return [(id_lokasi, [id_lokasi]) for id_lokasi in sorted(location_ids)]
+        by_site = {}
+        for id_lokasi in location_ids:
+            if id_lokasi in self.sites:
+                by_site.setdefault(self.sites[id_lokasi], []).append(id_lokasi)
+        return sorted(by_site.items())
+
+    def rows(self, location_ids, start_date=None, end_date=None, bucket='day', group_by='id_lokasi', parkir_only=False,
+             cents=False):
+        """Hasil dengan bentuk yang sama seperti revenue_rows, dihitung dari prefix-sum."""
+        money = int if cents else from_cents
+        if self.origin is None:
+            return []
+        location_ids = list(self.cum) if location_ids is None else [int(location_id) for location_id in location_ids]
+        start_date = max(start_date or self.origin, self.origin)
+        end_date = min(end_date or self.end, self.end)
+
+        periods = [(None, start_date, end_date)]
+        if bucket is not None:
+            periods, day = [], bucket_start(start_date, bucket)
+            while day <= end_date:
+                following = next_bucket(day, bucket)
+                periods.append((day, max(day, start_date), min(following - timedelta(days=1), end_date)))
+                day = following
+
+        rows = []
+        for key, ids in self.groups(location_ids, group_by):
+            for periode, period_start, period_end in periods:
+                totals = self.sum_range(ids, period_start, period_end)
+                if not totals['hari'] or (parkir_only and not totals['jumlah_parkir']):
+                    continue
+                row = {component: money(totals[component]) if component in CENT_COMPONENTS else totals[component]
+                       for component in COMPONENTS if component != 'hari'}
+                if group_by is not None:
+                    row[group_by] = key
+                if bucket is not None:
+                    row['periode'] = periode
+                rows.append(row)
+        return rows
+
+def daily_values(start_date, end_date):
+    """{(id_lokasi, tanggal): {komponen: int}} dari RevenueQuery untuk rentang (maksimal satu potongan)."""
+    values = {}
+    for row in RevenueQuery(None, start_date, end_date, bucket='day', group_by='id_lokasi').rows(cents=True):
+        entry = {component: row[component] for component in CENT_COMPONENTS}
+        entry.update(casual=row['casual'], pass_field=row['pass_field'], jumlah_parkir=row['jumlah_parkir'], hari=1)
+        values[(row['id_lokasi'], row['periode'])] = entry
+    return values
+
+def append_range(snapshot, start_date, end_date):
+    """Isi snapshot untuk start_date..end_date per potongan 1 tahun (memori puncak satu potongan)."""
+    for chunk_start, chunk_end in iter_chunks(start_date, end_date, days=366):
+        snapshot.append_days(chunk_start, chunk_end, daily_values(chunk_start, chunk_end))
+
+def build_snapshot(token):
+    """Build penuh dari tanggal income pertama."""
+    first_date, last_date = source_date_range()
+    snapshot = PrefixSnapshot(token, first_date, last_date, built_at=time.monotonic())
+    if first_date is not None:
+        append_range(snapshot, first_date, last_date)
+    snapshot.sites = dict(Locations.objects.values_list('id', 'site'))
+    return snapshot
+
+def extend_snapshot(previous, token):
+    """
+    Salinan `previous` yang dihitung ulang dari LIVE_DAYS sebelum tanggal terakhirnya sampai
+    tanggal income terbaru. Array disalin dulu supaya pembaca snapshot lama tidak terganggu.
+    """
+    first_date, last_date = source_date_range()
+    start_date = max(previous.end - timedelta(days=LIVE_DAYS), previous.origin)
+    if first_date is None or first_date < previous.origin or last_date < start_date:
+        return build_snapshot(token)
+    values = {}
+    for chunk_start, chunk_end in iter_chunks(start_date, last_date, days=366):
+        values.update(daily_values(chunk_start, chunk_end))
+    if any(id_lokasi not in previous.cum for id_lokasi, _ in values):
+        # Lokasi baru bisa membawa histori sebelum start_date
+        return build_snapshot(token)
+
+    length = (start_date - previous.origin).days + 1
+    cum = {id_lokasi: {component: array('q', series[component][:length]) for component in COMPONENTS}
+           for id_lokasi, series in previous.cum.items()}
+    snapshot = PrefixSnapshot(token, previous.origin, last_date, cum, dict(Locations.objects.values_list('id', 'site')),
+                              previous.built_at)
+    snapshot.append_days(start_date, last_date, values)
+    return snapshot
+
+class RevenuePrefixIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None    # PrefixSnapshot aktif, diganti utuh (tidak pernah diubah di tempat)
+        self.building = False
+
+    @property
+    def built_at(self):
+        snapshot = self.snapshot
+        return snapshot.built_at if snapshot is not None else None
+
+    def build(self, token):
+        """Snapshot baru untuk `token`: perpanjang snapshot aktif jika bisa, selain itu build penuh."""
+        previous = self.snapshot
+        if previous is None or previous.origin is None or previous.expired() or previous.token[0] != token[0]:
+            return build_snapshot(token)
+        return extend_snapshot(previous, token)
+
+    def run_build(self):
+        try:
+            self.snapshot = self.build(data_watermark())
+        except Exception:
+            logger.exception("Gagal membangun prefix index pendapatan")
+        finally:
+            with self.lock:
+                self.building = False
+            # Koneksi database thread ini tidak dipakai lagi
+            connections.close_all()
+
+    def refresh(self):
+        """
+        Mulai build jika snapshot belum ada, tokennya beda atau umurnya habis. Build berjalan
+        di thread latar belakang (satu per proses) dengan salinan contextvars pemanggil,
+        sehingga membaca replica dan memo watermark yang sama dengan request-nya.
+        """
+        if connection.in_atomic_block:
+            with self.lock:
+                self.snapshot = self.build(data_watermark())
+            return
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self.run_build,), name='prefix-index-build', daemon=True).start()
+
+    def current(self):
+        """Snapshot untuk token data_watermark() saat ini, atau None jika belum tersedia."""
+        token = data_watermark()
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.token != token or snapshot.expired():
+            self.refresh()
+            if connection.in_atomic_block:
+                snapshot = self.snapshot
+        return snapshot if snapshot is not None and snapshot.token == token else None
+
+    def invalidate(self):
+        with self.lock:
+            self.snapshot = None
+
+prefix_index = RevenuePrefixIndex()
+
+def range_rows(location_ids, start_date=None, end_date=None, bucket='day', group_by='id_lokasi', parkir_only=False,
+               cents=False):
+    """
+    Pengganti revenue_rows untuk jendela tetap: dari prefix index jika aktif dan snapshot
+    untuk data saat ini sudah siap, selain itu langsung dari revenue_rows.
+    """
+    if location_ids is not None and not location_ids:
+        return []
+    snapshot = prefix_index.current() if PREFIX_INDEX_ENABLED else None
+    if snapshot is None:
+        return revenue_rows(location_ids, start_date, end_date, bucket, group_by, parkir_only, cents)
+    start_date = as_date(start_date) if start_date is not None else None
+    end_date = as_date(end_date) if end_date is not None else None
+    return snapshot.rows(location_ids, start_date, end_date, bucket, group_by, parkir_only, cents)
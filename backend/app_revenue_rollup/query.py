@@ -0,0 +1,254 @@
+# app_revenue_rollup/query.py
+
+"""
+Query builder satu statement untuk komponen pendapatan.
+
+Tabel income parkir, member dan manual digabung dengan UNION ALL lalu dijumlahkan
+sekali per (lokasi, periode) di database, jadi satu request cukup satu round-trip.
+
+Pembagian rollup vs tabel mentah dihitung per lokasi:
+- hari <= tanggal rollup terakhir lokasi itu dibaca dari tt_rollup_pendapatan_harian,
+- hari setelahnya, dan selalu LIVE_DAYS hari terakhir, dibaca langsung dari tabel income,
+  supaya sync yang masuk setelah build rollup terakhir tetap terlihat.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, connections, router
+from django.utils import timezone
+from app_locations.models import Locations
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from .models import RevenueRollup
+
+COMPONENTS = ('cash', 'prepaid', 'casual', 'pass_field', 'member', 'manual', 'masalah', 'jumlah_parkir')
+MONEY_COMPONENTS = ('cash', 'prepaid', 'member', 'manual', 'masalah')
+CENT = Decimal('0.01')
+
+# Jumlah hari terakhir (termasuk hari ini) yang selalu dibaca dari tabel income
+LIVE_DAYS = getattr(settings, 'REVENUE_ROLLUP_LIVE_DAYS', 3)
+
+# Komponen yang diambil dari masing-masing sumber, sisanya diisi 0.
+# jumlah_parkir dihitung dari baris parkir (1 per baris) supaya periode tanpa
+# transaksi parkir bisa dibedakan seperti pada query lama berbasis parkir_data.
+SOURCES = (
+    (IncomeParkir, ('cash', 'prepaid', 'casual', 'pass_field', 'jumlah_parkir')),
+    (IncomeMember, ('member',)),
+    (IncomeManual, ('manual', 'masalah')),
+)
+
+GROUP_BY = (None, 'id_lokasi', 'site')
+
+def as_date(value):
+    """MySQL/SQLite bisa mengembalikan bucket sebagai string; samakan jadi date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def as_decimal(value):
+    """Samakan hasil SUM ke Decimal 2 digit (SQLite mengembalikan float/int)."""
+    if value is None:
+        value = 0
+    if isinstance(value, float):
+        value = str(round(value, 2))
+    return Decimal(value).quantize(CENT)
+
+def default_live_from():
+    return timezone.localdate() - timedelta(days=LIVE_DAYS - 1)
+
+class RevenueQuery:
+    """
+    Bangun dan jalankan satu statement agregasi pendapatan.
+
+    location_ids : iterable id_lokasi yang boleh dibaca, None berarti semua lokasi
+    start_date, end_date : batas tanggal (inklusif), None berarti tanpa batas
+    bucket : 'day', 'month', 'year' atau None (total seluruh rentang)
+    group_by : None (gabungan semua lokasi), 'id_lokasi' atau 'site' (nama tm_lokasi)
+    parkir_only : hanya periode yang punya baris income parkir
+    use_rollup : baca hari yang sudah di-rollup dari tt_rollup_pendapatan_harian
+    live_from : hari mulai tanggal ini selalu dibaca dari tabel income
+    """
+
+    def __init__(self, location_ids, start_date=None, end_date=None, bucket='day', group_by='id_lokasi',
+                 parkir_only=False, use_rollup=True, live_from=None):
+        if bucket is not None and bucket not in ('day', 'month', 'year'):
+            raise ValueError(f"Bucket tidak dikenal: {bucket}")
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by tidak dikenal: {group_by}")
+        self.location_ids = None if location_ids is None else [int(location_id) for location_id in location_ids]
+        self.start_date = as_date(start_date) if start_date is not None else None
+        self.end_date = as_date(end_date) if end_date is not None else None
+        self.bucket = bucket
+        self.group_by = group_by
+        self.parkir_only = parkir_only
+        self.use_rollup = use_rollup
+        self.live_from = as_date(live_from) if live_from is not None else default_live_from()
+
+    def quote(self, name):
+        return connection.ops.quote_name(name)
+
+    def column(self, model, field, alias='t'):
+        return f"{alias}.{self.quote(model._meta.get_field(field).column)}"
+
+    def table(self, model):
+        return self.quote(model._meta.db_table)
+
+    def location_filter(self, model, alias='t'):
+        if self.location_ids is None:
+            return [], []
+        placeholders = ', '.join(['%s'] * len(self.location_ids))
+        return [f"{self.column(model, 'id_lokasi', alias)} IN ({placeholders})"], list(self.location_ids)
+
+    def bucket_sql(self, column):
+        """Ekspresi bucket yang sama dengan TruncMonth/TruncYear milik Django."""
+        if self.bucket == 'day':
+            return column, []
+        sql, params = connection.ops.date_trunc_sql(self.bucket, column, ())
+        return sql, list(params)
+
+    def watermark_sql(self):
+        """Tanggal rollup terakhir per lokasi (derived table `w`)."""
+        conditions, params = self.location_filter(RevenueRollup, 'r')
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        sql = "(SELECT {id_lokasi} AS id_lokasi, MAX({tanggal}) AS watermark FROM {table} r{where} GROUP BY {id_lokasi}) w".format(
+            id_lokasi=self.column(RevenueRollup, 'id_lokasi', 'r'),
+            tanggal=self.column(RevenueRollup, 'tanggal', 'r'),
+            table=self.table(RevenueRollup),
+            where=where,
+        )
+        return sql, params
+
+    def branch(self, model, fields, rollup_side=None):
+        """
+        Satu SELECT untuk UNION ALL. rollup_side: None (tanpa rollup),
+        'rollup' (hari yang dibaca dari rollup) atau 'raw' (hari setelah rollup lokasi
+        tersebut, ditambah LIVE_DAYS terakhir).
+        """
+        tanggal = self.column(model, 'tanggal')
+        params = []
+
+        columns = [f"{self.column(model, 'id_lokasi')} AS id_lokasi"]
+        if self.bucket is not None:
+            bucket_sql, bucket_params = self.bucket_sql(tanggal)
+            columns.append(f"{bucket_sql} AS periode")
+            params += bucket_params
+        for component in COMPONENTS:
+            if component not in fields:
+                columns.append(f"0 AS {component}")
+            elif component == 'jumlah_parkir' and model is IncomeParkir:
+                columns.append(f"1 AS {component}")
+            else:
+                columns.append(f"{self.column(model, component)} AS {component}")
+
+        source = f"{self.table(model)} t"
+        if rollup_side == 'raw':
+            watermark_sql, watermark_params = self.watermark_sql()
+            source += f" LEFT JOIN {watermark_sql} ON w.id_lokasi = {self.column(model, 'id_lokasi')}"
+            params += watermark_params
+
+        conditions, location_params = self.location_filter(model)
+        params += location_params
+        if self.start_date is not None:
+            conditions.append(f"{tanggal} >= %s")
+            params.append(self.start_date)
+        if self.end_date is not None:
+            conditions.append(f"{tanggal} <= %s")
+            params.append(self.end_date)
+        if rollup_side == 'rollup':
+            conditions.append(f"{tanggal} < %s")
+            params.append(self.live_from)
+        elif rollup_side == 'raw':
+            conditions.append(f"(w.watermark IS NULL OR {tanggal} > w.watermark OR {tanggal} >= %s)")
+            params.append(self.live_from)
+
+        sql = f"SELECT {', '.join(columns)} FROM {source}"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        return sql, params
+
+    def cents_sql(self, expression):
+        """Nilai uang sebagai integer sen langsung dari database (tanpa Decimal di driver)."""
+        int_type = connection.ops.cast_data_types.get('BigIntegerField', connection.data_types['BigIntegerField'])
+        return f"CAST(ROUND(({expression}) * 100) AS {int_type})"
+
+    def sql(self, cents=False):
+        """Kembalikan (sql, params) untuk statement lengkap; cents=True: uang dalam integer sen."""
+        branches = []
+        if self.use_rollup:
+            branches.append(self.branch(RevenueRollup, COMPONENTS, 'rollup'))
+        for model, fields in SOURCES:
+            branches.append(self.branch(model, fields, 'raw' if self.use_rollup else None))
+
+        union_sql = ' UNION ALL '.join(sql for sql, _ in branches)
+        params = [param for _, branch_params in branches for param in branch_params]
+
+        select_columns, group_columns = [], []
+        source = f"({union_sql}) u"
+        if self.group_by == 'id_lokasi':
+            select_columns.append('u.id_lokasi AS id_lokasi')
+            group_columns.append('u.id_lokasi')
+        elif self.group_by == 'site':
+            site = self.column(Locations, 'site', 'l')
+            source += f" INNER JOIN {self.table(Locations)} l ON {self.column(Locations, 'id', 'l')} = u.id_lokasi"
+            select_columns.append(f'{site} AS site')
+            group_columns.append(site)
+        if self.bucket is not None:
+            select_columns.append('u.periode AS periode')
+            group_columns.append('u.periode')
+
+        total_sql = 'SUM(u.cash) + SUM(u.prepaid) + SUM(u.member) + SUM(u.manual) - SUM(u.masalah)'
+        for component in COMPONENTS:
+            sum_sql = f'SUM(u.{component})'
+            if cents and component in MONEY_COMPONENTS:
+                sum_sql = self.cents_sql(sum_sql)
+            select_columns.append(f'{sum_sql} AS {component}')
+        select_columns.append(f'{self.cents_sql(total_sql) if cents else total_sql} AS total_pendapatan')
+
+        sql = f"SELECT {', '.join(select_columns)} FROM {source}"
+        if group_columns:
+            sql += f" GROUP BY {', '.join(group_columns)}"
+        if self.parkir_only:
+            sql += " HAVING SUM(u.jumlah_parkir) > 0"
+        if group_columns:
+            sql += f" ORDER BY {', '.join(group_columns)}"
+        return sql, params
+
+    def rows(self, cents=False):
+        """
+        Jalankan query dan kembalikan list of dict berisi id_lokasi / site (sesuai group_by),
+        periode (date, jika ada bucket), semua komponen, dan total_pendapatan
+        (cash + prepaid + member + manual - masalah, dihitung di database).
+        Komponen uang berupa Decimal 2 digit, atau int sen jika cents=True.
+        """
+        if self.location_ids is not None and not self.location_ids:
+            return []
+
+        sql, params = self.sql(cents)
+        # Raw SQL tidak melewati router database: pilih alias baca (replica) secara eksplisit
+        with connections[router.db_for_read(IncomeParkir)].cursor() as cursor:
+            cursor.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            raw_rows = cursor.fetchall()
+
+        money = (lambda value: int(value or 0)) if cents else as_decimal
+        rows = []
+        for raw in raw_rows:
+            row = dict(zip(names, raw))
+            if self.bucket is not None:
+                row['periode'] = as_date(row['periode'])
+            for component in MONEY_COMPONENTS + ('total_pendapatan',):
+                row[component] = money(row[component])
+            row['casual'] = int(row['casual'] or 0)
+            row['pass_field'] = int(row['pass_field'] or 0)
+            row['jumlah_parkir'] = int(row['jumlah_parkir'] or 0)
+            rows.append(row)
+        return rows
+
+def revenue_rows(location_ids, start_date=None, end_date=None, bucket='day', group_by='id_lokasi', parkir_only=False,
+                 cents=False):
+    """Shortcut: komponen pendapatan per (lokasi, periode) dalam satu round-trip."""
+    return RevenueQuery(location_ids, start_date, end_date, bucket, group_by, parkir_only).rows(cents)
@@ -0,0 +1,705 @@
+# app_revenue_rollup/tests.py
+
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.db.models import Min, Sum
+from django.test import TestCase
+from django.urls import resolve
+from rest_framework.response import Response
+from app_locations.models import Locations
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from app_post_status.models import PostStatus
+from app_revenue_realtime.models import RevenueRealtime
+from app_traffic_hours.models import TrafficHours
+from app_users.models import Users
+from app_users.utils import invalidate_user_locations
+from app_users_locations.models import UsersLocations
+from dashboard_backend.metrics import registry
+from .management.commands.bench_endpoints import BENCH_ROUTES, bench_routes, clear_caches, send, uncovered_routes
+from .cache import RESPONSE_CACHE_ALIAS, cached_data, cached_response, cache_stats, location_fingerprint, reset_cache_stats
+from . import watermarks
+from .models import RevenueRollup
+from .merge import index_rows, group_rows
+from .partials import (post_status_partials, sum_by_site, sum_vectors, traffic_hours_partials,
+                       trouble_partials, TRAFFIC_WIDTH)
+from .prefix import prefix_index, range_rows
+from .money import from_cents, to_cents, to_rupiah
+from .query import MONEY_COMPONENTS, RevenueQuery, as_decimal, revenue_rows
+from .watermarks import invalidate_watermarks
+from .utils import refresh_rollup, iter_chunks, incremental_range, covered_start
+
+UNMANAGED_MODELS = (Locations, IncomeParkir, IncomeMember, IncomeManual)
+
+class UnmanagedTablesTestCase(TestCase):
+    """
+    Tabel tm_lokasi dan tt_sync_* tidak dikelola Django (managed = False),
+    jadi dibuat manual untuk setiap database test lalu dihapus lagi setelah selesai.
+    """
+    unmanaged_models = UNMANAGED_MODELS
+
+    @classmethod
+    def setUpClass(cls):
+        for alias in sorted(cls.databases):
+            with connections[alias].schema_editor() as editor:
+                for model in cls.unmanaged_models:
+                    editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in sorted(cls.databases):
+            with connections[alias].schema_editor() as editor:
+                for model in reversed(cls.unmanaged_models):
+                    editor.delete_model(model)
+
+def add_parkir(lokasi, tanggal, cash, prepaid=0, casual=1, pass_field=0):
+    return IncomeParkir.objects.create(
+        id_lokasi=lokasi, tanggal=tanggal, shift='1', kendaraan='MOBIL', kategori='C',
+        tgl=tanggal.day, bln=tanggal.month, thn=tanggal.year, tarif=Decimal('5000'),
+        cash=Decimal(cash), prepaid=Decimal(prepaid), casual=casual, pass_field=pass_field,
+    )
+
+def add_member(lokasi, tanggal, member):
+    return IncomeMember.objects.create(
+        id_lokasi=lokasi, tanggal=tanggal, tgl=tanggal.day, bln=tanggal.month, thn=tanggal.year,
+        member=Decimal(member),
+    )
+
+def add_manual(lokasi, tanggal, manual, masalah=0):
+    return IncomeManual.objects.create(
+        id_lokasi=lokasi, tanggal=tanggal, shift='1', tgl=tanggal.day, bln=tanggal.month, thn=tanggal.year,
+        manual=Decimal(manual), masalah=Decimal(masalah),
+    )
+
+def legacy_daily_totals(start_date, end_date, location_ids):
+    """Total per tanggal seperti view lama: tiga query ORM digabung di Python."""
+    def base(model):
+        return model.objects.filter(id_lokasi__in=location_ids, tanggal__range=[start_date, end_date]).values('tanggal')
+
+    totals = {}
+    for row in base(IncomeParkir).annotate(cash=Sum('cash'), prepaid=Sum('prepaid')):
+        totals[row['tanggal']] = totals.get(row['tanggal'], 0) + row['cash'] + row['prepaid']
+    for row in base(IncomeMember).annotate(member=Sum('member')):
+        totals[row['tanggal']] = totals.get(row['tanggal'], 0) + row['member']
+    for row in base(IncomeManual).annotate(manual=Sum('manual'), masalah=Sum('masalah')):
+        totals[row['tanggal']] = totals.get(row['tanggal'], 0) + row['manual'] - row['masalah']
+    return totals
+
+# Tanggal data test jauh sebelum "hari ini", jadi di luar jendela live kecuali diset manual
+DAY_1 = date(2024, 1, 1)
+DAYS = [DAY_1 + timedelta(days=i) for i in range(3)]
+LIVE_FROM = date(2030, 1, 1)
+
+class RevenueQueryTests(UnmanagedTablesTestCase):
+
+    def setUp(self):
+        self.lokasi_1 = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        self.lokasi_2 = Locations.objects.create(pengelola='p', site='Site B', alamat='b')
+        self.ids = [self.lokasi_1.id, self.lokasi_2.id]
+        for tanggal in DAYS:
+            add_parkir(self.lokasi_1, tanggal, 90, casual=2)
+            add_parkir(self.lokasi_2, tanggal, 10, pass_field=1)
+        add_member(self.lokasi_2, DAYS[1], 5)
+        add_manual(self.lokasi_1, DAYS[2], 20, masalah=3)
+
+    def daily_totals(self, **kwargs):
+        kwargs.setdefault('live_from', LIVE_FROM)
+        rows = RevenueQuery(self.ids, DAYS[0], DAYS[-1], bucket='day', group_by=None, **kwargs).rows()
+        return {row['periode']: row['total_pendapatan'] for row in rows}
+
+    def test_raw_query_matches_three_query_result(self):
+        expected = legacy_daily_totals(DAYS[0], DAYS[-1], self.ids)
+        self.assertEqual(self.daily_totals(use_rollup=False), expected)
+        self.assertEqual(self.daily_totals(), expected)
+
+    def test_rollup_matches_raw(self):
+        expected = self.daily_totals(use_rollup=False)
+        refresh_rollup(DAYS[0], DAYS[-1])
+        self.assertEqual(RevenueRollup.objects.count(), 6)
+        self.assertEqual(self.daily_totals(), expected)
+
+    def test_partial_location_refresh_keeps_other_locations(self):
+        expected = self.daily_totals(use_rollup=False)
+        self.assertEqual(list(expected.values()), [Decimal('100.00'), Decimal('105.00'), Decimal('117.00')])
+
+        refresh_rollup(DAYS[0], DAYS[-1], [self.lokasi_1.id])
+        self.assertEqual(self.daily_totals(), expected)
+
+    def test_rows_synced_after_rollup_are_read_inside_live_window(self):
+        refresh_rollup(DAYS[0], DAYS[-1])
+        add_parkir(self.lokasi_1, DAYS[2], 1000)
+
+        # Di luar jendela live, hari yang sudah di-rollup menunggu refresh berikutnya
+        self.assertEqual(self.daily_totals()[DAYS[2]], Decimal('117.00'))
+        # Di dalam jendela live, tabel income dibaca langsung
+        self.assertEqual(self.daily_totals(live_from=DAYS[2])[DAYS[2]], Decimal('1117.00'))
+        self.assertEqual(self.daily_totals(live_from=DAYS[2])[DAYS[1]], Decimal('105.00'))
+
+        refresh_rollup(DAYS[2], DAYS[2])
+        self.assertEqual(self.daily_totals()[DAYS[2]], Decimal('1117.00'))
+
+    def test_days_after_location_watermark_come_from_raw_tables(self):
+        refresh_rollup(DAYS[0], DAYS[1])
+        add_parkir(self.lokasi_2, DAYS[2] + timedelta(days=1), 50)
+
+        rows = RevenueQuery(self.ids, DAYS[0], None, bucket='day', group_by=None, live_from=LIVE_FROM).rows()
+        totals = {row['periode']: row['total_pendapatan'] for row in rows}
+        self.assertEqual(totals[DAYS[2]], Decimal('117.00'))
+        self.assertEqual(totals[DAYS[2] + timedelta(days=1)], Decimal('50.00'))
+
+    def test_month_and_year_buckets(self):
+        add_parkir(self.lokasi_1, date(2024, 2, 10), 7)
+        refresh_rollup(DAYS[0], DAYS[-1])
+
+        months = RevenueQuery(self.ids, None, None, bucket='month', group_by='id_lokasi', live_from=LIVE_FROM).rows()
+        self.assertEqual(
+            [(row['id_lokasi'], row['periode'], row['total_pendapatan']) for row in months],
+            [
+                (self.lokasi_1.id, date(2024, 1, 1), Decimal('287.00')),
+                (self.lokasi_1.id, date(2024, 2, 1), Decimal('7.00')),
+                (self.lokasi_2.id, date(2024, 1, 1), Decimal('35.00')),
+            ],
+        )
+
+        years = RevenueQuery(self.ids, None, None, bucket='year', group_by=None, live_from=LIVE_FROM).rows()
+        self.assertEqual(len(years), 1)
+        self.assertEqual(years[0]['periode'], date(2024, 1, 1))
+        self.assertEqual(years[0]['total_pendapatan'], Decimal('329.00'))
+        self.assertEqual(years[0]['casual'], 10)
+        self.assertEqual(years[0]['pass_field'], 3)
+
+    def test_group_by_site_sums_locations_sharing_a_site_name(self):
+        lokasi_3 = Locations.objects.create(pengelola='p', site='Site B', alamat='c')
+        add_parkir(lokasi_3, DAYS[0], 1)
+
+        rows = RevenueQuery(self.ids + [lokasi_3.id], DAYS[0], DAYS[0], bucket='day', group_by='site', live_from=LIVE_FROM).rows()
+        self.assertEqual([(row['site'], row['total_pendapatan']) for row in rows],
+                         [('Site A', Decimal('90.00')), ('Site B', Decimal('11.00'))])
+
+    def test_parkir_only_skips_periods_without_parkir_rows(self):
+        member_only_day = DAYS[-1] + timedelta(days=1)
+        add_member(self.lokasi_1, member_only_day, 8)
+        refresh_rollup(DAYS[0], member_only_day)
+
+        for parkir_only, expected in ((False, 4), (True, 3)):
+            rows = RevenueQuery(self.ids, DAYS[0], member_only_day, bucket='day', group_by=None,
+                                parkir_only=parkir_only, live_from=LIVE_FROM).rows()
+            self.assertEqual(len(rows), expected)
+
+    def test_cents_rows_match_decimal_rows(self):
+        add_manual(self.lokasi_2, DAYS[0], Decimal('0.55'), masalah=Decimal('12.35'))
+        refresh_rollup(DAYS[0], DAYS[0])
+        for bucket in ('day', None):
+            query = RevenueQuery(self.ids, DAYS[0], DAYS[-1], bucket=bucket, group_by='site', live_from=DAYS[2])
+            expected = [
+                {key: to_cents(value) if key in MONEY_COMPONENTS + ('total_pendapatan',) else value for key, value in row.items()}
+                for row in query.rows()
+            ]
+            rows = query.rows(cents=True)
+            self.assertEqual(rows, expected)
+            self.assertTrue(all(type(row['total_pendapatan']) is int for row in rows))
+
+    def test_empty_location_list_skips_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(RevenueQuery([], DAYS[0], DAYS[-1]).rows(), [])
+
+class RollupBuildTests(UnmanagedTablesTestCase):
+
+    def setUp(self):
+        self.lokasi_1 = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        self.lokasi_2 = Locations.objects.create(pengelola='p', site='Site B', alamat='b')
+        for tanggal in DAYS:
+            add_parkir(self.lokasi_1, tanggal, 90)
+            add_parkir(self.lokasi_1, tanggal, 10)
+        add_member(self.lokasi_2, DAYS[1], 5)
+
+    def test_full_build_matches_source_tables(self):
+        call_command('build_revenue_rollup', '--full', verbosity=0)
+
+        rollup = {(row.id_lokasi_id, row.tanggal): row for row in RevenueRollup.objects.all()}
+        self.assertEqual(len(rollup), 4)
+        self.assertEqual(rollup[(self.lokasi_1.id, DAYS[0])].total_pendapatan, Decimal('100.00'))
+        self.assertEqual(rollup[(self.lokasi_1.id, DAYS[0])].jumlah_parkir, 2)
+        self.assertEqual(rollup[(self.lokasi_2.id, DAYS[1])].member, Decimal('5.00'))
+        self.assertEqual(rollup[(self.lokasi_2.id, DAYS[1])].jumlah_parkir, 0)
+
+    def test_refresh_replaces_rows_in_range(self):
+        refresh_rollup(DAYS[0], DAYS[-1])
+        add_parkir(self.lokasi_1, DAYS[0], 5)
+        refresh_rollup(DAYS[0], DAYS[0])
+
+        self.assertEqual(RevenueRollup.objects.count(), 4)
+        self.assertEqual(RevenueRollup.objects.get(id_lokasi=self.lokasi_1, tanggal=DAYS[0]).cash, Decimal('105.00'))
+
+    def test_iter_chunks_covers_range_without_overlap(self):
+        chunks = list(iter_chunks(date(2024, 1, 1), date(2024, 3, 5), days=31))
+        self.assertEqual(chunks, [
+            (date(2024, 1, 1), date(2024, 1, 31)),
+            (date(2024, 2, 1), date(2024, 3, 2)),
+            (date(2024, 3, 3), date(2024, 3, 5)),
+        ])
+
+    def test_incremental_range(self):
+        self.assertEqual(incremental_range(lookback_days=1), (DAYS[0], DAYS[-1]))
+
+        refresh_rollup(DAYS[0], DAYS[-1])
+        self.assertEqual(incremental_range(lookback_days=1), (DAYS[1], DAYS[-1]))
+
+    def test_incremental_range_includes_location_without_rollup(self):
+        refresh_rollup(DAYS[0], DAYS[-1], [self.lokasi_1.id])
+        # lokasi_2 belum punya rollup, jadi ditarik dari tanggal income pertamanya
+        self.assertEqual(incremental_range(lookback_days=0), (DAYS[1], DAYS[-1]))
+
+    def test_covered_start_does_not_leave_holes(self):
+        refresh_rollup(DAYS[0], DAYS[0])
+        self.assertEqual(covered_start(DAYS[2]), DAYS[1])
+        self.assertEqual(covered_start(DAYS[0]), DAYS[0])
+
+    def test_covered_start_ignores_location_without_new_data(self):
+        refresh_rollup(DAYS[0], DAYS[-1])
+        # lokasi_2 berhenti di DAYS[1]; tidak perlu ikut di-refresh dari sana
+        self.assertEqual(covered_start(DAYS[-1]), DAYS[-1])
+
+class SyntheticDataTests(UnmanagedTablesTestCase):
+    unmanaged_models = UNMANAGED_MODELS + (Users, UsersLocations, RevenueRealtime, TrafficHours, PostStatus)
+    options = ['--locations', '3', '--days', '10', '--end', '2024-01-10', '--shifts', '2', '--users', '2']
+
+    def test_generates_requested_volume(self):
+        call_command('generate_synthetic_data', *self.options, '--rollup', verbosity=0)
+
+        self.assertEqual(Locations.objects.count(), 3)
+        # lokasi x hari x shift x kendaraan (default MOBIL, MOTOR)
+        self.assertEqual(IncomeParkir.objects.count(), 3 * 10 * 2 * 2)
+        self.assertEqual(IncomeParkir.objects.aggregate(first=Min('tanggal'))['first'], date(2024, 1, 1))
+        self.assertEqual(TrafficHours.objects.count(), 3)
+        self.assertEqual(Users.objects.filter(admin=0).count(), 2)
+        self.assertEqual(RevenueRollup.objects.count(), 3 * 10)
+        # Data hasil executemany terbaca normal lewat ORM (tanggal, Decimal)
+        location_ids = list(Locations.objects.values_list('id', flat=True))
+        rollup = RevenueRollup.objects.values('tanggal').annotate(total=Sum('total_pendapatan'))
+        self.assertEqual(legacy_daily_totals(date(2024, 1, 1), date(2024, 1, 10), location_ids),
+                         {row['tanggal']: row['total'] for row in rollup})
+
+    def test_refuses_to_overwrite_real_data(self):
+        call_command('generate_synthetic_data', *self.options, verbosity=0)
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', *self.options, verbosity=0)
+        call_command('generate_synthetic_data', *self.options, '--flush', verbosity=0)
+        self.assertEqual(Locations.objects.count(), 3)
+
+        Locations.objects.create(pengelola='p', site='Lokasi asli', alamat='a')
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', *self.options, '--flush', verbosity=0)
+        self.assertTrue(Locations.objects.filter(site='Lokasi asli').exists())
+
+# Batas atas query per route (cache dingin) yang berlaku untuk 1, 10 maupun 100 lokasi:
+# jumlah query tidak boleh tumbuh mengikuti jumlah lokasi/hari (N+1). Route yang memakai
+# watermark data ikut membayar satu lookup generasi data_synced di cache bersama.
+QUERY_BUDGETS = {
+    '/api/summarycards/': 6,
+    '/api/revenuerealtime/all': 5,
+    '/api/revenuerealtime/bylocations': 5,
+    '/api/revenuebylocations/all': 5,
+    '/api/revenuebylocations/bylocations': 5,
+    '/api/poststatus/all': 2,
+    '/api/poststatus/bylocations': 2,
+    '/api/traffichours/all': 2,
+    '/api/traffichours/bylocations': 2,
+    '/api/revenue/filterbydays/all': 9,
+    '/api/revenue/filterbydays/bylocations': 9,
+    '/api/revenue/filterbymonths/all': 9,
+    '/api/revenue/filterbymonths/bylocations': 9,
+    '/api/revenue/filterbyyears/all': 9,
+    '/api/revenue/filterbyyears/bylocations': 9,
+    '/api/revenuebylocations/filterbydays/': 9,
+    '/api/revenuebylocations/filterbymonths/': 9,
+    '/api/revenuebylocations/filterbyyears/': 9,
+    '/api/revenue/range/all': 8,
+    '/api/revenue/range/bylocations': 8,
+    '/api/revenuedetails/locations/': 4,
+    '/api/revenuedetails/filterbydays/': 4,
+    '/api/revenuedetails/filterbymonths/': 4,
+    '/api/revenuedetails/filterbyyears/': 4,
+    '/api/trouble/filterbydays/': 5,
+    '/api/trouble/filterbymonths/': 5,
+    '/api/trouble/filterbyyears/': 5,
+    '/api/incomeparkir/': 1,
+    '/api/incomemember/': 1,
+    '/api/incomemanual/': 1,
+    '/api/locations/': 1,
+    '/api/dashboard/batch': 19,
+}
+
+# Batas kasar waktu Python (total latency dikurangi waktu query) per request, untuk
+# menangkap loop O(lokasi x hari) yang tidak sengaja kuadratik; sekitar 5x hasil ukur
+PYTHON_TIME_BUDGET = 1.0
+
+class QueryBudgetTests(UnmanagedTablesTestCase):
+    unmanaged_models = UNMANAGED_MODELS + (Users, UsersLocations, RevenueRealtime, TrafficHours, PostStatus)
+    location_counts = (1, 10, 100)
+
+    def test_every_api_route_has_a_budget(self):
+        self.assertEqual(uncovered_routes(), [])
+        self.assertEqual(set(QUERY_BUDGETS), {route.split('?')[0] for route in BENCH_ROUTES} | {'/api/dashboard/batch'})
+
+    def test_queries_and_python_time_within_budget(self):
+        for count in self.location_counts:
+            call_command('generate_synthetic_data', '--flush', '--locations', str(count), '--days', '60',
+                         '--shifts', '1', '--vehicles', 'MOBIL', '--users', '1', '--rollup', verbosity=0)
+            first, last = date.today() - timedelta(days=59), date.today()
+            sessions = {
+                'admin': json.dumps({'id': Users.objects.get(admin=1).id, 'admin': 1}),
+                'user': json.dumps({'id': Users.objects.get(admin=0).id, 'admin': 0}),
+            }
+            for role, session in sessions.items():
+                for method, path in bench_routes(first, last):
+                    route = path.split('?')[0]
+                    with self.subTest(locations=count, role=role, route=route):
+                        clear_caches()
+                        registry.reset()
+                        started = time.perf_counter()
+                        response = send(self.client, method, path, session)
+                        elapsed = time.perf_counter() - started
+
+                        self.assertEqual(response.status_code, 200)
+                        totals = registry.totals(resolve(route).view_name, method)
+                        self.assertLessEqual(totals['dashboard_db_queries'], QUERY_BUDGETS[route])
+                        self.assertLess(elapsed - totals['dashboard_db_duration_seconds'], PYTHON_TIME_BUDGET)
+
+class MergeTests(TestCase):
+
+    def test_index_rows(self):
+        rows = [{'periode': 1, 'site': 'A', 'total': 10}, {'periode': 1, 'site': 'B', 'total': 20}]
+        index = index_rows(rows, ('periode', 'site'))
+        self.assertEqual(index[(1, 'B')]['total'], 20)
+        self.assertNotIn((2, 'A'), index)
+
+    def test_group_rows_keeps_order(self):
+        rows = [{'site': 'A', 'periode': 1}, {'site': 'B', 'periode': 1}, {'site': 'A', 'periode': 2}]
+        self.assertEqual([row['periode'] for row in group_rows(rows, 'site')['A']], [1, 2])
+
+class MoneyTests(TestCase):
+
+    def test_round_trip(self):
+        for value in (Decimal('0.00'), Decimal('90.5'), Decimal('-3.35'), 12, 12.345, '7.10', None):
+            cents = to_cents(value)
+            self.assertIsInstance(cents, int)
+            self.assertEqual(from_cents(cents), as_decimal(value))
+        self.assertEqual(repr(from_cents(9050)), "Decimal('90.50')")
+
+    def test_to_rupiah_truncates_like_int_decimal(self):
+        for cents in (0, 99, 150, -150, 123456):
+            self.assertEqual(to_rupiah(cents), int(from_cents(cents)))
+
+class ResponseCacheTests(UnmanagedTablesTestCase):
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        reset_cache_stats()
+        self.lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        add_parkir(self.lokasi, DAYS[0], 10)
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return Response({'builds': self.builds}, status=200)
+
+    def test_hit_until_new_rows_are_synced(self):
+        self.assertEqual(cached_response('trend', [self.lokasi.id], self.build).data, {'builds': 1})
+        self.assertEqual(cached_response('trend', [self.lokasi.id], self.build).data, {'builds': 1})
+
+        add_member(self.lokasi, DAYS[1], 5)
+        self.assertEqual(cached_response('trend', [self.lokasi.id], self.build).data, {'builds': 2})
+        self.assertEqual(cache_stats()['endpoints']['trend'], {'hit': 1, 'miss': 2})
+
+    def test_in_place_update_is_rebuilt_after_sync_signal(self):
+        cached_response('trend', [self.lokasi.id], self.build)
+        # Job sync menulis ulang baris lama: MAX(id)/MAX(tanggal) tidak berubah
+        IncomeParkir.objects.filter(id_lokasi=self.lokasi).update(cash=0)
+        self.assertEqual(cached_response('trend', [self.lokasi.id], self.build).data, {'builds': 1})
+
+        watermarks.data_synced.send(sender=IncomeParkir)
+        self.assertEqual(cached_response('trend', [self.lokasi.id], self.build).data, {'builds': 2})
+        value, hit = cached_data('closed-days', lambda: 'baru')
+        self.assertEqual((value, hit), ('baru', False))
+
+    def test_key_includes_location_set(self):
+        cached_response('trend', [self.lokasi.id], self.build)
+        cached_response('trend', [self.lokasi.id, 99], self.build)
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(location_fingerprint([2, 1]), location_fingerprint([1, 2, 2]))
+
+    def test_error_response_is_not_cached(self):
+        cached_response('trend', [self.lokasi.id], lambda: Response({'status': 'error'}, status=500))
+        cached_response('trend', [self.lokasi.id], self.build)
+        self.assertEqual(self.builds, 1)
+
+class WatermarkTests(UnmanagedTablesTestCase):
+
+    def setUp(self):
+        invalidate_watermarks()
+        self.lokasi_1 = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        self.lokasi_2 = Locations.objects.create(pengelola='p', site='Site B', alamat='b')
+        add_parkir(self.lokasi_1, DAYS[0], 10)
+        add_parkir(self.lokasi_2, DAYS[1], 10)
+
+    def test_latest_date_global_and_per_location(self):
+        self.assertEqual(watermarks.latest_date(IncomeParkir), DAYS[1])
+        self.assertEqual(watermarks.latest_date(IncomeParkir, [self.lokasi_1.id]), DAYS[0])
+        self.assertIsNone(watermarks.latest_date(IncomeMember))
+
+    def test_snapshot_is_cached_until_signal(self):
+        watermarks.latest_date(IncomeParkir)
+        # Insert lewat SQL mentah (seperti job sync) tidak memicu post_save
+        IncomeParkir.objects.filter(id_lokasi=self.lokasi_1).update(tanggal=DAYS[2])
+        with self.assertNumQueries(0):
+            self.assertEqual(watermarks.latest_date(IncomeParkir), DAYS[1])
+
+        watermarks.data_synced.send(sender=IncomeParkir)
+        self.assertEqual(watermarks.latest_date(IncomeParkir), DAYS[2])
+
+    def test_signal_from_other_process_reaches_snapshot(self):
+        watermarks.latest_date(IncomeParkir)
+        IncomeParkir.objects.filter(id_lokasi=self.lokasi_1).update(tanggal=DAYS[2])
+        # Proses lain (job sync, refresh_watermarks) hanya bisa menulis ke cache bersama
+        caches[watermarks.GENERATION_CACHE_ALIAS].set(watermarks.GENERATION_KEY, 'proses-lain', None)
+        # Sama seperti DATA_GENERATION_CHECK_INTERVAL yang sudah lewat
+        watermarks.forget_generation()
+        self.assertEqual(watermarks.data_generation(), 'proses-lain')
+        self.assertEqual(watermarks.latest_date(IncomeParkir), DAYS[2])
+
+    def test_orm_write_invalidates_snapshot(self):
+        watermarks.latest_date(IncomeParkir)
+        add_parkir(self.lokasi_1, DAYS[2], 10)
+        self.assertEqual(watermarks.latest_date(IncomeParkir), DAYS[2])
+
+class PrefixIndexTests(UnmanagedTablesTestCase):
+
+    def setUp(self):
+        prefix_index.invalidate()
+        invalidate_user_locations()
+        self.lokasi_1 = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        self.lokasi_2 = Locations.objects.create(pengelola='p', site='Site B', alamat='b')
+        self.lokasi_3 = Locations.objects.create(pengelola='p', site='Site B', alamat='c')
+        self.ids = [self.lokasi_1.id, self.lokasi_2.id, self.lokasi_3.id]
+        for tanggal in DAYS:
+            add_parkir(self.lokasi_1, tanggal, 90, casual=2)
+            add_parkir(self.lokasi_2, tanggal, 10, pass_field=1)
+        add_parkir(self.lokasi_3, date(2024, 2, 10), 7)
+        add_member(self.lokasi_2, DAYS[1], 5)
+        add_member(self.lokasi_1, date(2024, 3, 5), 8)
+        add_manual(self.lokasi_1, DAYS[2], Decimal('20.55'), masalah=3)
+        refresh_rollup(DAYS[0], DAYS[1])
+
+    def test_matches_revenue_rows(self):
+        for bucket in ('day', 'month', 'year', None):
+            for group_by in (None, 'id_lokasi', 'site'):
+                for parkir_only in (False, True):
+                    for location_ids, start_date, end_date in ((self.ids, DAYS[1], date(2024, 3, 31)),
+                                                               (self.ids[1:], None, None)):
+                        args = (location_ids, start_date, end_date, bucket, group_by, parkir_only)
+                        expected = revenue_rows(*args)
+                        if bucket is None:
+                            expected = [row for row in expected if row['jumlah_parkir'] or not parkir_only]
+                        self.assertEqual(range_rows(*args), expected, args)
+
+    def test_new_rows_extend_index(self):
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+        built_at = prefix_index.built_at
+        add_parkir(self.lokasi_2, date(2024, 3, 6), 40)
+
+        rows = range_rows(self.ids, date(2024, 3, 1), date(2024, 3, 31), bucket=None, group_by=None)
+        self.assertEqual(rows[0]['total_pendapatan'], Decimal('48.00'))
+        self.assertEqual(prefix_index.built_at, built_at)
+
+    def test_extend_when_history_is_shorter_than_live_window(self):
+        IncomeParkir.objects.all().delete()
+        IncomeMember.objects.all().delete()
+        IncomeManual.objects.all().delete()
+        RevenueRollup.objects.all().delete()
+        add_parkir(self.lokasi_1, DAYS[0], 10)
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+
+        add_parkir(self.lokasi_1, DAYS[1], 5)
+        rows = range_rows(self.ids, DAYS[0], DAYS[-1], bucket=None, group_by=None)
+        self.assertEqual(rows[0]['total_pendapatan'], Decimal('15.00'))
+
+    def test_extend_swaps_in_new_snapshot(self):
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+        old = prefix_index.snapshot
+        old_end, old_length = old.end, len(old.cum[self.lokasi_2.id]['cash'])
+        add_parkir(self.lokasi_2, date(2024, 3, 6), 40)
+
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+        self.assertIsNot(prefix_index.snapshot, old)
+        # Pembaca yang masih memegang snapshot lama tidak melihat perubahan setengah jadi
+        self.assertEqual((old.end, len(old.cum[self.lokasi_2.id]['cash'])), (old_end, old_length))
+        self.assertEqual(prefix_index.snapshot.end, date(2024, 3, 6))
+
+    def test_invalidate_forces_full_rebuild(self):
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+        prefix_index.invalidate()
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+        self.assertIsNotNone(prefix_index.built_at)
+
+    def test_warm_index_costs_one_query(self):
+        range_rows(self.ids, DAYS[0], DAYS[-1])
+        with self.assertNumQueries(1):
+            range_rows(self.ids, None, None, bucket='day', group_by='site')
+
+    def test_range_endpoint(self):
+        session = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+        response = self.client.get('/api/revenue/range/all?start_date=2024-01-02&end_date=2024-02-29', **session)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], Decimal('229.55'))
+
+        response = self.client.get('/api/revenue/range/bylocations?start_date=2024-02-01&end_date=2024-02-29', **session)
+        self.assertEqual(response.data['Site B']['total'], Decimal('7.00'))
+        # Lokasi tanpa data: tipe tetap sama (Decimal 2 digit, bukan int 0)
+        self.assertEqual(response.data['Site A']['total'], Decimal('0.00'))
+        body = json.loads(response.content)
+        self.assertIs(type(body['Site A']['total']), type(body['Site B']['total']))
+
+        response = self.client.get('/api/revenue/range/all?start_date=2024-01-02', **session)
+        self.assertEqual(response.status_code, 400)
+
+class LocationPartialsTests(UnmanagedTablesTestCase):
+    unmanaged_models = UNMANAGED_MODELS + (TrafficHours, PostStatus)
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        self.lokasi_1 = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        self.lokasi_2 = Locations.objects.create(pengelola='p', site='Site B', alamat='b')
+        self.lokasi_3 = Locations.objects.create(pengelola='p', site='Site B', alamat='c')
+        self.ids = [self.lokasi_1.id, self.lokasi_2.id, self.lokasi_3.id]
+        for offset, lokasi in enumerate((self.lokasi_1, self.lokasi_2, self.lokasi_3), start=1):
+            TrafficHours.objects.create(id_lokasi=lokasi, **{f'jam_{i}': i * offset for i in range(24)},
+                                        **{f'tarif_{i}': 1000 * offset for i in range(24)})
+            PostStatus.objects.create(id_lokasi=lokasi, pos='P1', aktif=True, trafic=10 * offset)
+            PostStatus.objects.create(id_lokasi=lokasi, pos='P2', aktif=False, trafic=offset)
+        add_manual(self.lokasi_1, DAYS[0], 5, masalah=3)
+        add_manual(self.lokasi_2, DAYS[0], 5, masalah='1.50')
+        add_manual(self.lokasi_3, DAYS[1], 5, masalah=0)
+        add_manual(self.lokasi_3, date(2024, 2, 1), 5, masalah=2)
+
+    def test_subset_matches_direct_aggregate(self):
+        partials = traffic_hours_partials(self.ids)
+        for location_ids in (self.ids, self.ids[1:], [self.lokasi_3.id, 99]):
+            expected = TrafficHours.objects.filter(id_lokasi__in=location_ids).aggregate(
+                **{f'jam_{i}': Sum(f'jam_{i}') for i in range(24)}, **{f'tarif_{i}': Sum(f'tarif_{i}') for i in range(24)})
+            fields = [f'jam_{i}' for i in range(24)] + [f'tarif_{i}' for i in range(24)]
+            self.assertEqual(sum_vectors(partials, location_ids, TRAFFIC_WIDTH), [expected[field] for field in fields])
+
+        totals = post_status_partials(self.ids)['totals']
+        self.assertEqual(sum_vectors(totals, self.ids[1:], 4), [50, 5, 2, 2])
+        self.assertEqual(sum_vectors(totals, [99], 4), [0, 0, 0, 0])
+
+    def test_trouble_partials_keep_decimal_form(self):
+        partials = trouble_partials(None, DAYS[0], DAYS[2])
+        self.assertEqual(sum_by_site(partials, self.ids[1:]), {DAYS[0]: Decimal('1.50'), DAYS[1]: Decimal('0.00')})
+        months = trouble_partials('month', DAYS[0], date(2024, 2, 29), exclude_zero=True)
+        self.assertEqual(sum_by_site(months, self.ids), {date(2024, 1, 1): Decimal('4.50'), date(2024, 2, 1): Decimal('2.00')})
+
+    def test_snapshot_partials_read_live_rows(self):
+        self.assertEqual(sum_vectors(post_status_partials(self.ids)['totals'], [self.lokasi_1.id], 4), [10, 1, 1, 1])
+        # Update di tempat di luar ORM (seperti job sync), tanpa sinyal apapun
+        PostStatus.objects.filter(id_lokasi=self.lokasi_1, pos='P2').update(aktif=True)
+        TrafficHours.objects.filter(id_lokasi=self.lokasi_1).update(jam_3=100)
+        self.assertEqual(sum_vectors(post_status_partials(self.ids)['totals'], [self.lokasi_1.id], 4), [11, 0, 2, 0])
+        self.assertEqual(traffic_hours_partials([self.lokasi_1.id])[self.lokasi_1.id][3], 100)
+        self.assertNotIn(self.lokasi_2.id, traffic_hours_partials([self.lokasi_1.id]))
+
+    def test_endpoints_sum_partials_per_site(self):
+        session = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+        response = self.client.get('/api/traffichours/bylocations', **session)
+        self.assertEqual(response.data['Site B']['transaksi']['jam_2'], 10)
+        self.assertEqual(response.data['Site B']['pendapatan']['jam_0'], 5000)
+
+        response = self.client.get('/api/poststatus/bylocations', **session)
+        self.assertEqual([pos['total_transaksi'] for pos in response.data['Site B']], [20, 2, 30, 3])
+
+        response = self.client.get('/api/trouble/filterbydays/', **session)
+        self.assertEqual(response.data['2024-02-01'], [
+            {'nama_lokasi': 'Site A', 'total_masalah': Decimal('0')},
+            {'nama_lokasi': 'Site B', 'total_masalah': Decimal('2.00')},
+            {'nama_lokasi': 'Site B', 'total_masalah': Decimal('2.00')},
+        ])
+
+class ConditionalGetTests(UnmanagedTablesTestCase):
+    session = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+    url = '/api/revenue/range/all?start_date=2024-01-01&end_date=2024-01-03'
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        prefix_index.invalidate()
+        self.lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        add_parkir(self.lokasi, DAYS[0], 10)
+
+    def test_matching_etag_short_circuits_before_aggregation(self):
+        response = self.client.get(self.url, **self.session)
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        # Hanya probe watermark, tanpa query agregasi
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.session)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        add_parkir(self.lokasi, DAYS[1], 5)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.session)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip_response_keeps_conditional_get(self):
+        url = '/api/revenue/filterbydays/bylocations'
+        for tanggal in DAYS[1:]:
+            add_parkir(self.lokasi, tanggal, 10)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', **self.session)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'], **self.session)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_params_and_sync_signal(self):
+        etag = self.client.get(self.url, **self.session)['ETag']
+        other = self.client.get('/api/revenue/range/all?start_date=2024-01-01&end_date=2024-01-02', **self.session)
+        self.assertNotEqual(other['ETag'], etag)
+
+        watermarks.data_synced.send(sender=IncomeParkir)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.session)
+        self.assertEqual(response.status_code, 200)
+
+    def test_sync_signal_changes_etag_and_cached_body_together(self):
+        url = '/api/revenue/filterbydays/bylocations'
+        for tanggal in DAYS[1:]:
+            add_parkir(self.lokasi, tanggal, 10)
+        first = self.client.get(url, **self.session)
+        # Job sync menulis ulang baris lama: MAX(id)/MAX(tanggal) tidak berubah
+        IncomeParkir.objects.filter(id_lokasi=self.lokasi).update(cash=Decimal(20))
+        stale = self.client.get(url, **self.session)
+        self.assertEqual((stale['ETag'], stale.content), (first['ETag'], first.content))
+
+        watermarks.data_synced.send(sender=IncomeParkir)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'], **self.session)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertNotEqual(response.content, first.content)
+
+    def test_error_response_has_no_etag(self):
+        response = self.client.get('/api/revenue/range/all?start_date=x', **self.session)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,13 @@
+# app_revenue_rollup/urls.py
+
+from django.urls import path
+from .views import ResponseCacheStatsView, RevenueRangeView
+
+urlpatterns = [
+    # Statistik hit/miss cache response tren historis
+    path('revenue/cache/stats', ResponseCacheStatsView.as_view(), name='revenue_cache_stats'),
+
+    # Total pendapatan untuk rentang tanggal bebas (prefix index)
+    path('revenue/range/all', RevenueRangeView.as_view(), name='revenue_range'),
+    path('revenue/range/bylocations', RevenueRangeView.as_view(), name='revenue_range_by_locations'),
+]
@@ -0,0 +1,130 @@
+# app_revenue_rollup/utils.py
+
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Min, Max
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from .models import RevenueRollup
+from .query import RevenueQuery
+
+BATCH_SIZE = 1000
+
+def source_date_range():
+    """
+    Ambil tanggal paling awal dan paling akhir dari ketiga tabel income.
+    Mengembalikan (None, None) jika semua tabel masih kosong.
+    """
+    bounds = [
+        model.objects.aggregate(first=Min('tanggal'), last=Max('tanggal'))
+        for model in (IncomeParkir, IncomeMember, IncomeManual)
+    ]
+    firsts = [b['first'] for b in bounds if b['first']]
+    lasts = [b['last'] for b in bounds if b['last']]
+    if not firsts:
+        return None, None
+    return min(firsts), max(lasts)
+
+def aggregate_daily_income(start_date, end_date, location_ids=None):
+    """
+    Hitung komponen pendapatan per (id_lokasi, tanggal) langsung dari tabel income,
+    dalam satu statement UNION ALL (tanpa membaca tabel rollup).
+    """
+    return RevenueQuery(location_ids, start_date, end_date, bucket='day', group_by='id_lokasi', use_rollup=False).rows()
+
+def refresh_rollup(start_date, end_date, location_ids=None):
+    """
+    Bangun ulang baris rollup untuk tanggal di antara start_date dan end_date (inklusif).
+    Baris lama pada rentang tersebut dihapus lalu diganti dalam satu transaksi.
+    Mengembalikan jumlah baris yang ditulis.
+    """
+    objects = [
+        RevenueRollup(
+            id_lokasi_id=row['id_lokasi'],
+            tanggal=row['periode'],
+            cash=row['cash'],
+            prepaid=row['prepaid'],
+            casual=row['casual'],
+            pass_field=row['pass_field'],
+            member=row['member'],
+            manual=row['manual'],
+            masalah=row['masalah'],
+            total_pendapatan=row['total_pendapatan'],
+            jumlah_parkir=row['jumlah_parkir'],
+        )
+        for row in aggregate_daily_income(start_date, end_date, location_ids)
+    ]
+
+    with transaction.atomic():
+        stale = RevenueRollup.objects.filter(tanggal__range=[start_date, end_date])
+        if location_ids is not None:
+            stale = stale.filter(id_lokasi__in=location_ids)
+        stale.delete()
+        RevenueRollup.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+    return len(objects)
+
+def iter_chunks(start_date, end_date, days=31):
+    """
+    Pecah rentang tanggal menjadi potongan kecil supaya build penuh tidak memuat
+    seluruh histori ke memori sekaligus.
+    """
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=days - 1), end_date)
+        yield chunk_start, chunk_end
+        chunk_start = chunk_end + timedelta(days=1)
+
+def source_bounds_by_location(location_ids=None):
+    """Tanggal income pertama dan terakhir per lokasi: {id_lokasi: (first, last)}."""
+    bounds = {}
+    for model in (IncomeParkir, IncomeMember, IncomeManual):
+        queryset = model.objects.all()
+        if location_ids is not None:
+            queryset = queryset.filter(id_lokasi__in=location_ids)
+        for id_lokasi, first, last in queryset.values_list('id_lokasi').annotate(Min('tanggal'), Max('tanggal')).order_by():
+            current = bounds.get(id_lokasi)
+            bounds[id_lokasi] = (min(current[0], first), max(current[1], last)) if current else (first, last)
+    return bounds
+
+def rollup_watermarks(location_ids=None):
+    """Tanggal rollup terakhir per lokasi: {id_lokasi: tanggal}."""
+    queryset = RevenueRollup.objects.all()
+    if location_ids is not None:
+        queryset = queryset.filter(id_lokasi__in=location_ids)
+    return dict(queryset.values_list('id_lokasi').annotate(last=Max('tanggal')).order_by())
+
+def covered_start(start_date, location_ids=None):
+    """
+    Mundurkan start_date jika refresh mulai dari tanggal itu akan meninggalkan lubang
+    di rollup sebuah lokasi. query.RevenueQuery menganggap semua hari sampai tanggal
+    rollup terakhir sebuah lokasi sudah ada di rollup, jadi lokasi yang punya data
+    income setelah rollup terakhirnya harus di-refresh mulai hari berikutnya.
+    """
+    watermarks = rollup_watermarks(location_ids)
+    for id_lokasi, (first, last) in source_bounds_by_location(location_ids).items():
+        watermark = watermarks.get(id_lokasi)
+        if watermark is None:
+            start_date = min(start_date, first)
+        elif last > watermark:
+            start_date = min(start_date, watermark + timedelta(days=1))
+    return start_date
+
+def incremental_range(lookback_days=3, location_ids=None):
+    """
+    Tentukan rentang yang perlu di-refresh: mulai dari tanggal rollup terakhir
+    dikurangi lookback_days (untuk data sync yang datang terlambat) sampai tanggal
+    terbaru di tabel income. Lokasi yang rollup-nya tertinggal atau belum ada
+    ikut ditarik lewat covered_start.
+    """
+    first_source, last_source = source_date_range()
+    if last_source is None:
+        return None, None
+
+    watermarks = rollup_watermarks(location_ids)
+    if not watermarks:
+        return first_source, last_source
+
+    start_date = max(first_source, min(max(watermarks.values()), last_source) - timedelta(days=lookback_days))
+    return covered_start(start_date, location_ids), last_source
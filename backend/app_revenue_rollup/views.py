@@ -0,0 +1,67 @@
+# app_revenue_rollup/views.py
+
+from datetime import date
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+from .cache import cache_stats
+from .conditional import conditional_get
+from .money import from_cents
+from .prefix import range_rows
+
+class ResponseCacheStatsView(APIView):
+    """Counter hit/miss cache response tren historis untuk proses ini."""
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats(), status=200)
+
+def range_totals(row, start_date, end_date):
+    # Rentang tanpa data tetap Decimal 2 digit, sama seperti baris yang ada
+    zero = from_cents(0)
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'cash': row['cash'] if row else zero,
+        'prepaid': row['prepaid'] if row else zero,
+        'member': row['member'] if row else zero,
+        'manual': row['manual'] if row else zero,
+        'masalah': row['masalah'] if row else zero,
+        'total': row['total_pendapatan'] if row else zero,
+    }
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RevenueRangeView(APIView):
+    """
+    Total pendapatan lokasi user untuk rentang tanggal bebas (?start_date=&end_date=, inklusif),
+    dijawab dari prefix index tanpa agregasi ulang berapapun panjang rentangnya.
+    """
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
+
+    @conditional_get()
+    def get(self, request, *args, **kwargs):
+        try:
+            start_date = date.fromisoformat(request.query_params.get('start_date', ''))
+            end_date = date.fromisoformat(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response({"status": "error", "message": "start_date dan end_date wajib diisi dengan format YYYY-MM-DD."}, status=400)
+        if start_date > end_date:
+            return Response({"status": "error", "message": "start_date tidak boleh setelah end_date."}, status=400)
+
+        try:
+            # Session data & lokasi user sudah divalidasi oleh SessionDataAuthentication
+            locations = request.user.locations
+
+            if request.path.endswith('bylocations'):
+                rows = range_rows(locations.ids, start_date, end_date, bucket=None, group_by='site')
+                by_site = {row['site']: row for row in rows}
+                data = {location.site: range_totals(by_site.get(location.site), start_date, end_date) for location in locations}
+            else:
+                rows = range_rows(locations.ids, start_date, end_date, bucket=None, group_by=None)
+                data = range_totals(rows[0] if rows else None, start_date, end_date)
+            return Response(data, status=200)
+
+        except Exception as e:
+            return Response({"status": "error", "message": f"Terjadi kesalahan: {str(e)}"}, status=500)
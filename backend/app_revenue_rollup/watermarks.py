@@ -0,0 +1,142 @@
+# app_revenue_rollup/watermarks.py
+
+"""
+Service watermark data: tanggal/waktu terakhir per tabel dan per lokasi.
+
+Sebelumnya tiap request menjalankan `order_by('-tanggal').first()` atau
+`aggregate(Max('waktu'))` sendiri. Di sini snapshot {id_lokasi: nilai terakhir}
+per tabel dihitung dengan satu query GROUP BY lalu disimpan di cache selama
+DATA_WATERMARK_TTL detik. Snapshot dibuang lebih awal saat ada sinyal ingestion
+(data_synced), saat model di-save/delete lewat ORM, atau lewat command
+refresh_watermarks. Snapshot dari replica baca disimpan terpisah per alias database.
+
+Sinyal data_synced juga menaikkan generasi data (data_generation). Generasi ikut token
+data_watermark(), jadi data lama yang ditulis ulang di tempat (MAX(id)/MAX(tanggal)
+tidak berubah) tetap membatalkan cache response, partial, prefix index dan ETag.
+Generasi disimpan di cache bersama (DATA_GENERATION_CACHE_ALIAS, lihat CACHES di
+settings.py) sehingga sinyal dari proses lain (job sync, command refresh_watermarks)
+sampai ke semua worker web paling lambat DATA_GENERATION_CHECK_INTERVAL detik kemudian.
+Snapshot watermark lokal proses ikut dibuang begitu generasinya berubah.
+"""
+
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, router
+from django.db.models import Max
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from app_income_parkir.models import IncomeParkir
+from app_income_member.models import IncomeMember
+from app_income_manual.models import IncomeManual
+from app_revenue_realtime.models import RevenueRealtime
+from dashboard_backend.db_router import replica_aliases
+
+# Umur snapshot watermark (detik) dan alias cache Django yang dipakai
+WATERMARK_TTL = getattr(settings, 'DATA_WATERMARK_TTL', 30)
+WATERMARK_CACHE_ALIAS = getattr(settings, 'DATA_WATERMARK_CACHE_ALIAS', 'default')
+# Cache yang dibagi semua proses untuk generasi data, dan seberapa sering (detik) tiap
+# proses membacanya ulang
+GENERATION_CACHE_ALIAS = getattr(settings, 'DATA_GENERATION_CACHE_ALIAS', 'default')
+GENERATION_CHECK_INTERVAL = getattr(settings, 'DATA_GENERATION_CHECK_INTERVAL', 1)
+
+# Tabel yang dilacak beserta kolom watermark-nya
+TRACKED_FIELDS = {
+    IncomeParkir: 'tanggal',
+    IncomeMember: 'tanggal',
+    IncomeManual: 'tanggal',
+    RevenueRealtime: 'waktu',
+}
+
+# Dikirim oleh proses sync/ingestion setelah menulis ke tabel tt_sync_*,
+# mis. data_synced.send(sender=IncomeParkir). Tanpa sender semua snapshot dibuang.
+data_synced = Signal()
+
+GENERATION_KEY = "data-watermark:generation"
+
+_generation = (None, 0.0)   # (generasi, dibaca pada monotonic)
+_generation_lock = threading.Lock()
+
+def data_generation():
+    """Penanda sinyal data_synced terakhir (0 jika belum pernah ada), dari cache bersama."""
+    global _generation
+    now = time.monotonic()
+    with _generation_lock:
+        value, checked = _generation
+    if value is None or now - checked >= GENERATION_CHECK_INTERVAL:
+        value = caches[GENERATION_CACHE_ALIAS].get(GENERATION_KEY, 0)
+        with _generation_lock:
+            _generation = (value, now)
+    return value
+
+def bump_generation():
+    global _generation
+    value = time.time_ns()
+    caches[GENERATION_CACHE_ALIAS].set(GENERATION_KEY, value, None)
+    with _generation_lock:
+        _generation = (value, time.monotonic())
+
+def forget_generation():
+    """Paksa pembacaan ulang generasi dari cache bersama pada pemanggilan berikutnya."""
+    global _generation
+    with _generation_lock:
+        _generation = (None, 0.0)
+
+def cache_key(model, alias=DEFAULT_DB_ALIAS):
+    key = f"data-watermark:{model._meta.db_table}"
+    return key if alias == DEFAULT_DB_ALIAS else f"{key}@{alias}"
+
+def location_watermarks(model):
+    """Snapshot {id_lokasi: tanggal/waktu terakhir} untuk satu tabel."""
+    cache = caches[WATERMARK_CACHE_ALIAS]
+    alias = router.db_for_read(model)
+    generation = data_generation()
+    entry = cache.get(cache_key(model, alias))
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    field = TRACKED_FIELDS[model]
+    rows = model.objects.using(alias).order_by().values_list('id_lokasi').annotate(latest=Max(field))
+    snapshot = {id_lokasi: latest for id_lokasi, latest in rows}
+    cache.set(cache_key(model, alias), (generation, snapshot), WATERMARK_TTL)
+    return snapshot
+
+def latest_value(model, location_ids=None):
+    """
+    Nilai watermark terbesar untuk location_ids (None berarti semua lokasi).
+    Mengembalikan None jika tabel/lokasi tersebut belum punya data.
+    """
+    snapshot = location_watermarks(model)
+    if location_ids is None:
+        values = snapshot.values()
+    else:
+        values = [snapshot[location_id] for location_id in location_ids if location_id in snapshot]
+    return max(values, default=None)
+
+def latest_date(model, location_ids=None):
+    """Tanggal terakhir di tabel income (pengganti order_by('-tanggal').first().tanggal)."""
+    return latest_value(model, location_ids)
+
+def latest_waktu(location_ids=None):
+    """Waktu terakhir di tt_sync_realtime (pengganti aggregate(Max('waktu')))."""
+    return latest_value(RevenueRealtime, location_ids)
+
+def invalidate_watermarks(model=None):
+    """Buang snapshot satu tabel, atau semua tabel jika model None."""
+    cache = caches[WATERMARK_CACHE_ALIAS]
+    models = TRACKED_FIELDS if model is None else [model]
+    cache.delete_many([cache_key(tracked, alias) for tracked in models if tracked in TRACKED_FIELDS
+                       for alias in (DEFAULT_DB_ALIAS, *replica_aliases())])
+
+@receiver(data_synced)
+def on_data_synced(sender=None, **kwargs):
+    bump_generation()
+    invalidate_watermarks(sender if sender in TRACKED_FIELDS else None)
+
+def on_model_changed(sender, **kwargs):
+    invalidate_watermarks(sender)
+
+for tracked_model in TRACKED_FIELDS:
+    post_save.connect(on_model_changed, sender=tracked_model, dispatch_uid=f"watermark-save-{tracked_model._meta.db_table}")
+    post_delete.connect(on_model_changed, sender=tracked_model, dispatch_uid=f"watermark-delete-{tracked_model._meta.db_table}")
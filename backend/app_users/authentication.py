@@ -0,0 +1,78 @@
+# app_users/authentication.py
+
+import json
+from rest_framework import status
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import BasePermission
+from app_users.utils import get_session_data_from_body, fetch_user_locations, is_admin_user
+
+class SessionDataError(APIException):
+    """
+    Error session_data dengan bentuk response yang sama seperti sebelumnya:
+    {"status": "error", "message": ...} dengan status 400.
+    """
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Session data tidak valid."
+    default_code = 'invalid_session_data'
+
+    def __init__(self, message=None):
+        super().__init__({"status": "error", "message": message or self.default_detail})
+
+class SessionUser:
+    """
+    User dashboard hasil validasi session_data, dipasang DRF sebagai request.user.
+    - session_data : dict session dari frontend (juga tersedia sebagai request.auth)
+    - is_admin     : True jika admin
+    - locations    : UserLocations hasil fetch_user_locations (immutable, ter-cache)
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, session_data, is_admin, locations):
+        self.session_data = session_data
+        self.id = session_data.get('id')
+        self.is_admin = is_admin
+        self.locations = locations
+
+    def __str__(self):
+        return f"SessionUser({self.id}, admin={self.is_admin})"
+
+class SessionDataAuthentication(BaseAuthentication):
+    """
+    Baca session_data sekali per request: dari body JSON, lalu fallback ke query param
+    `session_data` / header `X-Session-Data`. Setelah itu validasi admin dan resolve lokasi.
+    Error apapun dikembalikan sebagai SessionDataError (400).
+    """
+
+    def authenticate(self, request):
+        session_data = get_session_data_from_body(request._request)
+        if isinstance(session_data, dict) and 'error' in session_data:
+            session_data_str = request.query_params.get('session_data') or request.headers.get('X-Session-Data')
+            if not session_data_str:
+                raise SessionDataError(session_data['error'])
+            try:
+                session_data = json.loads(session_data_str)
+            except json.JSONDecodeError:
+                raise SessionDataError("Invalid session data format")
+
+        if not isinstance(session_data, dict):
+            raise SessionDataError("Invalid session data format")
+
+        is_admin = is_admin_user(session_data)
+        if isinstance(is_admin, dict) and 'error' in is_admin:
+            raise SessionDataError(is_admin['error'])
+
+        locations = fetch_user_locations(session_data)
+        if isinstance(locations, dict) and 'error' in locations:
+            raise SessionDataError(locations['error'])
+
+        return SessionUser(session_data, is_admin, locations), session_data
+
+class HasSessionLocations(BasePermission):
+    """Hanya izinkan request yang sudah lolos SessionDataAuthentication."""
+
+    def has_permission(self, request, view):
+        if not isinstance(request.user, SessionUser):
+            raise SessionDataError("Session data tidak ditemukan di request body.")
+        return True
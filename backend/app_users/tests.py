@@ -1,3 +1,107 @@
+# app_users/tests.py
+
+import json
+from django.db import connection
 from django.test import TestCase
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from app_locations.models import Locations
+from app_users_locations.models import UsersLocations
+from .authentication import SessionDataAuthentication, HasSessionLocations
+from .models import Users
+from .utils import fetch_user_locations, invalidate_user_locations
+
+UNMANAGED_MODELS = (Users, Locations, UsersLocations)
+
+class UserLocationsTestCase(TestCase):
+    """tm_user, tm_lokasi dan tm_lokasi_user tidak dikelola Django, jadi dibuat manual untuk database test."""
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            for model in UNMANAGED_MODELS:
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for model in reversed(UNMANAGED_MODELS):
+                editor.delete_model(model)
+
+    def setUp(self):
+        invalidate_user_locations()
+        self.user = Users.objects.create(id_user='operator', nama_user='Operator', password='x', admin=0)
+        self.lokasi_a = Locations.objects.create(pengelola='P', site='Site A', alamat='-')
+        self.lokasi_b = Locations.objects.create(pengelola='P', site='Site B', alamat='-')
+        UsersLocations.objects.create(id_user=self.user, id_lokasi=self.lokasi_a)
+        self.session_data = {'id': self.user.id, 'admin': 0}
+
+class FetchUserLocationsTests(UserLocationsTestCase):
+    """Cache resolver lokasi user: hasil immutable, TTL, dan invalidasi eksplisit."""
+
+    def test_returns_immutable_ids_and_site_map(self):
+        locations = fetch_user_locations(self.session_data)
+        self.assertEqual(locations.ids, (self.lokasi_a.id,))
+        self.assertEqual(dict(locations.sites), {self.lokasi_a.id: 'Site A'})
+        self.assertEqual([location.site for location in locations], ['Site A'])
+        with self.assertRaises(TypeError):
+            locations.sites[self.lokasi_b.id] = 'Site B'
+
+    def test_cached_until_invalidated(self):
+        fetch_user_locations(self.session_data)
+        UsersLocations.objects.create(id_user=self.user, id_lokasi=self.lokasi_b)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(fetch_user_locations(self.session_data).ids, (self.lokasi_a.id,))
+
+        invalidate_user_locations(self.user.id)
+        self.assertEqual(fetch_user_locations(self.session_data).ids, (self.lokasi_a.id, self.lokasi_b.id))
+
+    def test_admin_gets_all_locations(self):
+        locations = fetch_user_locations({'id': self.user.id, 'admin': 1})
+        self.assertEqual(locations.ids, (self.lokasi_a.id, self.lokasi_b.id))
+
+    def test_user_without_locations_returns_error(self):
+        other = Users.objects.create(id_user='kosong', nama_user='Kosong', password='x', admin=0)
+        result = fetch_user_locations({'id': other.id, 'admin': 0})
+        self.assertIn('error', result)
+
+class SessionDataAuthenticationTests(UserLocationsTestCase):
+    """Session data diparse sekali oleh authentication class, error tetap 400 {"status", "message"}."""
+
+    def setUp(self):
+        super().setUp()
+        self.factory = APIRequestFactory()
+
+    def call(self, **extra):
+        return SessionProbeView.as_view()(self.factory.get('/probe', **extra))
+
+    def test_header_session_attaches_user_and_locations(self):
+        response = self.call(HTTP_X_SESSION_DATA=json.dumps(self.session_data))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': self.user.id, 'is_admin': False, 'ids': [self.lokasi_a.id]})
+
+    def test_missing_session_data(self):
+        response = self.call()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+    def test_invalid_session_data_format(self):
+        response = self.call(HTTP_X_SESSION_DATA='{bukan json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Invalid session data format')
+
+    def test_missing_admin_field(self):
+        response = self.call(HTTP_X_SESSION_DATA=json.dumps({'id': self.user.id}))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("'admin'", response.data['message'])
+
+class SessionProbeView(APIView):
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
 
-# Create your tests here.
+    def get(self, request):
+        return Response({'id': request.user.id, 'is_admin': request.user.is_admin, 'ids': list(request.user.locations.ids)})
@@ -1,11 +1,52 @@
 # app_users/utils.py
 
 import json
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from django.conf import settings
 from app_users.models import Users
 from app_locations.models import Locations
 from app_users_locations.models import UsersLocations
 from django.core.exceptions import ObjectDoesNotExist
 
+# Berapa lama (detik) hasil resolve lokasi per user disimpan di memori proses
+USER_LOCATIONS_CACHE_TTL = getattr(settings, 'USER_LOCATIONS_CACHE_TTL', 300)
+
+LocationRef = namedtuple('LocationRef', ['id', 'site'])
+
+class UserLocations(tuple):
+    """
+    Hasil resolve lokasi user: tuple immutable berisi LocationRef(id, site), urut id.
+    - `for location in locations` tetap bisa membaca location.id / location.site
+    - `locations.ids` tuple id untuk filter `id_lokasi__in=` (IN list literal, tanpa subquery)
+    - `locations.sites` mapping read-only {id: site}
+    """
+
+    def __new__(cls, refs):
+        instance = super().__new__(cls, refs)
+        instance.ids = tuple(ref.id for ref in instance)
+        instance.sites = MappingProxyType({ref.id: ref.site for ref in instance})
+        return instance
+
+_locations_cache = {}
+_locations_cache_lock = threading.Lock()
+
+def _locations_cache_key(is_admin, user_id):
+    return 'admin' if is_admin else f'user:{user_id}'
+
+def invalidate_user_locations(user_id=None):
+    """
+    Hapus cache lokasi. Tanpa user_id seluruh cache dibuang (mis. setelah data
+    tm_lokasi berubah); dengan user_id hanya cache user tersebut.
+    """
+    with _locations_cache_lock:
+        if user_id is None:
+            _locations_cache.clear()
+        else:
+            _locations_cache.pop(_locations_cache_key(False, user_id), None)
+
 def get_session_data_from_body(request):
     """
     Ambil session data dari request body.
@@ -37,11 +78,24 @@ def is_admin_user(session_data):
     except Exception as e:
         return {"error": f"Terjadi kesalahan: {str(e)}"}
 
+def _resolve_locations(is_admin, user_id):
+    """Satu query ke tm_lokasi (join tm_lokasi_user untuk user biasa)."""
+    if is_admin:
+        queryset = Locations.objects.all()  # Semua lokasi di table tm_lokasi
+    else:
+        # Lokasi yang diassign ke user lewat tm_lokasi_user
+        queryset = Locations.objects.filter(
+            id__in=UsersLocations.objects.filter(id_user=user_id).values('id_lokasi')
+        )
+    return UserLocations(LocationRef(*row) for row in queryset.order_by('id').values_list('id', 'site'))
+
 def fetch_user_locations(session_data):
     """
     Function untuk nge-fetch lokasi berdasarkan status user (admin atau user biasa).
     Jika user admin, return semua lokasi.
     Jika user biasa, return lokasi yang diassign ke user tersebut.
+    Hasilnya UserLocations (immutable) dan di-cache per user selama USER_LOCATIONS_CACHE_TTL;
+    cache dibuang lewat invalidate_user_locations saat assignment lokasi/user berubah.
     Mengembalikan error message jika tidak berhasil.
     """
     try:
@@ -50,24 +104,27 @@ def fetch_user_locations(session_data):
         if isinstance(is_admin_check, dict):  # Handle kalau is_admin_user return error
             return is_admin_check
 
-        if is_admin_check:
-            locations = Locations.objects.all()  # Semua lokasi di table tm_lokasi
-            if not locations.exists():
-                raise ObjectDoesNotExist("Tidak ada lokasi yang tersedia.")
-        else:
+        user_id = None
+        if not is_admin_check:
             user_id = session_data.get('id')
             if not user_id:
                 raise ValueError("Session data tidak valid: 'id' field tidak ditemukan.")
-            
-            # Ambil id lokasi yang terkait dengan user dari UsersLocations
-            user_locations = UsersLocations.objects.filter(id_user=user_id).values_list('id_lokasi', flat=True)
-            if not user_locations:
-                raise ObjectDoesNotExist(f"Tidak ada lokasi yang diassign untuk user dengan id {user_id}.")
-
-            # Ambil lokasi berdasarkan id yang didapat dari UsersLocations
-            locations = Locations.objects.filter(id__in=user_locations)  # Ini yang benar, `id__in` untuk query Many-to-Many
-            if not locations.exists():
-                raise ObjectDoesNotExist("Tidak ada lokasi yang ditemukan untuk user tersebut.")
+
+        key = _locations_cache_key(is_admin_check, user_id)
+        now = time.monotonic()
+        with _locations_cache_lock:
+            cached = _locations_cache.get(key)
+        if cached is not None and cached[0] > now:
+            locations = cached[1]
+        else:
+            locations = _resolve_locations(is_admin_check, user_id)
+            with _locations_cache_lock:
+                _locations_cache[key] = (now + USER_LOCATIONS_CACHE_TTL, locations)
+
+        if not locations:
+            if is_admin_check:
+                raise ObjectDoesNotExist("Tidak ada lokasi yang tersedia.")
+            raise ObjectDoesNotExist(f"Tidak ada lokasi yang diassign untuk user dengan id {user_id}.")
 
         return locations
 
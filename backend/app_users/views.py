@@ -6,7 +6,7 @@ from django.views.decorators.csrf import csrf_exempt
 from .models import Users
 from app_users_locations.models import UsersLocations
 from app_locations.models import Locations
-from .utils import is_admin_user, fetch_user_locations
+from .utils import is_admin_user, fetch_user_locations, invalidate_user_locations
 
 @csrf_exempt
 def login_view(request):
@@ -87,6 +87,7 @@ def add_user(request):
                 admin=0  # Always set as regular user
             )
             new_user.save()
+            invalidate_user_locations(new_user.id)
             return JsonResponse({'message': 'User berhasil ditambahkan.', 'id': new_user.id}, status=201)
         except KeyError as e:
             return JsonResponse({'error': f'Missing required field: {str(e)}'}, status=400)
@@ -153,6 +154,7 @@ def delete_user(request):
             try:
                 user = Users.objects.get(id=user_id)
                 user.delete()
+                invalidate_user_locations(user_id)
                 return JsonResponse({'message': 'User berhasil dihapus.'}, status=200)
             except Users.DoesNotExist:
                 return JsonResponse({'error': 'User tidak ditemukan.'}, status=404)
@@ -224,9 +226,11 @@ def manage_user_locations(request):
 
         if operation == 'add':
             UsersLocations.objects.get_or_create(id_user=target_user, id_lokasi=location)
+            invalidate_user_locations(target_user.id)
             return JsonResponse({'message': 'Lokasi berhasil ditambahkan ke user'}, status=201)
         elif operation == 'remove':
             UsersLocations.objects.filter(id_user=target_user, id_lokasi=location).delete()
+            invalidate_user_locations(target_user.id)
             return JsonResponse({'message': 'Lokasi berhasil dihapus dari user'}, status=200)
         else:
             return JsonResponse({'error': 'Invalid operation'}, status=400)
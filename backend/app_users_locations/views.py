@@ -1,9 +1,26 @@
 # app_users_locations/views.py
 
 from rest_framework import viewsets
+from app_users.utils import invalidate_user_locations
 from .models import UsersLocations
 from .serializers import UsersLocationsSerializer
 
 class UsersLocationsViewSet(viewsets.ModelViewSet):
     queryset = UsersLocations.objects.all()
     serializer_class = UsersLocationsSerializer
+
+    # Setiap perubahan assignment membuang cache lokasi user yang terdampak
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        invalidate_user_locations(instance.id_user_id)
+
+    def perform_update(self, serializer):
+        previous_user_id = serializer.instance.id_user_id
+        instance = serializer.save()
+        invalidate_user_locations(previous_user_id)
+        invalidate_user_locations(instance.id_user_id)
+
+    def perform_destroy(self, instance):
+        user_id = instance.id_user_id
+        instance.delete()
+        invalidate_user_locations(user_id)
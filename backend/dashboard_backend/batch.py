@@ -0,0 +1,139 @@
+# dashboard_backend/batch.py
+
+"""
+Endpoint batch dashboard: beberapa widget dalam satu round-trip.
+
+POST api/dashboard/batch
+{
+    "session_data": {...},
+    "widgets": [
+        {"id": "cards", "path": "summarycards/"},
+        {"id": "trend", "path": "revenue/filterbydays/all"},
+        {"id": "range", "path": "revenue/range/all", "params": {"start_date": "2024-01-01", "end_date": "2024-01-31"}}
+    ]
+}
+
+Response: {"cards": {"status": 200, "data": {...}}, "trend": {...}, ...}
+
+Session dan lokasi user di-resolve sekali lalu dipakai semua widget (sub-request
+memakai user yang sama lewat forced authentication DRF), token data_watermark()
+di-probe sekali untuk seluruh batch, dan view widget dijalankan paralel lewat fan_out.
+Error satu widget tidak menggagalkan widget lain.
+"""
+
+import io
+from functools import partial
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from app_revenue_rollup.cache import data_watermark, shared_data_watermark
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+from .concurrency import fan_out
+
+# Path (relatif terhadap /api/) yang boleh diminta sebagai widget: endpoint baca
+# dashboard yang mengembalikan JSON biasa (bukan export / stream / manajemen user)
+BATCH_WIDGET_PATHS = getattr(settings, 'DASHBOARD_BATCH_WIDGET_PATHS', (
+    'summarycards/',
+    'revenuerealtime/all', 'revenuerealtime/bylocations',
+    'revenuebylocations/all', 'revenuebylocations/bylocations',
+    'revenuebylocations/filterbydays/', 'revenuebylocations/filterbymonths/', 'revenuebylocations/filterbyyears/',
+    'revenue/filterbydays/all', 'revenue/filterbydays/bylocations',
+    'revenue/filterbymonths/all', 'revenue/filterbymonths/bylocations',
+    'revenue/filterbyyears/all', 'revenue/filterbyyears/bylocations',
+    'revenue/range/all', 'revenue/range/bylocations',
+    'revenuedetails/locations/', 'revenuedetails/filterbydays/', 'revenuedetails/filterbymonths/',
+    'revenuedetails/filterbyyears/',
+    'poststatus/all', 'poststatus/bylocations',
+    'traffichours/all', 'traffichours/bylocations',
+    'trouble/filterbydays/', 'trouble/filterbymonths/', 'trouble/filterbyyears/',
+))
+BATCH_MAX_WIDGETS = getattr(settings, 'DASHBOARD_BATCH_MAX_WIDGETS', 30)
+
+class BatchSpecError(Exception):
+    pass
+
+def parse_widgets(widgets):
+    """Validasi list spesifikasi widget -> [(id, path, params)]."""
+    if not isinstance(widgets, list) or not widgets:
+        raise BatchSpecError("Field 'widgets' harus berupa list yang tidak kosong.")
+    if len(widgets) > BATCH_MAX_WIDGETS:
+        raise BatchSpecError(f"Maksimal {BATCH_MAX_WIDGETS} widget per batch.")
+
+    specs, seen = [], set()
+    for widget in widgets:
+        if not isinstance(widget, dict) or not isinstance(widget.get('path'), str):
+            raise BatchSpecError("Tiap widget harus berupa object dengan field 'path'.")
+        path = widget['path'].lstrip('/')
+        if path.startswith('api/'):
+            path = path[len('api/'):]
+        if path not in BATCH_WIDGET_PATHS:
+            raise BatchSpecError(f"Widget tidak didukung: {widget['path']}")
+
+        widget_id = str(widget.get('id') or path)
+        if widget_id in seen:
+            raise BatchSpecError(f"Id widget duplikat: {widget_id}")
+        seen.add(widget_id)
+
+        params = widget.get('params') or {}
+        if not isinstance(params, dict) or any(isinstance(value, (dict, list)) for value in params.values()):
+            raise BatchSpecError(f"Params widget {widget_id} harus berupa object berisi nilai skalar.")
+        specs.append((widget_id, path, params))
+    return specs
+
+def widget_request(request, path, params):
+    """Sub-request GET untuk satu widget, memakai user & session yang sudah divalidasi."""
+    sub_request = HttpRequest()
+    sub_request.method = 'GET'
+    sub_request.path = sub_request.path_info = f'/api/{path}'
+    # Header conditional GET milik request batch tidak berlaku untuk widget
+    sub_request.META = {key: value for key, value in request.META.items()
+                        if (key.startswith('HTTP_') and key not in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE'))
+                        or key in ('SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR')}
+    sub_request.META['REQUEST_METHOD'] = 'GET'
+    sub_request._stream = io.BytesIO(b'')
+    sub_request._read_started = False
+    query = QueryDict(mutable=True)
+    for key, value in params.items():
+        query[key] = str(value)
+    sub_request.GET = query
+    # Dibaca DRF Request: lewati authenticator view, pakai user hasil validasi batch
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+def run_widget(request, path, params):
+    try:
+        match = resolve(f'/api/{path}')
+        response = match.func(widget_request(request, path, params), *match.args, **match.kwargs)
+        return {'status': response.status_code, 'data': getattr(response, 'data', None)}
+    except Resolver404:
+        return {'status': 404, 'data': {"status": "error", "message": f"Endpoint tidak ditemukan: {path}"}}
+    except Exception as e:
+        return {'status': 500, 'data': {"status": "error", "message": f"Terjadi kesalahan: {str(e)}"}}
+
+@method_decorator(csrf_exempt, name='dispatch')
+class DashboardBatchView(APIView):
+    parser_classes = [JSONParser]
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            specs = parse_widgets(request.data.get('widgets') if isinstance(request.data, dict) else None)
+        except BatchSpecError as e:
+            return Response({"status": "error", "message": str(e)}, status=400)
+
+        try:
+            with shared_data_watermark():
+                # Probe sekali di sini supaya widget yang jalan paralel memakai token yang sama
+                data_watermark()
+                results = fan_out(*(partial(run_widget, request, path, params) for _, path, params in specs))
+            return Response({widget_id: result for (widget_id, _, _), result in zip(specs, results)}, status=200)
+
+        except Exception as e:
+            return Response({"status": "error", "message": f"Terjadi kesalahan: {str(e)}"}, status=500)
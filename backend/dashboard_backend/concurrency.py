@@ -0,0 +1,74 @@
+# dashboard_backend/concurrency.py
+
+"""
+Fan-out query database yang saling independen.
+
+View DRF tetap sync (DRF belum punya APIView async); di bawah ASGI view tersebut
+jalan di thread worker. Query yang tidak saling bergantung dijalankan paralel di
+thread pool, masing-masing dengan koneksi database sendiri, sehingga latency endpoint
+mendekati query paling lambat, bukan jumlah semuanya. Dipakai endpoint batch dashboard
+untuk menjalankan view widget; satu query murah tidak sebanding dengan biaya koneksi
+baru per tugas (CONN_MAX_AGE=0), jadi jangan dipakai untuk itu.
+
+Tiap callable jalan dengan salinan contextvars pemanggil (mis. memo watermark batch
+dashboard). fan_out yang dipanggil dari dalam thread pool (view di endpoint batch yang
+juga fan-out) berjalan berurutan supaya worker tidak saling menunggu slot pool.
+sequential() memaksa hal yang sama di thread pemanggil (dipakai profiler request).
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, close_old_connections
+
+# Jumlah thread untuk fan-out query; 1 atau kurang berarti jalankan berurutan
+QUERY_FANOUT_WORKERS = getattr(settings, 'QUERY_FANOUT_WORKERS', 8)
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=QUERY_FANOUT_WORKERS, thread_name_prefix='query-fanout')
+        return _executor
+
+def run_in_thread(func):
+    """Jalankan func di thread pool lalu rapikan koneksi thread itu sesuai CONN_MAX_AGE."""
+    close_old_connections()
+    _worker.active = True
+    try:
+        return func()
+    finally:
+        _worker.active = False
+        close_old_connections()
+
+@contextmanager
+def sequential():
+    """Selama blok ini fan_out di thread pemanggil berjalan berurutan, tanpa thread pool."""
+    previous = getattr(_worker, 'active', False)
+    _worker.active = True
+    try:
+        yield
+    finally:
+        _worker.active = previous
+
+def fan_out(*funcs):
+    """
+    Jalankan callable tanpa argumen secara paralel, kembalikan hasilnya sesuai urutan.
+
+    Berjalan berurutan di thread pemanggil jika QUERY_FANOUT_WORKERS <= 1, hanya ada satu
+    callable, pemanggil sedang di dalam transaksi (thread lain tidak melihat snapshot
+    transaksi yang sama, mis. di TestCase), atau pemanggil sendiri adalah worker pool.
+    """
+    if (QUERY_FANOUT_WORKERS <= 1 or len(funcs) < 2 or connection.in_atomic_block
+            or getattr(_worker, 'active', False)):
+        return [func() for func in funcs]
+
+    executor = get_executor()
+    futures = [executor.submit(contextvars.copy_context().run, run_in_thread, func) for func in funcs]
+    return [future.result() for future in futures]
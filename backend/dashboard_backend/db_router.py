@@ -0,0 +1,175 @@
+# dashboard_backend/db_router.py
+
+"""
+Routing baca ke database replica untuk query analitik.
+
+- Baca model dari app analitik (income, realtime, rollup, trends, details, traffic,
+  post status, trouble) di dalam request HTTP diarahkan ke salah satu alias di
+  DATABASE_REPLICAS. Replica dipilih round-robin di antara yang sehat, sekali per
+  request (ReplicaReadMiddleware), supaya probe watermark dan data yang di-cache
+  berasal dari replica yang sama.
+- Tulis, migrasi dan baca dari app lain (user, lokasi, lokasi user) tetap ke
+  `default`. Di luar request (management command, job sync, body response streaming
+  seperti SSE/export) semua baca juga ke `default`, sehingga build rollup tidak
+  membaca data yang tertinggal.
+- Kesehatan dan lag tiap replica di-probe paling sering sekali per
+  REPLICA_CHECK_INTERVAL detik per proses: lag = selisih waktu baris terbaru
+  tt_sync_realtime di primary dan di replica (lookup lewat primary key).
+  Replica yang gagal di-probe dianggap mati sampai pengecekan berikutnya.
+- replica_lag_guard untuk endpoint realtime: jika replica request ini tertinggal
+  lebih dari REPLICA_MAX_LAG detik, baca endpoint tersebut pindah ke `default`.
+
+Tanpa DATABASE_REPLICAS semua method router mengembalikan None (perilaku lama).
+Daftar replica dibaca dari settings setiap dipakai (replica_aliases), sehingga bisa
+diaktifkan per test dengan override_settings(DATABASE_REPLICAS=[...]).
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+REPLICA_CHECK_INTERVAL = getattr(settings, 'REPLICA_CHECK_INTERVAL', 5)
+REPLICA_MAX_LAG = getattr(settings, 'REPLICA_MAX_LAG', 60)
+
+# App yang seluruh bacanya boleh dilayani replica
+REPLICA_APPS = frozenset((
+    'app_income_parkir', 'app_income_member', 'app_income_manual',
+    'app_revenue_realtime', 'app_revenue_rollup', 'app_revenue_trends', 'app_revenue_trends_by_locations',
+    'app_revenue_details', 'app_traffic_hours', 'app_post_status', 'app_trouble_transactions',
+))
+
+class ReadScope:
+    """Alias baca untuk satu request (atau satu view dengan lag guard), dipilih saat baca pertama."""
+
+    def __init__(self, max_lag=None, alias=None):
+        self.max_lag = max_lag
+        self.alias = alias
+        self.lock = threading.Lock()
+
+    def read_alias(self):
+        with self.lock:
+            if self.alias is None:
+                self.alias = choose_replica(self.max_lag)
+            return self.alias
+
+_scope = ContextVar('replica_read_scope', default=None)
+
+def replica_aliases():
+    """Alias di DATABASE_REPLICAS (tuple kosong jika tidak ada replica)."""
+    return tuple(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+_status = {}                # {alias: (dicek pada, sehat, lag detik)}
+_status_lock = threading.Lock()
+_round_robin = itertools.count()
+
+def latest_realtime(alias):
+    from app_revenue_realtime.models import RevenueRealtime
+    return RevenueRealtime.objects.using(alias).order_by('-id').values_list('waktu', flat=True).first()
+
+def probe(alias):
+    """(sehat, lag detik) satu replica."""
+    try:
+        replica_latest = latest_realtime(alias)
+        primary_latest = latest_realtime(DEFAULT_DB_ALIAS)
+    except DatabaseError:
+        return False, float('inf')
+    if primary_latest is None:
+        return True, 0.0
+    if replica_latest is None:
+        return True, float('inf')
+    return True, max(0.0, (primary_latest - replica_latest).total_seconds())
+
+def replica_status(alias):
+    now = time.monotonic()
+    with _status_lock:
+        cached = _status.get(alias)
+    if cached is not None and now - cached[0] < REPLICA_CHECK_INTERVAL:
+        return cached[1], cached[2]
+
+    healthy, lag = probe(alias)
+    with _status_lock:
+        _status[alias] = (now, healthy, lag)
+    return healthy, lag
+
+def reset_replica_status():
+    with _status_lock:
+        _status.clear()
+
+def lag_ok(alias, max_lag):
+    if alias == DEFAULT_DB_ALIAS:
+        return True
+    healthy, lag = replica_status(alias)
+    return healthy and (max_lag is None or lag <= max_lag)
+
+def choose_replica(max_lag=None):
+    """Replica berikutnya (round-robin) yang sehat dan lag-nya <= max_lag, selain itu `default`."""
+    replicas = replica_aliases()
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    start = next(_round_robin)
+    for offset in range(len(replicas)):
+        alias = replicas[(start + offset) % len(replicas)]
+        if lag_ok(alias, max_lag):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+@contextmanager
+def replica_reads(max_lag=None):
+    """Aktifkan baca replica untuk blok ini (dipakai middleware untuk tiap request)."""
+    token = _scope.set(ReadScope(max_lag))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+def replica_lag_guard(get):
+    """
+    Decorator method get() endpoint realtime: pakai replica request ini hanya jika
+    lag-nya <= REPLICA_MAX_LAG, selain itu baca dari `default`. Tidak pernah pindah ke
+    replica lain, jadi data yang dibaca tidak pernah lebih lama dari probe watermark.
+    """
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        outer = _scope.get()
+        if outer is None:
+            return get(self, request, *args, **kwargs)
+        alias = outer.read_alias()
+        guarded = ReadScope(REPLICA_MAX_LAG, alias if lag_ok(alias, REPLICA_MAX_LAG) else DEFAULT_DB_ALIAS)
+        token = _scope.set(guarded)
+        try:
+            return get(self, request, *args, **kwargs)
+        finally:
+            _scope.reset(token)
+    return wrapper
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS: baca analitik ke replica, sisanya ke `default`."""
+
+    def db_for_read(self, model, **hints):
+        if not replica_aliases() or model._meta.app_label not in REPLICA_APPS:
+            return None
+        scope = _scope.get()
+        if scope is None:
+            return DEFAULT_DB_ALIAS
+        return scope.read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS if replica_aliases() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary dan replica berisi data yang sama
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replica diisi lewat replikasi, bukan migrate
+        if db in replica_aliases():
+            return False
+        return None
@@ -0,0 +1,97 @@
+# dashboard_backend/export.py
+
+"""
+Export streaming (NDJSON / CSV) untuk tabel tt_sync_* yang besar.
+
+Baris dibaca per chunk dengan keyset `WHERE pk > <pk terakhir> ORDER BY pk LIMIT n`
+dan langsung ditulis ke StreamingHttpResponse, jadi memori tetap datar berapapun
+jumlah barisnya. Keyset dipakai (bukan QuerySet.iterator()) karena driver PyMySQL
+default menampung seluruh hasil query di sisi client.
+"""
+
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+# Jumlah baris per query chunk export
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def export_format(request):
+    """Format dari ?export=, None jika bukan request export."""
+    fmt = request.query_params.get('export')
+    if not fmt:
+        return None
+    if fmt not in EXPORT_FORMATS:
+        raise ValidationError({"status": "error", "message": f"Format export tidak dikenal: {fmt} (ndjson/csv)."})
+    return fmt
+
+def iter_chunks(queryset, fields, chunk_size=None):
+    """Yield tuple nilai `fields` per baris, dibaca per chunk berdasarkan primary key."""
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    pk_name = queryset.model._meta.pk.name
+    queryset = queryset.order_by(pk_name)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list(pk_name, *fields)[:chunk_size])
+        for row in rows:
+            yield row[1:]
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+def json_value(value):
+    # Sama dengan DecimalField(coerce_to_string=False) di serializer: angka, bukan string
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def ndjson_lines(rows, fields):
+    for row in rows:
+        yield json.dumps({field: json_value(value) for field, value in zip(fields, row)}) + '\n'
+
+class Echo:
+    """Buffer palsu untuk csv.writer: kembalikan baris yang ditulis tanpa menyimpannya."""
+
+    def write(self, value):
+        return value
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+def stream_export(queryset, fields, fmt, filename):
+    """StreamingHttpResponse NDJSON/CSV untuk queryset, kolom sesuai `fields`."""
+    rows = iter_chunks(queryset, fields)
+    lines = ndjson_lines(rows, fields) if fmt == 'ndjson' else csv_lines(rows, fields)
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+class ExportMixin:
+    """
+    Untuk ListAPIView: `?export=ndjson|csv` mengalirkan seluruh hasil filter (tanpa
+    pagination) dengan kolom yang sama seperti serializer_class.
+    """
+    export_filename = 'export'
+
+    def list(self, request, *args, **kwargs):
+        fmt = export_format(request)
+        if fmt is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = list(self.get_serializer_class().Meta.fields)
+        return stream_export(queryset, fields, fmt, self.export_filename)
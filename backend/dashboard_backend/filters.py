@@ -0,0 +1,44 @@
+# dashboard_backend/filters.py
+
+from datetime import date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+class IncomeFilterBackend(BaseFilterBackend):
+    """
+    Filter server-side untuk endpoint list tt_sync_*:
+    - start_date / end_date (YYYY-MM-DD, inklusif) pada kolom tanggal
+    - shift, kendaraan, kategori (bisa diulang, mis. ?kendaraan=MOBIL&kendaraan=MOTOR)
+    Filter untuk kolom yang tidak ada di model (mis. kendaraan pada income member) ditolak.
+    """
+    choice_fields = ('shift', 'kendaraan', 'kategori')
+
+    def parse_date(self, request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({"status": "error", "message": f"Format {name} tidak valid, gunakan YYYY-MM-DD."})
+
+    def filter_queryset(self, request, queryset, view):
+        field_names = {field.name for field in queryset.model._meta.get_fields()}
+
+        start_date = self.parse_date(request, 'start_date')
+        end_date = self.parse_date(request, 'end_date')
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError({"status": "error", "message": "start_date tidak boleh setelah end_date."})
+        if start_date:
+            queryset = queryset.filter(tanggal__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(tanggal__lte=end_date)
+
+        for name in self.choice_fields:
+            values = request.query_params.getlist(name)
+            if not values:
+                continue
+            if name not in field_names:
+                raise ValidationError({"status": "error", "message": f"Filter {name} tidak tersedia untuk endpoint ini."})
+            queryset = queryset.filter(**{f'{name}__in': values})
+        return queryset
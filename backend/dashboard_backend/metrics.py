@@ -0,0 +1,183 @@
+# dashboard_backend/metrics.py
+
+"""
+Metrik per endpoint (nama URL) di memori proses, diekspos dalam format teks Prometheus.
+
+Per request dicatat: latency, jumlah query DB, total waktu query DB dan ukuran
+response, masing-masing ke histogram dengan bucket tetap (memori terbatas: satu set
+counter per nama URL, tidak menyimpan sampel mentah). Query dihitung lewat execute
+wrapper yang dipasang sekali di tiap koneksi; wrapper hanya membaca ContextVar sehingga
+query di luar request (atau saat metrik dimatikan) praktis tanpa biaya. Karena fan_out
+menyalin contextvars ke thread pool, query paralel ikut tercatat ke request asalnya.
+
+Angka bersifat per proses worker: Prometheus men-scrape tiap proses/instance.
+Endpoint api/metrics hanya untuk admin (session_data lewat header X-Session-Data),
+sama seperti api/profiles/<id>, karena nama endpoint dan pola traffic tidak publik.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+
+METRICS_ENABLED = getattr(settings, 'METRICS_ENABLED', True)
+
+# Batas atas bucket histogram (inklusif), +Inf ditambahkan otomatis
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = (
+    # (nama metrik, bucket, keterangan)
+    ('dashboard_request_duration_seconds', LATENCY_BUCKETS, 'Latency request per endpoint.'),
+    ('dashboard_db_queries', QUERY_COUNT_BUCKETS, 'Jumlah query database per request.'),
+    ('dashboard_db_duration_seconds', LATENCY_BUCKETS, 'Total waktu query database per request.'),
+    ('dashboard_response_bytes', SIZE_BUCKETS, 'Ukuran body response (setelah kompresi).'),
+)
+
+class RequestStats:
+    """Akumulator query untuk satu request (dibagi ke thread fan_out lewat ContextVar)."""
+    __slots__ = ('queries', 'db_time', 'lock')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.lock = threading.Lock()
+
+_current = ContextVar('request_metrics', default=None)
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        with stats.lock:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+def install(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+@receiver(connection_created)
+def on_connection_created(sender, connection, **kwargs):
+    install(connection)
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}    # {(view, method): [Histogram per HISTOGRAMS]}
+        self.responses = {}     # {(view, method, status): jumlah}
+
+    def observe(self, view, method, status, duration, stats, size):
+        key = (view, method)
+        with self.lock:
+            histograms = self.histograms.get(key)
+            if histograms is None:
+                histograms = self.histograms[key] = [Histogram(bounds) for _, bounds, _ in HISTOGRAMS]
+            values = (duration, stats.queries, stats.db_time, size)
+            for histogram, value in zip(histograms, values):
+                if value is not None:
+                    histogram.observe(value)
+            self.responses[(view, method, status)] = self.responses.get((view, method, status), 0) + 1
+
+    def totals(self, view, method):
+        """Jumlah request dan total per histogram (durasi, query, waktu DB, byte) untuk satu endpoint."""
+        with self.lock:
+            histograms = self.histograms.get((view, method))
+            if histograms is None:
+                return None
+            return {'count': histograms[0].count,
+                    **{name: histogram.total for (name, _, _), histogram in zip(HISTOGRAMS, histograms)}}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.responses.clear()
+
+    def render(self):
+        """Teks exposition format Prometheus 0.0.4."""
+        with self.lock:
+            histograms = {key: [(list(h.counts), h.total, h.count) for h in values]
+                          for key, values in self.histograms.items()}
+            responses = dict(self.responses)
+
+        lines = []
+        for index, (name, bounds, description) in enumerate(HISTOGRAMS):
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (view, method), values in sorted(histograms.items()):
+                counts, total, count = values[index]
+                labels = f'view="{escape(view)}",method="{method}"'
+                cumulative = 0
+                for bound, bucket_count in zip(bounds + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {total}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+
+        lines.append('# HELP dashboard_requests_total Jumlah request per endpoint dan status.')
+        lines.append('# TYPE dashboard_requests_total counter')
+        for (view, method, status), count in sorted(responses.items()):
+            lines.append(f'dashboard_requests_total{{view="{escape(view)}",method="{method}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+registry = MetricsRegistry()
+
+def view_name(request):
+    """Nama URL (mis. summary_cards); request yang tidak cocok dengan URL manapun digabung."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+def begin_request():
+    """Mulai mencatat query untuk request ini; kembalikan (stats, token reset ContextVar)."""
+    # Koneksi yang sudah terbuka sebelum modul ini di-import tidak melewati connection_created
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+def end_request(token):
+    _current.reset(token)
+
+class MetricsView(APIView):
+    """Endpoint scrape Prometheus. Hanya untuk admin."""
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
+
+    def get(self, request):
+        if not request.user.is_admin:
+            return Response({"status": "error", "message": "Metrik hanya untuk admin."}, status=403)
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,77 @@
+# dashboard_backend/middleware.py
+
+import time
+from django.http import JsonResponse
+from django.middleware.gzip import GZipMiddleware
+from .db_router import replica_aliases, replica_reads
+from .metrics import METRICS_ENABLED, begin_request, end_request, registry, view_name
+from .profiling import PROFILING_ENABLED, is_admin_request, is_requested, is_triggered, profile_request
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware Django (body >= 200 byte, client mengirim Accept-Encoding: gzip),
+    kecuali stream SSE: event harus sampai ke client apa adanya tanpa buffer kompresi.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        return super().process_response(request, response)
+
+class MetricsMiddleware:
+    """
+    Catat latency, jumlah & waktu query DB, dan ukuran response per nama URL ke
+    metrics.registry (lihat endpoint api/metrics). Dipasang paling luar supaya ukuran
+    yang tercatat adalah body setelah kompresi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not METRICS_ENABLED:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        stats, token = begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+
+        # Response streaming: latency sampai header siap, ukuran tidak diketahui
+        size = None if response.streaming else len(response.content)
+        registry.observe(view_name(request), request.method, response.status_code,
+                         time.perf_counter() - started, stats, size)
+        return response
+
+class ProfilingMiddleware:
+    """
+    Profiling opt-in (header X-Profile / param profile) khusus admin, lihat profiling.py.
+    Request biasa hanya melewati pengecekan is_triggered().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not PROFILING_ENABLED or not is_triggered(request) or not is_requested(request):
+            return self.get_response(request)
+        if not is_admin_request(request):
+            return JsonResponse({"status": "error", "message": "Profiling hanya untuk admin."}, status=403)
+        return profile_request(request, self.get_response)
+
+class ReplicaReadMiddleware:
+    """
+    Baca analitik selama request ini dilayani satu replica (lihat db_router.py).
+    Tanpa DATABASE_REPLICAS middleware ini hanya meneruskan request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
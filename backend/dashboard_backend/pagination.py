@@ -0,0 +1,14 @@
+# dashboard_backend/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+class IncomeCursorPagination(CursorPagination):
+    """
+    Keyset pagination untuk endpoint list tt_sync_*: halaman berikutnya dibaca dengan
+    `WHERE id > <cursor>` lewat primary key, jadi biayanya tetap walau tabelnya multi-tahun.
+    Response berisi token `next` / `previous` (URL dengan parameter cursor).
+    """
+    ordering = 'id'
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
@@ -0,0 +1,210 @@
+# dashboard_backend/profiling.py
+
+"""
+Profiler opt-in per request, khusus admin.
+
+Request dengan header `X-Profile: 1` (atau query param `profile=1`) dan session_data
+admin dijalankan di bawah cProfile, dan setiap query SQL dicatat beserta durasinya.
+Setelah response selesai, statement SELECT yang unik di-EXPLAIN. Hasilnya disimpan di
+cache selama PROFILE_TTL detik; response asli tidak diubah selain header
+`X-Profile-Id`, dan hasilnya bisa diambil lewat api/profiles/<id> (JSON) atau
+api/profiles/<id>?download=pstats (attachment untuk snakeviz / pstats).
+
+Request tanpa pemicu hanya melewati satu pengecekan header/query string: tidak ada
+profiler, execute wrapper atau parsing session. Selama profiling, fan_out berjalan
+berurutan di thread request supaya cProfile dan pencatat SQL melihat semua query.
+Hanya satu request yang diprofil cProfile pada satu waktu per proses; request lain
+dengan pemicu tetap mencatat SQL.
+"""
+
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from app_users.authentication import SessionDataAuthentication, HasSessionLocations
+from app_users.utils import get_session_data_from_body, is_admin_user
+from .concurrency import sequential
+
+PROFILING_ENABLED = getattr(settings, 'PROFILING_ENABLED', True)
+PROFILE_CACHE_ALIAS = getattr(settings, 'PROFILE_CACHE_ALIAS', 'default')
+PROFILE_TTL = getattr(settings, 'PROFILE_TTL', 60 * 60)
+
+# Batas isi hasil supaya entri cache tetap kecil
+PROFILE_STATS_LIMIT = 60        # baris fungsi di ringkasan pstats
+PROFILE_EXPLAIN_LIMIT = 50      # statement unik yang di-EXPLAIN
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+
+_profiler_lock = threading.Lock()
+
+def profile_key(profile_id):
+    return f"request-profile:{profile_id}"
+
+def is_triggered(request):
+    """Pengecekan murah yang dijalankan untuk setiap request."""
+    return PROFILE_HEADER in request.META or f'{PROFILE_PARAM}=' in request.META.get('QUERY_STRING', '')
+
+def is_requested(request):
+    value = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    return value not in (None, '', '0', 'false')
+
+def is_admin_request(request):
+    """Baca session_data dengan urutan yang sama seperti SessionDataAuthentication."""
+    session_data = get_session_data_from_body(request)
+    if isinstance(session_data, dict) and 'error' in session_data:
+        session_data_str = request.GET.get('session_data') or request.headers.get('X-Session-Data')
+        try:
+            session_data = json.loads(session_data_str) if session_data_str else None
+        except json.JSONDecodeError:
+            return False
+    return isinstance(session_data, dict) and is_admin_user(session_data) is True
+
+def plain(value):
+    """Nilai dalam bentuk yang aman untuk JSON/pickle."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+class QueryCapture:
+    """Execute wrapper per alias yang mencatat setiap query beserta durasinya."""
+
+    def __init__(self):
+        self.queries = []
+
+    def wrapper(self, alias):
+        def capture(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append({
+                    'alias': alias, 'sql': sql, 'params': params, 'many': many,
+                    'duration_ms': (time.perf_counter() - started) * 1000,
+                })
+        return capture
+
+def explain(query):
+    """EXPLAIN satu query; kembalikan baris rencana sebagai list dict."""
+    connection = connections[query['alias']]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {query['sql']}", query['params'])
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, map(plain, row))) for row in cursor.fetchall()]
+    except Exception as e:
+        return [{'error': str(e)}]
+
+def explain_queries(queries):
+    """Rencana eksekusi untuk statement SELECT unik, maksimal PROFILE_EXPLAIN_LIMIT."""
+    plans = {}
+    for query in queries:
+        key = (query['alias'], query['sql'], repr(query['params']))
+        if (key in plans or query['many'] or len(plans) >= PROFILE_EXPLAIN_LIMIT
+                or not query['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))):
+            continue
+        plans[key] = explain(query)
+    return plans
+
+def stats_summary(profiler):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_STATS_LIMIT)
+    return stream.getvalue()
+
+def build_result(profile_id, request, response, duration, capture, profiler):
+    plans = explain_queries(capture.queries)
+    queries = [
+        {
+            'alias': query['alias'],
+            'sql': query['sql'],
+            'params': ([len(query['params'])] if query['many'] else [plain(value) for value in query['params'] or ()]),
+            'many': query['many'],
+            'duration_ms': round(query['duration_ms'], 3),
+            'explain': plans.get((query['alias'], query['sql'], repr(query['params']))),
+        }
+        for query in capture.queries
+    ]
+    return {
+        'id': profile_id,
+        'created': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.path,
+        # session_data tidak ikut disimpan
+        'params': {key: values for key, values in request.GET.lists() if key != 'session_data'},
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'sql_count': len(queries),
+        'sql_duration_ms': round(sum(query['duration_ms'] for query in capture.queries), 3),
+        'queries': queries,
+        'profile': stats_summary(profiler) if profiler else None,
+    }
+
+def profile_request(request, get_response):
+    """Jalankan get_response di bawah profiler, simpan hasilnya, dan tandai response."""
+    capture = QueryCapture()
+    profiler = cProfile.Profile() if _profiler_lock.acquire(blocking=False) else None
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(capture.wrapper(alias)))
+            stack.enter_context(sequential())
+
+            started = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                if profiler:
+                    profiler.disable()
+            duration = time.perf_counter() - started
+    finally:
+        if profiler:
+            _profiler_lock.release()
+
+    profile_id = uuid.uuid4().hex
+    result = build_result(profile_id, request, response, duration, capture, profiler)
+    raw_stats = marshal.dumps(profiler.stats) if profiler else None
+    caches[PROFILE_CACHE_ALIAS].set(profile_key(profile_id), (result, raw_stats), PROFILE_TTL)
+
+    response['X-Profile-Id'] = profile_id
+    return response
+
+class ProfileView(APIView):
+    """
+    Ambil hasil profiling: JSON (default) atau file pstats mentah dengan ?download=pstats
+    (bukan ?format=, yang dipakai DRF untuk memilih renderer).
+    Hanya untuk admin.
+    """
+    authentication_classes = [SessionDataAuthentication]
+    permission_classes = [HasSessionLocations]
+
+    def get(self, request, profile_id):
+        if not request.user.is_admin:
+            return Response({"status": "error", "message": "Profiling hanya untuk admin."}, status=403)
+
+        entry = caches[PROFILE_CACHE_ALIAS].get(profile_key(profile_id))
+        if entry is None:
+            return Response({"status": "error", "message": "Profil tidak ditemukan atau sudah kedaluwarsa."}, status=404)
+        result, raw_stats = entry
+
+        if request.query_params.get('download') == 'pstats':
+            if raw_stats is None:
+                return Response({"status": "error", "message": "Profil ini tidak memiliki data cProfile."}, status=404)
+            response = HttpResponse(raw_stats, content_type='application/octet-stream')
+            response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.prof"'
+            return response
+
+        return Response({"status": "success", "profile": result}, status=200)
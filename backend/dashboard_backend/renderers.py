@@ -0,0 +1,34 @@
+# dashboard_backend/renderers.py
+
+"""
+Renderer JSON cepat berbasis orjson untuk seluruh endpoint DRF.
+
+Output dibuat sama dengan rest_framework.renderers.JSONRenderer (compact, UTF-8,
+datetime UTC berakhiran 'Z', Decimal -> angka float, U+2028/U+2029 di-escape), tetapi
+Decimal, date dan datetime di-encode native tanpa lintasan json.JSONEncoder Python.
+Tipe lain (QuerySet, lazy string, UUID, ...) diteruskan ke encoder DRF yang sama.
+Request dengan indent (mis. `Accept: application/json; indent=4`) tetap memakai
+JSONRenderer bawaan.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONEncoder()
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        # Sama dengan JSONRenderer: escape pemisah baris unicode supaya aman di dalam <script>
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -58,13 +58,22 @@ INSTALLED_APPS = [
     'app_revenue_trends',
     'app_revenue_details',
     'app_revenue_trends_by_locations',
+    'app_revenue_rollup',
     
     'app_trouble_transactions',
     'app_traffic_hours',
 ]
 
 MIDDLEWARE = [
+    # Metrik per endpoint (latency, query DB, ukuran response), lihat api/metrics
+    'dashboard_backend.middleware.MetricsMiddleware',
+    # Profiling cProfile + EXPLAIN SQL khusus admin (X-Profile: 1), lihat api/profiles/<id>
+    'dashboard_backend.middleware.ProfilingMiddleware',
+    # Baca analitik ke replica database (DATABASE_REPLICAS), lihat db_router.py
+    'dashboard_backend.middleware.ReplicaReadMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Kompresi gzip untuk body >= 200 byte jika client mengirim Accept-Encoding: gzip
+    'dashboard_backend.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +85,11 @@ MIDDLEWARE = [
 ]
 
 REST_FRAMEWORK = {
+    # orjson: encode Decimal/date/datetime native, output sama dengan JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'dashboard_backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',  # Session-based auth
     ],
@@ -135,8 +149,40 @@ DATABASES = {
             'charset': 'utf8mb4', 
             'use_unicode': True
         }
-    }
+    },
+    # Replica baca (opsional), contoh:
+    # 'replica_1': {
+    #     'ENGINE': 'django.db.backends.mysql',
+    #     'NAME': 'u478814733_dash_2',
+    #     'USER': 'readonly',
+    #     'PASSWORD': '...',
+    #     'HOST': 'replica-1.internal',
+    #     'PORT': '3306',
+    #     'OPTIONS': {'charset': 'utf8mb4', 'use_unicode': True},
+    # },
+}
+
+# Cache: 'default' lokal per proses (response, partial, snapshot watermark), 'shared' dibaca
+# semua proses/worker untuk generasi data_synced (lihat app_revenue_rollup/watermarks.py).
+# Tabel cache dibuat dengan `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'dashboard_cache',
+    },
 }
+DATA_GENERATION_CACHE_ALIAS = 'shared'
+DATA_GENERATION_CHECK_INTERVAL = 1
+
+# Semua alias selain default dianggap replica untuk baca analitik (lihat dashboard_backend/db_router.py)
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['dashboard_backend.db_router.ReplicaRouter']
+# Detik: interval probe kesehatan replica, dan lag maksimum untuk endpoint realtime
+REPLICA_CHECK_INTERVAL = 5
+REPLICA_MAX_LAG = 60
 
 
 # Password validation
@@ -212,8 +258,9 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-profile',
 ]
-CORS_EXPOSE_HEADERS = ['set-cookie']
+CORS_EXPOSE_HEADERS = ['set-cookie', 'x-profile-id']
 
 # Logging Configuration
 LOGGING = {
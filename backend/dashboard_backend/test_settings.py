@@ -0,0 +1,25 @@
+# dashboard_backend/test_settings.py
+
+"""
+Settings untuk menjalankan test tanpa server MySQL:
+
+    python manage.py test --settings=dashboard_backend.test_settings
+
+Dua database SQLite (dibuat in-memory oleh test runner): `default` dan `replica`.
+Routing replica tidak aktif secara default supaya test lain tetap membaca `default`;
+ReplicaRoutingTests mengaktifkannya dengan override_settings(DATABASE_REPLICAS=['replica']).
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_default.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_replica.sqlite3',
+    },
+}
+DATABASE_REPLICAS = []
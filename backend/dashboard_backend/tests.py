@@ -0,0 +1,272 @@
+# dashboard_backend/tests.py
+
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import skipUnless
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, router
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from app_locations.models import Locations
+from app_income_parkir.models import IncomeParkir
+from app_post_status.models import PostStatus
+from app_revenue_realtime.models import RevenueRealtime
+from app_revenue_rollup.cache import RESPONSE_CACHE_ALIAS
+from app_revenue_rollup.prefix import prefix_index
+from app_revenue_rollup.tests import DAYS, UNMANAGED_MODELS, UnmanagedTablesTestCase, add_manual, add_parkir
+from app_revenue_rollup.watermarks import invalidate_watermarks
+from app_traffic_hours.models import TrafficHours
+from app_users.models import Users
+from app_users.utils import invalidate_user_locations
+from app_users_locations.models import UsersLocations
+from .db_router import replica_reads, reset_replica_status
+from .metrics import registry
+from .profiling import PROFILE_CACHE_ALIAS, profile_key
+from .renderers import ORJSONRenderer
+
+# Alias database kedua di test_settings.py, dipakai sebagai replica
+REPLICA_ALIAS = 'replica'
+
+class DashboardBatchTests(UnmanagedTablesTestCase):
+    unmanaged_models = UNMANAGED_MODELS + (TrafficHours, PostStatus)
+    session = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        prefix_index.invalidate()
+        lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        TrafficHours.objects.create(id_lokasi=lokasi, **{f'jam_{i}': i for i in range(24)},
+                                    **{f'tarif_{i}': 1000 for i in range(24)})
+        PostStatus.objects.create(id_lokasi=lokasi, pos='P1', aktif=True, trafic=10)
+        for tanggal in DAYS:
+            add_parkir(lokasi, tanggal, 10)
+        add_manual(lokasi, DAYS[1], 5, masalah=2)
+
+    def batch(self, widgets):
+        return self.client.post('/api/dashboard/batch', {'widgets': widgets}, content_type='application/json',
+                                **self.session)
+
+    def test_matches_individual_endpoints(self):
+        widgets = [
+            {'id': 'traffic', 'path': 'traffichours/all'},
+            {'id': 'pos', 'path': '/api/poststatus/bylocations'},
+            {'path': 'trouble/filterbymonths/'},
+            {'id': 'range', 'path': 'revenue/range/all', 'params': {'start_date': '2024-01-01', 'end_date': '2024-01-02'}},
+        ]
+        response = self.batch(widgets)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data), ['traffic', 'pos', 'trouble/filterbymonths/', 'range'])
+
+        for widget_id, url in (('traffic', '/api/traffichours/all'), ('pos', '/api/poststatus/bylocations'),
+                               ('trouble/filterbymonths/', '/api/trouble/filterbymonths/'),
+                               ('range', '/api/revenue/range/all?start_date=2024-01-01&end_date=2024-01-02')):
+            expected = self.client.get(url, **self.session)
+            self.assertEqual(response.data[widget_id], {'status': 200, 'data': expected.data}, widget_id)
+
+    def test_watermark_probed_once_per_batch(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.batch([{'path': 'trouble/filterbydays/'}, {'path': 'trouble/filterbymonths/'},
+                        {'path': 'trouble/filterbyyears/'}])
+        self.assertEqual(sum('UNION ALL' in query['sql'] for query in queries.captured_queries), 1)
+
+    def test_widget_error_does_not_fail_batch(self):
+        response = self.batch([{'id': 'bad', 'path': 'revenue/range/all'}, {'id': 'ok', 'path': 'poststatus/all'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['bad']['status'], 400)
+        self.assertEqual(response.data['ok']['data']['jumlah_pos_online'], 1)
+
+    def test_invalid_specs(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{'path': 'users/list_user/'}]).status_code, 400)
+        self.assertEqual(self.batch([{'id': 'a', 'path': 'poststatus/all'}, {'id': 'a', 'path': 'traffichours/all'}]).status_code, 400)
+        response = self.client.post('/api/dashboard/batch', {'widgets': [{'path': 'poststatus/all'}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+class MetricsTests(UnmanagedTablesTestCase):
+    unmanaged_models = UNMANAGED_MODELS + (Users, UsersLocations)
+    session = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+    url = '/api/revenue/range/all?start_date=2024-01-01&end_date=2024-01-03'
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        prefix_index.invalidate()
+        registry.reset()
+        self.lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        add_parkir(self.lokasi, DAYS[0], 10)
+
+    def metric(self, body, line):
+        prefix = line + ' '
+        return next(float(row[len(prefix):]) for row in body.splitlines() if row.startswith(prefix))
+
+    def test_records_latency_queries_and_size_per_view(self):
+        self.client.get(self.url, **self.session)
+        self.client.get(self.url, HTTP_IF_NONE_MATCH=self.client.get(self.url, **self.session)['ETag'], **self.session)
+        self.client.get('/api/revenue/range/all?start_date=x', **self.session)
+
+        response = self.client.get('/api/metrics', **self.session)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+
+        labels = 'view="revenue_range",method="GET"'
+        self.assertEqual(self.metric(body, f'dashboard_request_duration_seconds_count{{{labels}}}'), 4)
+        self.assertEqual(self.metric(body, f'dashboard_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 4)
+        self.assertGreater(self.metric(body, f'dashboard_db_queries_sum{{{labels}}}'), 4)
+        # Hanya request pertama yang mengagregasi; cache hit, 304 dan 400 paling banyak 1 query
+        self.assertEqual(self.metric(body, f'dashboard_db_queries_bucket{{{labels},le="1"}}'), 3)
+        self.assertGreater(self.metric(body, f'dashboard_response_bytes_sum{{{labels}}}'), 0)
+        self.assertEqual(self.metric(body, f'dashboard_requests_total{{{labels},status="200"}}'), 2)
+        self.assertEqual(self.metric(body, f'dashboard_requests_total{{{labels},status="304"}}'), 1)
+        self.assertEqual(self.metric(body, f'dashboard_requests_total{{{labels},status="400"}}'), 1)
+
+    def test_unmatched_paths_share_one_label(self):
+        self.client.get('/api/tidak-ada-1')
+        self.client.get('/api/tidak-ada-2')
+        body = self.client.get('/api/metrics', **self.session).content.decode()
+        self.assertEqual(self.metric(body, 'dashboard_requests_total{view="unmatched",method="GET",status="404"}'), 2)
+
+    def test_metrics_are_admin_only(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 400)
+        operator = Users.objects.create(id_user='operator', nama_user='Operator', password='x', admin=0)
+        UsersLocations.objects.create(id_user=operator, id_lokasi=self.lokasi)
+        response = self.client.get('/api/metrics', HTTP_X_SESSION_DATA=json.dumps({'id': operator.id, 'admin': 0}))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['status'], 'error')
+
+class ProfilingTests(UnmanagedTablesTestCase):
+    unmanaged_models = UNMANAGED_MODELS + (Users, UsersLocations)
+    admin = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+    url = '/api/revenue/range/all?start_date=2024-01-01&end_date=2024-01-03'
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        caches[PROFILE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        prefix_index.invalidate()
+        self.lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        add_parkir(self.lokasi, DAYS[0], 10)
+        operator = Users.objects.create(id_user='operator', nama_user='Operator', password='x', admin=0)
+        UsersLocations.objects.create(id_user=operator, id_lokasi=self.lokasi)
+        self.user = {'HTTP_X_SESSION_DATA': json.dumps({'id': operator.id, 'admin': 0})}
+
+    def test_profiled_request_stores_sql_with_explain(self):
+        plain = self.client.get(self.url, **self.admin)
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        response = self.client.get(self.url, HTTP_X_PROFILE='1', **self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, plain.content)
+        profile_id = response['X-Profile-Id']
+
+        response = self.client.get(f'/api/profiles/{profile_id}', **self.admin)
+        self.assertEqual(response.status_code, 200)
+        profile = response.data['profile']
+        self.assertEqual(profile['path'], '/api/revenue/range/all')
+        self.assertEqual(profile['sql_count'], len(profile['queries']))
+        self.assertGreater(profile['sql_count'], 0)
+        selects = [query for query in profile['queries'] if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects and all(query['explain'] for query in selects))
+        self.assertFalse([plan for query in selects for plan in query['explain'] if 'error' in plan])
+        self.assertIn('cumulative', profile['profile'])
+
+        response = self.client.get(f'/api/profiles/{profile_id}?download=pstats', **self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_admin_only_and_untriggered_requests_untouched(self):
+        user = self.user
+        self.assertEqual(self.client.get(self.url, **user).status_code, 200)
+        self.assertEqual(self.client.get(self.url + '&profile=1', **user).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_X_PROFILE='1').status_code, 403)
+
+        response = self.client.get(self.url, **self.admin)
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        response = self.client.get(self.url + '&profile=1', **self.admin)
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(self.client.get(f'/api/profiles/{profile_id}', **user).status_code, 403)
+        self.assertEqual(self.client.get('/api/profiles/tidak-ada', **self.admin).status_code, 404)
+        self.assertIsNotNone(caches[PROFILE_CACHE_ALIAS].get(profile_key(profile_id)))
+
+@skipUnless(REPLICA_ALIAS in settings.DATABASES, "Butuh alias database 'replica', lihat dashboard_backend/test_settings.py.")
+@override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS])
+class ReplicaRoutingTests(UnmanagedTablesTestCase):
+    # Tanpa alias replica kelas ini di-skip, tapi `databases` tetap divalidasi test runner
+    databases = {'default', REPLICA_ALIAS}.intersection(settings.DATABASES)
+    unmanaged_models = UNMANAGED_MODELS + (RevenueRealtime, Users, UsersLocations)
+    admin = {'HTTP_X_SESSION_DATA': '{"id": 1, "admin": 1}'}
+    url = '/api/revenuerealtime/all'
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        invalidate_watermarks()
+        invalidate_user_locations()
+        reset_replica_status()
+        self.replica = REPLICA_ALIAS
+        # Lokasi disalin ke replica dengan id yang sama, seperti hasil replikasi
+        self.lokasi = Locations.objects.create(pengelola='p', site='Site A', alamat='a')
+        Locations.objects.using(self.replica).create(id=self.lokasi.id, pengelola='p', site='Site A', alamat='a')
+        self.waktu = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+    def add_realtime(self, alias, waktu, jumlah):
+        RevenueRealtime.objects.using(alias).create(
+            id_lokasi_id=self.lokasi.id, tanggal=waktu.date(), shift='1', waktu=waktu,
+            kendaraan='MOBIL', qty=1, jumlah=Decimal(jumlah),
+        )
+
+    def realtime_total(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        response = self.client.get(self.url, **self.admin)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sum(row['jumlah_pendapatan'] for row in response.data)
+
+    def test_analytic_reads_use_replica_only_inside_request(self):
+        self.assertEqual(router.db_for_read(IncomeParkir), 'default')
+        with replica_reads():
+            self.assertEqual(router.db_for_read(IncomeParkir), self.replica)
+            self.assertEqual(router.db_for_read(RevenueRealtime), self.replica)
+            self.assertEqual(router.db_for_read(Users), 'default')
+            self.assertEqual(router.db_for_write(IncomeParkir), 'default')
+
+            operator = Users.objects.create(id_user='operator', nama_user='Operator', password='x', admin=0)
+            UsersLocations.objects.create(id_user=operator, id_lokasi=self.lokasi)
+        self.assertTrue(Users.objects.using('default').filter(id_user='operator').exists())
+        self.assertFalse(Users.objects.using(self.replica).exists())
+        self.assertFalse(UsersLocations.objects.using(self.replica).exists())
+        self.assertFalse(router.allow_migrate(self.replica, 'app_revenue_rollup'))
+
+    def test_realtime_endpoint_reads_replica_until_it_lags(self):
+        # Replica up to date: baris yang sama, jumlah dibedakan untuk mengenali sumbernya
+        self.add_realtime('default', self.waktu, 5000)
+        self.add_realtime(self.replica, self.waktu, 7000)
+        self.assertEqual(self.realtime_total(), 7000)
+
+        # Primary menerima data dua jam lebih baru yang belum sampai di replica
+        self.add_realtime('default', self.waktu + timedelta(hours=2), 3000)
+        reset_replica_status()
+        invalidate_watermarks()
+        self.assertEqual(self.realtime_total(), 5000 + 3000)
+
+class RendererTests(TestCase):
+
+    def test_matches_drf_json_renderer(self):
+        data = {
+            'Site A': [{'tanggal': date(2024, 1, 1), 'total': Decimal('15000.50'), 'qty': Decimal('3'),
+                        'rata': Decimal('10') / 3, 'waktu': datetime(2024, 3, 31, 9, tzinfo=timezone.utc),
+                        'naive': datetime(2024, 3, 31, 9, 30, 15, 250000), 'none': None}],
+            'Lokasi \u2028 é': [1, 2.5, True],
+            'tuple': (1, 2),
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back_to_drf(self):
+        body = ORJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(body, b'{\n  "a": 1\n}')
@@ -1,6 +1,9 @@
 # project_dashboard/urls.py
 from django.contrib import admin
 from django.urls import path, include
+from .batch import DashboardBatchView
+from .metrics import MetricsView
+from .profiling import ProfileView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -20,11 +23,16 @@ urlpatterns = [
     path('api/', include('app_revenue_trends.urls')),
     path('api/', include('app_revenue_details.urls')),
     path('api/', include('app_revenue_trends_by_locations.urls')),
+    path('api/', include('app_revenue_rollup.urls')),
 
     path('api/', include('app_trouble_transactions.urls')),
 
     path('api/', include('app_traffic_hours.urls')),
 
+    path('api/dashboard/batch', DashboardBatchView.as_view(), name='dashboard_batch'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
+    path('api/profiles/<str:profile_id>', ProfileView.as_view(), name='request_profile'),
+
 
     # path('api/', include('app_traffic_per_hours.urls')),
     # path('api/revenue/', include('app_revenue_trends.urls')),  # Include this line